@@ -0,0 +1,27 @@
+from typing import Any
+
+import numpy as np
+
+
+def prepend(state: Any, values: np.ndarray) -> np.ndarray:
+    """`values` with `state` (one sample, or several along the last axis)
+    inserted before the first sample of every row.
+
+    `state` broadcasts against the rows of `values`, so a scalar or 1-D
+    state may precede a batched (batch x time) block.
+    """
+    head = np.asarray(state)
+    if head.ndim == 0:
+        head = head[None]
+    head = np.broadcast_to(head, values.shape[:-1] + head.shape[-1:])
+
+    return np.concatenate((head, values), axis=-1)
+
+
+def last(values: np.ndarray) -> Any:
+    """Last sample of a block: a Python scalar, or a column holding the last
+    sample of every row of a batched block."""
+    if values.ndim == 1:
+        return values[-1].item()
+
+    return values[:, -1:].copy()
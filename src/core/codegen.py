@@ -0,0 +1,217 @@
+from .components import Wire, Component
+
+from collections import OrderedDict
+from typing import Callable, List, Tuple
+import math
+import re
+
+
+# Matches the placeholders of `Component.kernel` templates: `{name}`, an
+# attribute path such as `{lowpass.state}`, or an element of one such as
+# `{lowpass.state[0]}`
+_PLACEHOLDER = re.compile(r'\{(\w+(?:\.\w+)*)((?:\[\d+\])*)\}')
+
+# Globals visible to generated kernels (besides the builtins)
+_KERNEL_GLOBALS = {
+    'cos': math.cos,
+    'sin': math.sin,
+    'atan2': math.atan2,
+    'remainder': math.remainder,
+    'pi': math.pi
+}
+
+# Number of compiled kernels kept, least recently used first out
+KERNEL_CACHE_SIZE = 64
+
+# Compiled kernels, keyed by topology signature
+_KERNEL_CACHE: 'OrderedDict[tuple, Tuple[str, Callable]]' = OrderedDict()
+
+_SPECIAL = ('input', 'output', 'time', 'write')
+
+
+def _has_path(component: Component, path: str) -> bool:
+    value = component
+    for name in path.split('.'):
+        if not hasattr(value, name):
+            return False
+        value = getattr(value, name)
+
+    return True
+
+
+def _kernel_names(component: Component) -> Tuple[str, ...]:
+    """Placeholders of the component's kernel that name one of its
+    attributes (or an element of one), i.e. the values loaded into locals
+    before the loop."""
+    names = {path + indices for path, indices
+             in _PLACEHOLDER.findall(component.kernel or '')
+             if path not in _SPECIAL and _has_path(component, path)}
+
+    return tuple(sorted(names))
+
+
+def _local(index: int, name: str) -> str:
+    """Local variable holding the placeholder `name` of component number
+    `index`."""
+    return f"c{index}_" + re.sub(r'\W+', '_', name).strip('_')
+
+
+def _signature(sim) -> tuple:
+    """Everything the generated source depends on. Parameter values are not
+    part of it, since they are loaded from the components at run time."""
+    wires = _kernel_wires(sim)
+
+    return (sim.input_divisor, tuple(
+        (type(component), wires.index(component.input_wire),
+         wires.index(component.output_wire), divisor, component.kernel,
+         _kernel_names(component))
+        for component, divisor in sim.plan))
+
+
+def _kernel_wires(sim) -> List[Wire]:
+    wires = [sim.input_wire]
+    for component in sim.schedule:
+        for wire in (component.input_wire, component.output_wire):
+            if wire not in wires:
+                wires.append(wire)
+
+    return wires
+
+
+def _generate(sim) -> str:
+    wires = _kernel_wires(sim)
+    components = sim.schedule
+
+    # Wires whose samples the kernel collects itself; components without a
+    # kernel record their output through `tick` as usual
+    recorded = [0] + [wires.index(component.output_wire)
+                      for component in components
+                      if component.kernel is not None]
+
+    head = [
+        "def kernel(n_steps, step, time, dt, source, components, wires):",
+        "    times = []",
+        "    times_append = times.append"
+    ]
+    head += [f"    c{i} = components[{i}]" for i in range(len(components))]
+    head += [f"    w{i} = wires[{i}]" for i in range(len(wires))]
+    head += [f"    x{i} = w{i}.voltage" for i in range(len(wires))]
+    for i in recorded:
+        head += [f"    h{i} = []", f"    h{i}_append = h{i}.append"]
+
+    tail = []
+    body = ["times_append(time)"]
+
+    # System input
+    body += _guard(["x0 = source(time)", "h0_append(x0)"], sim.input_divisor)
+
+    for index, (component, divisor) in enumerate(sim.plan):
+        x_in = f"x{wires.index(component.input_wire)}"
+        out = wires.index(component.output_wire)
+
+        lines = [f"# {type(component).__name__}"]
+        if component.kernel is None:
+            w_in = f"w{wires.index(component.input_wire)}"
+            lines += [f"{w_in}.voltage = {x_in}",
+                      f"c{index}.tick(time)",
+                      f"x{out} = w{out}.voltage"]
+        else:
+            lines += _substitute(component.kernel, index, x_in, f"x{out}",
+                                 f"h{out}_append")
+            # Decimating components record their writes with `{write}`
+            if component.decimation == 1:
+                lines.append(f"h{out}_append(x{out})")
+
+            for name in _kernel_names(component):
+                value = f"c{index}.{name}"
+                # Elements are loaded as plain floats
+                if name.endswith(']'):
+                    value = f"float({value})"
+                head.append(f"    {_local(index, name)} = {value}")
+                if name.split('[')[0] in component.kernel_state:
+                    tail.append(f"    c{index}.{name} = {_local(index, name)}")
+
+        body += _guard(lines, divisor)
+
+    # Registers latch their settled input once every component ran
+    for index, (component, divisor) in enumerate(sim.plan):
+        if component.registered:
+            w_in = wires.index(component.input_wire)
+            body += _guard([f"w{w_in}.voltage = x{w_in}",
+                            f"c{index}.latch(time)"], divisor)
+
+    body += ["step += 1", "time += dt"]
+
+    tail += [f"    w{i}.voltage = x{i}" for i in range(len(wires))]
+    tail.append(f"    return step, time, times, "
+                f"[{', '.join(f'(w{i}, h{i})' for i in recorded)}]")
+
+    loop = ["    for _ in range(n_steps):"] + [f"        {line}"
+                                                for line in body]
+
+    return '\n'.join(head + loop + tail) + '\n'
+
+
+def _substitute(template: str, index: int,
+                x_in: str, x_out: str, write: str) -> List[str]:
+    """Turns a kernel template into lines of the generated loop: `{input}`,
+    `{output}`, `{time}` and `{write}` map to the loop's variables and
+    recorder, every other placeholder to a local private to component
+    number `index`."""
+    special = {'input': x_in, 'output': x_out, 'time': 'time',
+               'write': write}
+
+    def local(match: re.Match) -> str:
+        name = match.group(1) + match.group(2)
+        return special.get(name) or _local(index, name)
+
+    return [_PLACEHOLDER.sub(local, line)
+            for line in template.strip('\n').splitlines()]
+
+
+def _guard(lines: List[str], divisor: int) -> List[str]:
+    """Wraps `lines` so they only run on every `divisor`-th time-step."""
+    if divisor == 1:
+        return lines
+
+    return [f"if step % {divisor} == 0:"] + [f"    {line}" for line in lines]
+
+
+def fuse(sim) -> Tuple[Callable, List[Component], List[Wire]]:
+    """Generates a single Python function running the whole (compiled)
+    topology of `sim` for a given number of time-steps.
+
+    Every component that provides a `kernel` template is inlined into one
+    loop with its parameters and state held in local variables; the others
+    are ticked in place. The last `KERNEL_CACHE_SIZE` generated functions
+    are cached by topology, so rebuilding an identical simulation reuses
+    them.
+
+    Returns the function together with the components and wires it expects
+    as arguments.
+    """
+    if sim.schedule is None:
+        sim.compile()
+
+    key = _signature(sim)
+    if key in _KERNEL_CACHE:
+        _KERNEL_CACHE.move_to_end(key)
+    else:
+        source = _generate(sim)
+
+        namespace = dict(_KERNEL_GLOBALS)
+        exec(compile(source, '<kernel>', 'exec'), namespace)
+
+        _KERNEL_CACHE[key] = (source, namespace['kernel'])
+        if len(_KERNEL_CACHE) > KERNEL_CACHE_SIZE:
+            _KERNEL_CACHE.popitem(last=False)
+
+    _, kernel = _KERNEL_CACHE[key]
+    return kernel, list(sim.schedule), _kernel_wires(sim)
+
+
+def kernel_source(sim) -> str:
+    """Returns the generated source of `sim`'s fused kernel (for
+    inspection)."""
+    fuse(sim)
+    return _KERNEL_CACHE[_signature(sim)][0]
@@ -1,4 +1,6 @@
 from .base import Wire, Component
+from .delay import Delay
+from .history import History
 
 
-__all__ = ['Wire', 'Component']
+__all__ = ['Wire', 'Component', 'Delay', 'History']
@@ -1,43 +1,204 @@
-from typing import List
+from .history import History, RECORDING_MODES
+from ..oscillators import Oscillator, OscillatorBank
+
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
 
 
 class Wire:
     """Represents a physical connection carrying a voltage signal.
     It stores the instantaneous value and the history for plotting.
+
+    The instantaneous value lives in slot `index` of `store`, a float array
+    the wire owns until a simulation binds it to its shared voltage store
+    (see `Simulation.voltages`).
+
+    A wire with `dtype=complex` carries a complex envelope instead (see
+    `src.modules.baseband`). It keeps its value in a store of its own, and
+    `carrier_freq`, when set, is the carrier it is shifted up to for
+    display.
     """
 
-    def __init__(self, name: str):
+    __slots__ = ('name', 'dtype', 'carrier_freq', 'effects', 'timebase',
+                 'stride', 'recording', 'start_index', 'store', 'index',
+                 '_history')
+
+    def __init__(self, name: str, dtype: type = float,
+                 carrier_freq: Optional[float] = None):
         self.name = name
+        self.dtype = dtype
+        self.carrier_freq = carrier_freq
+
+        self.store = array('d', [0.0]) if dtype is float else [dtype(0)]
+        self.index = 0
 
         self.effects: List[Component] = []
 
+        # Time axis shared by every wire of the simulation recording this one,
+        # and the number of time-steps between two writes to this wire
+        self.timebase: Optional[History] = None
+        self.stride = 1
+
+        # Recording policy, see `set_recording`
+        self.recording: Tuple[str, int] = ('full', 1)
+
         self.reset()
 
+    def set_recording(self, mode: str = 'full', every: int = 1):
+        """Chooses how the wire records its history.
+
+        Modes:
+        - 'full': every sample.
+        - 'decimate': every `every`-th sample.
+        - 'envelope': min and max of each bucket of `every` samples.
+        - 'changes': only the samples that differ from the previous one.
+        - 'off': nothing.
+
+        Changing the policy drops the samples recorded so far.
+        """
+        if mode not in RECORDING_MODES:
+            raise ValueError(f"Unknown recording mode: {mode}")
+        if every < 1:
+            raise ValueError("Recording bucket size must be at least 1")
+        if mode == 'envelope' and self.dtype is not float:
+            raise ValueError("Envelope recording needs a real-valued wire")
+
+        self.recording = (mode, every)
+        self._restart_history()
+
+    def _restart_history(self):
+        mode, every = self.recording
+        self._history = RECORDING_MODES[mode](every, self.dtype)
+        self.start_index = \
+            len(self.timebase) if self.timebase is not None else 0
+
+    @property
+    def voltage(self) -> float:
+        return self.store[self.index]
+
+    @voltage.setter
+    def voltage(self, value: float):
+        self.store[self.index] = value
+
+    def bind(self, store: array, index: int):
+        """Moves the wire's instantaneous value into slot `index` of
+        `store`."""
+        store[index] = self.store[self.index]
+        self.store = store
+        self.index = index
+
+    def attach(self, timebase: History):
+        """Binds the wire to a simulation's shared time axis. Samples
+        recorded from now on line up with the timestamps appended to
+        `timebase` from its current length onwards."""
+        self.timebase = timebase
+        self.start_index = len(timebase) - self._history.seen * self.stride
+
     def write_async(self, value: float, timestamp: float):
         """Updates the wire's voltage, without triggering update on components
-        connected to it."""
-        self.voltage = value
+        connected to it.
+
+        `timestamp` is the current entry of the simulation's time axis; only
+        recording policies with their own time axis keep it.
+        """
+        self.store[self.index] = value
 
         # Record history for visualization
-        self.history.append(value)
-        self.time_axis.append(timestamp)
+        self._history.append(value, timestamp)
 
     def write(self, value: float, timestamp: float):
         """Updates the wire's voltage."""
-        self.write_async(value, timestamp)
+        self.store[self.index] = value
+        self._history.append(value, timestamp)
+
+    def write_block_async(self, values: np.ndarray, timestamps: np.ndarray):
+        """Block counterpart of `write_async`. The last sample becomes the
+        wire's instantaneous voltage.
+
+        A batched block (batch x time) leaves a column of voltages, one per
+        row, which the wire keeps in a store of its own.
+        """
+        if values.ndim > 1:
+            self.store = [values[:, -1:].copy()]
+            self.index = 0
+        else:
+            self.store[self.index] = values[-1].item()
+
+        self._history.extend(values, timestamps)
+
+    def write_block(self, values: np.ndarray, timestamps: np.ndarray):
+        """Block counterpart of `write`."""
+        self.write_block_async(values, timestamps)
+
+    def set_aside(self) -> tuple:
+        """Detaches the recorded history and the instantaneous value, so the
+        wire can be written again without disturbing them; it records
+        nothing until `restore` hands them back."""
+        state = (self._history, self.start_index, self.store, self.index,
+                 self.store[self.index])
+        self._history = RECORDING_MODES['off'](1, self.dtype)
+
+        return state
 
-        self.update = True
+    def restore(self, state: tuple):
+        """Reinstates what `set_aside` detached."""
+        self._history, self.start_index, self.store, self.index, value = \
+            state
+        self.store[self.index] = value
 
     def read(self) -> float:
         """Returns the current voltage on the wire."""
-        return self.voltage
+        return self.store[self.index]
+
+    @property
+    def history(self) -> np.ndarray:
+        """Recorded voltages, as a zero-copy view."""
+        return self._history.view()
+
+    @property
+    def time_axis(self) -> np.ndarray:
+        """Timestamps of the recorded voltages, taken from the shared time
+        axis (as a view where the recording policy allows). Falls back to
+        sample indices for a wire that is not attached to a simulation."""
+        history = self._history
+        if self.timebase is None:
+            return history.timestamps(np.arange(history.seen, dtype=float))
+
+        return history.timestamps(
+            self.timebase.view()[self.start_index::self.stride])
+
+    def reserve(self, n_samples: int):
+        """Preallocates history storage for `n_samples` more samples."""
+        self._history.reserve(n_samples)
 
     def reset(self):
         """Clears the history and wire state."""
-        self.voltage: float = 0.0
-        self.history: List[float] = []
-        self.time_axis: List[float] = []
-        self.update = False
+        self.store[self.index] = self.dtype(0)
+        self._restart_history()
+
+
+class _DetachedWire(Wire):
+    """Stand-in wire used while replaying `tick` over a block. It holds the
+    instantaneous voltage and collects the written values in a plain list."""
+
+    __slots__ = ('written',)
+
+    def __init__(self, wire: Wire):
+        self.name = wire.name
+        self.dtype = wire.dtype
+        self.effects = []
+        self.store = [wire.voltage]
+        self.index = 0
+
+        self.written: List[float] = []
+
+    def write_async(self, value: float, timestamp: float):
+        self.store[0] = value
+        self.written.append(value)
+
+    write = write_async
 
 
 class Component:
@@ -45,13 +206,94 @@ class Component:
     Modulators).
 
     This acts like a Verilog module.
+
+    `tick_rate` is the rate (in Hz) at which the engine ticks the component;
+    `None` ticks it on every time-step. A component that writes its output
+    only once every few ticks (a decimator) sets `decimation` accordingly.
+
+    Components may also describe `tick` as a `kernel` template, so the
+    engine can inline them into a fused loop (see `src.core.codegen`). The
+    template is plain Python run on every tick: `{input}`, `{output}` and
+    `{time}` stand for the input voltage, the output voltage (which the
+    template must assign) and the current time; any other `{name}` is either
+    an attribute of the component (possibly nested, `{lowpass.state}`, or an
+    element of one, `{lowpass.state[0]}`) or a temporary. Attributes listed
+    in `kernel_state` are written back to the component after the loop. A
+    decimating component records its output itself, calling `{write}` on
+    the ticks it writes.
+
+    A component with `registered` set is a register (see `Delay`): its
+    output only depends on earlier time-steps, so it may close a feedback
+    loop. The engine ticks it before the rest of the schedule and calls its
+    `latch` method once the step settled.
+
+    An `lti` component is a linear time-invariant FIR filter: it applies
+    `taps` to its input, keeping its most recent inputs in `buffer` (newest
+    first, one per tap), and writes every `decimation`-th result (counting
+    ticks in `count`). The block engine evaluates chains of them in the
+    frequency domain (see `src.core.lti`).
+
+    Ticking a `pure` component has no effect unless its input or its
+    `clock` changed since its previous tick, so the event-driven engine
+    skips it otherwise.
+
+    Attributes listed in `scan_state` accumulate increments that do not
+    depend on their own value (such as an oscillator's phase), so they can
+    be carried across independently simulated stretches of time by summing
+    the increments of each (see `src.core.parallel`). A `chunkable`
+    component can be run over such a stretch from a fresh reset: any other
+    state it keeps fades within the number of ticks `settling` gives
+    (filters, detectors, decisions renewed every bit).
+
+    A `batchable` component's `process_block` also accepts batched blocks,
+    whose samples carry a leading batch axis (batch x time). Its attributes
+    listed in `parameters` may then hold one value per row: the engine turns
+    a 1-D sequence of values into a column that broadcasts against such
+    blocks, and the state the component derives from them follows suit (see
+    `src.core.batch`).
+
+    Components driving carriers take them from an `OscillatorBank` in
+    `request_carriers` and keep them in `carriers`, so the simulation can
+    compute identical carriers once for all of them.
+
+    `input_index` and `output_index` are the slots of the component's wires
+    in the voltage store of the simulation it is registered with.
+
+    Subclasses declare their own attributes in `__slots__`; `get_state` and
+    `set_state` save and reinstate them (the wiring and carriers aside).
     """
 
+    __slots__ = ('input_wire', 'output_wire', 'tick_rate',
+                 'input_index', 'output_index', 'carriers')
+
+    decimation = 1
+    registered = False
+    pure = False
+    lti = False
+
+    kernel: Optional[str] = None
+    kernel_state: Tuple[str, ...] = ()
+
+    chunkable = False
+    scan_state: Tuple[str, ...] = ()
+
+    batchable = False
+    parameters: Tuple[str, ...] = ()
+
     def __init__(self,
                  input_wire: Wire,
-                 output_wire: Wire):
+                 output_wire: Wire,
+                 tick_rate: Optional[float] = None):
         self.input_wire = input_wire
         self.output_wire = output_wire
+        self.tick_rate = tick_rate
+
+        self.input_index = input_wire.index
+        self.output_index = output_wire.index
+
+        # Carriers from a bank of the component's own until a simulation
+        # shares its bank
+        self.carriers: Tuple[Oscillator, ...] = ()
 
         input_wire.effects.append(self)
 
@@ -63,5 +305,81 @@ class Component:
         _ = time
         pass
 
+    def process_block(self, times: np.ndarray,
+                      inputs: np.ndarray) -> np.ndarray:
+        """Block counterpart of `tick`: maps the input samples at `times` to
+        the output samples.
+
+        `times` holds the component's own ticks only, and the output holds
+        one sample per write (one per tick unless the component decimates).
+
+        The default implementation replays `tick` once per sample against
+        detached wires. Override it in subclasses whose logic vectorizes; the
+        result must match what the scalar `tick` would have produced.
+        """
+        input_wire, output_wire = self.input_wire, self.output_wire
+        probe_in = _DetachedWire(input_wire)
+        probe_out = _DetachedWire(output_wire)
+
+        self.input_wire, self.output_wire = probe_in, probe_out
+        try:
+            for time, value in zip(times.tolist(), inputs.tolist()):
+                probe_in.voltage = value
+                self.tick(time)
+        finally:
+            self.input_wire, self.output_wire = input_wire, output_wire
+
+        return np.array(probe_out.written, dtype=output_wire.dtype)
+
+    def clock(self, times):
+        """Labels the part of its period each of `times` (a float or an
+        array) falls in, for a `pure` component whose ticks also depend on
+        time (such as a bit clock). `None` when they do not."""
+        _ = times
+        return None
+
+    def settling(self, dt: float) -> int:
+        """Number of ticks, `dt` seconds apart, after which the output no
+        longer depends on the state the component was reset to (the state
+        in `scan_state` aside)."""
+        _ = dt
+        return 0
+
+    def request_carriers(self, oscillators: OscillatorBank):
+        """Takes the carriers the component drives from `oscillators` into
+        `carriers`. Called by the simulation on compile, once the
+        parameters are final (see `Simulation.oscillators`)."""
+        _ = oscillators
+        pass
+
+    def max_frequency(self, bandwidth: float, peak: float = 1.0) -> float:
+        """Highest frequency (in Hz) with significant content in the output,
+        when the input carries nothing above `bandwidth` and stays within
+        +/-`peak`.
+
+        The default suits components that do not widen the spectrum
+        (filters, resamplers, demodulators). Modulators override it, so
+        a time-step can be picked from what the topology generates (see
+        `src.core.sampling`).
+        """
+        _ = peak
+        return bandwidth
+
+    def get_state(self) -> Dict[str, Any]:
+        """The component's own attributes, by name: those in the `__slots__`
+        of its subclasses, plus any held in a `__dict__` of its own."""
+        state = {name: getattr(self, name)
+                 for cls in type(self).__mro__ if cls is not Component
+                 for name in cls.__dict__.get('__slots__', ())
+                 if hasattr(self, name)}
+        state.update(getattr(self, '__dict__', {}))
+
+        return state
+
+    def set_state(self, state: Dict[str, Any]):
+        """Reinstates attributes saved by `get_state`."""
+        for name, value in state.items():
+            setattr(self, name, value)
+
     def reset(self):
         pass
@@ -0,0 +1,41 @@
+from .base import Wire, Component
+
+from typing import Optional
+
+
+class Delay(Component):
+    """Unit-delay register: on every tick it outputs the input it latched on
+    its previous tick.
+
+    Registers break feedback loops. The engine runs them in two phases: at
+    the start of the time-step `tick` writes the latched value, so the
+    components downstream can run in a single pass, and once every other
+    component ran `latch` captures the settled input for the next tick.
+    """
+
+    __slots__ = ('initial', 'state')
+
+    registered = True
+    chunkable = True
+
+    def __init__(self,
+                 input_wire: Wire,
+                 output_wire: Wire,
+                 initial: float = 0.0,
+                 tick_rate: Optional[float] = None):
+        super().__init__(input_wire, output_wire, tick_rate)
+        self.initial = initial
+
+        self.reset()
+
+    def reset(self):
+        self.state = self.initial
+
+    def settling(self, dt: float) -> int:
+        return 1
+
+    def tick(self, time: float):
+        self.output_wire.write(self.state, time)
+
+    def latch(self, time: float):
+        self.state = self.input_wire.read()
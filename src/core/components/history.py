@@ -0,0 +1,287 @@
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+
+class History:
+    """Append-only store of float samples backed by a NumPy array.
+
+    Capacity can be reserved up front and otherwise grows geometrically.
+    `view()` hands out the recorded samples without copying; a view taken
+    before the buffer grows keeps pointing at the old (still valid) samples.
+
+    The timestamps passed to `append` and `extend` are only kept by policies
+    that record their own time axis (see `ChangeHistory`). Samples are real
+    unless `dtype` is `complex`.
+
+    The first batched block (batch x time) passed to `extend` gives the
+    buffer one row per batch entry, with the samples recorded earlier
+    repeated in every row; `view()` then returns a 2-D array.
+    """
+
+    def __init__(self, capacity: int = 1024, dtype: type = float):
+        self.data = np.empty(capacity, dtype=dtype)
+        self.length = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def seen(self) -> int:
+        """Number of samples offered to the buffer so far."""
+        return self.length
+
+    def reserve(self, n_samples: int):
+        """Makes room for at least `n_samples` more samples."""
+        needed = self.length + n_samples
+        if needed > self.data.shape[-1]:
+            self._grow(needed)
+
+    def append(self, value: float, timestamp: float = 0.0):
+        length = self.length
+        if length == self.data.shape[-1]:
+            self._grow(length + 1)
+
+        self.data[..., length] = value
+        self.length = length + 1
+
+    def extend(self, values: np.ndarray,
+               timestamps: Optional[np.ndarray] = None):
+        if np.ndim(values) > self.data.ndim:
+            self._add_rows(len(values))
+
+        start = self.length
+        end = start + np.shape(values)[-1]
+        if end > self.data.shape[-1]:
+            self._grow(end)
+
+        self.data[..., start:end] = values
+        self.length = end
+
+    def clear(self):
+        """Drops all samples. Views handed out earlier are left intact."""
+        self.data = np.empty_like(self.data)
+        self.length = 0
+
+    def view(self) -> np.ndarray:
+        """Returns the recorded samples as a zero-copy array view."""
+        return self.data[..., :self.length]
+
+    def timestamps(self, timebase: np.ndarray) -> np.ndarray:
+        """Maps the recorded samples onto `timebase`, the timestamps of every
+        sample offered since recording started."""
+        return timebase[:self.length]
+
+    def _grow(self, needed: int):
+        capacity = max(needed, 2 * self.data.shape[-1])
+
+        data = np.empty(self.data.shape[:-1] + (capacity,),
+                        dtype=self.data.dtype)
+        data[..., :self.length] = self.data[..., :self.length]
+        self.data = data
+
+    def _add_rows(self, n_rows: int):
+        data = np.empty((n_rows, self.data.shape[-1]), dtype=self.data.dtype)
+        data[:, :self.length] = self.data[:self.length]
+        self.data = data
+
+
+class DecimatedHistory(History):
+    """Keeps every `every`-th sample offered, starting with the first one."""
+
+    def __init__(self, every: int, capacity: int = 1024,
+                 dtype: type = float):
+        super().__init__(capacity, dtype)
+        self.every = every
+        self.offered = 0
+
+    @property
+    def seen(self) -> int:
+        return self.offered
+
+    def reserve(self, n_samples: int):
+        super().reserve(-(-n_samples // self.every))
+
+    def append(self, value: float, timestamp: float = 0.0):
+        if self.offered % self.every == 0:
+            super().append(value)
+        self.offered += 1
+
+    def extend(self, values: np.ndarray,
+               timestamps: Optional[np.ndarray] = None):
+        offset = -self.offered % self.every
+        super().extend(values[..., offset::self.every])
+        self.offered += np.shape(values)[-1]
+
+    def clear(self):
+        super().clear()
+        self.offered = 0
+
+    def timestamps(self, timebase: np.ndarray) -> np.ndarray:
+        return timebase[:self.length * self.every:self.every]
+
+
+class EnvelopeHistory(History):
+    """Records the minimum and maximum of each bucket of `every` samples.
+
+    Each complete bucket yields two samples (min, max), both stamped with the
+    time of the bucket's first sample. A trailing partial bucket is not
+    recorded until it fills up.
+    """
+
+    def __init__(self, every: int, capacity: int = 1024):
+        super().__init__(capacity)
+        self.every = every
+        self.offered = 0
+
+        self.low = 0.0
+        self.high = 0.0
+
+    @property
+    def seen(self) -> int:
+        return self.offered
+
+    def reserve(self, n_samples: int):
+        super().reserve(2 * -(-n_samples // self.every))
+
+    def append(self, value: float, timestamp: float = 0.0):
+        filled = self.offered % self.every
+        if filled == 0:
+            self.low = self.high = value
+        elif value < self.low:
+            self.low = value
+        elif value > self.high:
+            self.high = value
+
+        self.offered += 1
+        if filled == self.every - 1:
+            super().extend((self.low, self.high))
+
+    def extend(self, values: np.ndarray,
+               timestamps: Optional[np.ndarray] = None):
+        _check_unbatched(values, 'envelope')
+        every = self.every
+
+        # Complete the bucket left open by earlier samples
+        head = -self.offered % every
+        if head > 0:
+            for value in values[:head].tolist():
+                self.append(value)
+            values = values[head:]
+
+        n_buckets = len(values) // every
+        if n_buckets > 0:
+            buckets = values[:n_buckets * every].reshape(n_buckets, every)
+
+            envelope = np.empty((n_buckets, 2))
+            envelope[:, 0] = buckets.min(axis=1)
+            envelope[:, 1] = buckets.max(axis=1)
+
+            super().extend(envelope.ravel())
+            self.offered += n_buckets * every
+
+        for value in values[n_buckets * every:].tolist():
+            self.append(value)
+
+    def clear(self):
+        super().clear()
+        self.offered = 0
+
+    def timestamps(self, timebase: np.ndarray) -> np.ndarray:
+        n_buckets = self.length // 2
+        return np.repeat(timebase[:n_buckets * self.every:self.every], 2)
+
+
+class DisabledHistory(History):
+    """Records nothing."""
+
+    def __init__(self, capacity: int = 0, dtype: type = float):
+        super().__init__(capacity, dtype)
+        self.offered = 0
+
+    @property
+    def seen(self) -> int:
+        return self.offered
+
+    def reserve(self, n_samples: int):
+        pass
+
+    def append(self, value: float, timestamp: float = 0.0):
+        self.offered += 1
+
+    def extend(self, values: np.ndarray,
+               timestamps: Optional[np.ndarray] = None):
+        self.offered += np.shape(values)[-1]
+
+    def clear(self):
+        self.offered = 0
+
+
+class ChangeHistory(History):
+    """Records a sample only when it differs from the previous one, together
+    with its own timestamp, so a piecewise-constant signal costs one sample
+    per transition. The signal holds each recorded value until the next
+    one."""
+
+    def __init__(self, capacity: int = 1024, dtype: type = float):
+        super().__init__(capacity, dtype)
+        self.times = History(capacity)
+        self.offered = 0
+
+        self.last = 0.0
+
+    @property
+    def seen(self) -> int:
+        return self.offered
+
+    def reserve(self, n_samples: int):
+        pass
+
+    def append(self, value: float, timestamp: float = 0.0):
+        if self.length == 0 or value != self.last:
+            super().append(value)
+            self.times.append(timestamp)
+            self.last = value
+
+        self.offered += 1
+
+    def extend(self, values: np.ndarray,
+               timestamps: Optional[np.ndarray] = None):
+        _check_unbatched(values, 'changes')
+        if len(values) == 0:
+            return
+
+        changed = np.empty(len(values), dtype=bool)
+        changed[0] = self.length == 0 or values[0] != self.last
+        np.not_equal(values[1:], values[:-1], out=changed[1:])
+
+        super().extend(values[changed])
+        self.times.extend(timestamps[changed])
+        self.last = values[-1].item()
+
+        self.offered += len(values)
+
+    def clear(self):
+        super().clear()
+        self.times.clear()
+        self.offered = 0
+
+    def timestamps(self, timebase: np.ndarray) -> np.ndarray:
+        return self.times.view()
+
+
+def _check_unbatched(values: np.ndarray, mode: str):
+    if np.ndim(values) > 1:
+        raise ValueError(f"Recording mode '{mode}' cannot record a batched "
+                         "wire")
+
+
+# Recording policies accepted by `Wire.set_recording`, each building a
+# buffer from the policy's bucket size and the sample type
+RECORDING_MODES: Dict[str, Callable[[int, type], History]] = {
+    'full': lambda every, dtype: History(dtype=dtype),
+    'decimate': lambda every, dtype: DecimatedHistory(every, dtype=dtype),
+    'envelope': lambda every, dtype: EnvelopeHistory(every),
+    'changes': lambda every, dtype: ChangeHistory(dtype=dtype),
+    'off': lambda every, dtype: DisabledHistory(dtype=dtype)
+}
@@ -1,25 +1,101 @@
-from .components import Wire, Component
+from .codegen import fuse
+from .lti import LTIChain, find_chains
+from .oscillators import OscillatorBank
+from .parallel import run_parallel
+from .partition import run_partitioned
+from .pipeline import run_pipelined
+from .components import Wire, Component, History
+from .schedule import compile_schedule, sample_held, upstream
+from .signals import sample_signal
 from .types import SignalGenerator
 
-from typing import List
+from array import array
+import copy
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
 
 
 class Simulation:
-    """The main engine that drives the clock."""
+    """The main engine that drives the clock.
+
+    `dt` is the base time-step. Components (and the input, through
+    `input_rate`) may run at a lower rate; they are then ticked once every
+    `rate_divisor(rate)` time-steps and their output wires hold their value in
+    between.
+
+    With `event_driven` set, every wire records its changes only and pure
+    components (see `Component.pure`) are skipped until their input or clock
+    changes, so a piecewise-constant signal costs work per transition rather
+    than per time-step.
+
+    Component parameters (see `Component.parameters`) given as 1-D arrays
+    make the simulation batched: `advance_block` then simulates every
+    parameter point at once, and the wires downstream of them record one row
+    of samples per point (batch x time).
+
+    Once some wires are observed (see `observe`), only the components they
+    depend on run; the rest of the topology is skipped.
+    """
 
     def __init__(self,
                  input_wire: Wire,
                  input_function: SignalGenerator,
-                 dt: float = 0.01):
+                 dt: float = 0.01,
+                 input_rate: Optional[float] = None,
+                 event_driven: bool = False):
         self.dt = dt
         self.current_time: float = 0.0
+        self.step = 0
 
         self.wires: List[Wire] = []
         self.components: List[Component] = []
 
+        # Instantaneous voltage of every real-valued wire, indexed by
+        # `Wire.index`
+        self.voltages = array('d')
+
+        self.event_driven = event_driven
+
+        # Timestamps of every recorded time-step, shared by all wires
+        self.timebase = History()
+
         self.input_wire = input_wire
+        self.add_wire(input_wire)
 
         self.input_function = input_function
+        self.input_rate = input_rate
+
+        self.schedule: Optional[List[Component]] = None
+
+        # Scheduled components paired with their tick divisors
+        self.plan: List[Tuple[Component, int]] = []
+        # Registers among them, latched at the end of each time-step
+        self.latches: List[Tuple[Component, int]] = []
+
+        # Chains of LTI components run in the frequency domain by
+        # `advance_block`
+        self.chains: List[LTIChain] = []
+
+        # Input and clock each scheduled component last ticked on
+        # (event-driven mode)
+        self.last_inputs: List[float] = []
+        self.input_divisor = 1
+
+        # Number of parameter points of a batched simulation
+        self.batch: Optional[int] = None
+
+        # Carriers shared by the components (see
+        # `Component.request_carriers`)
+        self.oscillators = OscillatorBank()
+
+        # Wires whose samples are wanted (`None` computes every wire)
+        self.observed: Optional[Set[Wire]] = None
+
+        # Fused kernel of the compiled topology, built on demand
+        self.kernel: Optional[Tuple[Callable, List[Component],
+                                    List[Wire]]] = None
 
     def add_component(self, component: Component):
         """Registers a component and automatically registers its connected
@@ -30,49 +106,488 @@ class Simulation:
             return
 
         self.components.append(component)
+        self.schedule = None
 
         self.add_wire(component.input_wire)
         self.add_wire(component.output_wire)
 
+        component.input_index = component.input_wire.index
+        component.output_index = component.output_wire.index
+
     def add_wire(self, wire: Wire):
-        if wire not in self.wires:
-            self.wires.append(wire)
+        if wire in self.wires:
+            return
+
+        self.wires.append(wire)
+        wire.attach(self.timebase)
+        if self.event_driven:
+            wire.set_recording('changes')
+
+        if wire.dtype is float:
+            self._bind_wires()
+
+    def _bind_wires(self):
+        # Rebuild the store by reallocating it, so arrays handed out by
+        # `voltage_view` never see their buffer move
+        real = [wire for wire in self.wires if wire.dtype is float]
+        voltages = array('d', bytes(8 * len(real)))
+        for index, wire in enumerate(real):
+            wire.bind(voltages, index)
+        self.voltages = voltages
+
+    def voltage_view(self) -> np.ndarray:
+        """Current voltage of every real-valued wire (in `wires` order), as
+        a zero-copy array over the shared voltage store."""
+        return np.frombuffer(self.voltages, dtype=float)
+
+    @property
+    def computed_wires(self) -> Set[Wire]:
+        """Wires the compiled schedule writes: the input and the outputs of
+        every component that runs."""
+        if self.schedule is None:
+            self.compile()
+
+        return {self.input_wire} | {component.output_wire
+                                    for component in self.schedule}
+
+    @property
+    def time_axis(self) -> np.ndarray:
+        """Timestamps of all recorded time-steps, as a zero-copy view."""
+        return self.timebase.view()
+
+    def reserve(self, n_steps: int):
+        """Preallocates the history of every wire for `n_steps` more
+        time-steps."""
+        if self.schedule is None:
+            self.compile()
+
+        self.timebase.reserve(n_steps)
+        for wire in self.computed_wires:
+            wire.reserve(-(-n_steps // wire.stride))
+
+    def rate_divisor(self, rate: Optional[float]) -> int:
+        """Number of time-steps between two ticks of something running at
+        `rate` Hz (`None` runs on every time-step)."""
+        if rate is None:
+            return 1
+
+        return max(1, round(1.0 / (rate * self.dt)))
+
+    def compile(self) -> List[Component]:
+        """Builds the static execution schedule from the current topology.
+
+        Also resolves every component's tick divisor and the stride (in
+        time-steps) at which each wire gets written. Called automatically on
+        the first time-step after the topology changed.
+
+        When some wires are observed, the schedule only keeps the
+        components they depend on.
+        """
+        schedule = compile_schedule(self.input_wire)
+
+        self.input_divisor = self.rate_divisor(self.input_rate)
+        self.input_wire.stride = self.input_divisor
+
+        for component in schedule:
+            divisor = self.rate_divisor(component.tick_rate)
+            component.output_wire.stride = divisor * component.decimation
+
+        if self.observed is not None:
+            schedule = upstream(schedule, self.observed)
+
+        self.schedule = schedule
+        self.plan = [(component, self.rate_divisor(component.tick_rate))
+                     for component in schedule]
+
+        self.latches = [(component, divisor)
+                        for component, divisor in self.plan
+                        if component.registered]
+        self.last_inputs = [math.nan] * len(self.plan)
+        self.chains = find_chains(self.plan)
+        self.batch = self._resolve_batch()
+
+        for component in schedule:
+            component.request_carriers(self.oscillators)
+
+        self.kernel = None
+        return self.schedule
+
+    def observe(self, wires: Optional[Iterable[Wire]]):
+        """Only computes `wires` (every wire when `None`) and what they
+        depend on from now on; components nothing observed depends on are
+        skipped, so looking at one branch of a wide topology costs one
+        branch.
+
+        Once the simulation started, observation only widens: the wires
+        observed so far stay observed, and wires that were skipped until now
+        get their samples filled in (see `_catch_up`).
+        """
+        observed = None if wires is None else set(wires)
+        if self.step > 0 and observed is not None:
+            if self.observed is None:
+                return
+            observed |= self.observed
+
+        if self.schedule is None:
+            self.compile()
+        computed = set(self.schedule)
+
+        self.observed = observed
+        self.compile()
+
+        added = [component for component in self.schedule
+                 if component not in computed]
+        if self.step > 0 and added:
+            self._catch_up(added)
+
+    def _catch_up(self, added: List[Component]):
+        """Computes the samples the components in `added` would have written
+        since the start of the run, had they not been skipped, by replaying
+        them from the start together with the components they depend on.
+
+        The replayed components that ran all along end up in the state they
+        were in, and the samples their wires recorded are left as they
+        are.
+        """
+        replayed = upstream(self.schedule, [component.output_wire
+                                            for component in added])
+        kept = [component for component in replayed
+                if component not in added]
+
+        states = [copy.deepcopy(component.get_state()) for component in kept]
+        held = [(wire, wire.set_aside()) for wire in
+                {self.input_wire} | {component.output_wire
+                                     for component in kept}]
+        for component in kept:
+            component.reset()
+
+        n_steps = self.step
+        run = (self.plan, self.latches, self.chains, self.last_inputs,
+               self.kernel, self.step, self.current_time, self.timebase)
+
+        members = set(replayed)
+        self.plan = [(component, divisor) for component, divisor in self.plan
+                     if component in members]
+        self.latches = [(component, divisor)
+                        for component, divisor in self.plan
+                        if component.registered]
+        self.chains = find_chains(self.plan)
+        self.last_inputs = [math.nan] * len(self.plan)
+        self.kernel = None
+
+        # Replay on a time axis of its own; it repeats the recorded one
+        self.step, self.current_time, self.timebase = 0, 0.0, History()
+        try:
+            self.advance_block(n_steps)
+        finally:
+            (self.plan, self.latches, self.chains, self.last_inputs,
+             self.kernel, self.step, self.current_time, self.timebase) = run
+
+            for component, state in zip(kept, states):
+                component.set_state(state)
+            for wire, state in held:
+                wire.restore(state)
+
+    def _resolve_batch(self) -> Optional[int]:
+        """Turns the parameters given one value per parameter point into
+        columns and returns the number of points (`None` when unbatched).
+
+        Raises `ValueError` if the points disagree in number, or if a
+        component that cannot run batched is downstream of them.
+        """
+        batch = None
+        batched = set()
+        for component in self.schedule:
+            swept = converted = False
+            for name in component.parameters:
+                value = getattr(component, name)
+                if np.ndim(value) == 0:
+                    continue
+
+                column = np.asarray(value, dtype=float).reshape(-1, 1)
+                if batch is not None and len(column) != batch:
+                    raise ValueError(
+                        f"{type(component).__name__}.{name} has "
+                        f"{len(column)} values, expected {batch}")
+                batch = len(column)
+
+                swept = True
+                if np.ndim(value) == 1:
+                    setattr(component, name, column)
+                    converted = True
+
+            if swept or component.input_wire in batched:
+                if not component.batchable or component.registered:
+                    raise ValueError(
+                        f"{type(component).__name__} cannot run in a "
+                        "batched simulation")
+                batched.add(component.output_wire)
+
+            # State derived from the parameters takes their shape
+            if converted:
+                component.reset()
+
+        return batch
 
     def advance(self):
         """Executes one time-step of the simulation.
 
         Algorithm:
-        1. Write new value to the System Input (Source).
-        2. Advance the clock.
-        3. Propagation Loop:
-           - Find all components connected to updated wires.
-           - Run their logic.
-           - If they write to their output wires, those wires get flagged
-             `update=True`.
-           - Repeat until the signal stabilizes (no more updates).
+        1. Write new value to the System Input (Source), if it is due.
+        2. Run every due component once, in the order of the compiled
+           schedule, so each one reads inputs that are already settled for
+           this step. Registers come first and output their latched value.
+        3. Latch the settled inputs of the due registers.
+        4. Advance the clock.
         """
+        if self.schedule is None:
+            self.compile()
+        if self.batch is not None:
+            raise ValueError("Batched simulations only run in blocks; use "
+                             "advance_block")
 
-        self.input_wire.write_async(self.input_function(self.current_time),
-                                    self.current_time)
+        time = self.current_time
+        step = self.step
+        self.timebase.append(time)
 
-        updates = set(self.input_wire.effects)
-        while len(updates) > 0:
-            to_update = list(updates)
-            updates = set()
+        if step % self.input_divisor == 0:
+            self.input_wire.write_async(self.input_function(time), time)
 
-            for component in to_update:
-                component.tick(self.current_time)
+        if self.event_driven:
+            self._propagate_events(step, time)
+        else:
+            for component, divisor in self.plan:
+                if step % divisor == 0:
+                    component.tick(time)
 
-            for wire in self.wires:
-                if wire.update:
-                    wire.update = False
-                    updates.update(wire.effects)
+        for component, divisor in self.latches:
+            if step % divisor == 0:
+                component.latch(time)
 
+        self.step = step + 1
         self.current_time += self.dt
 
+    def _propagate_events(self, step: int, time: float):
+        """Runs the due components of one time-step, skipping pure ones
+        whose input and clock hold the values they last ticked on."""
+        last_inputs = self.last_inputs
+
+        for position, (component, divisor) in enumerate(self.plan):
+            if step % divisor != 0:
+                continue
+
+            if component.pure:
+                value = (component.input_wire.store[component.input_index],
+                         component.clock(time))
+                if value == last_inputs[position]:
+                    continue
+                last_inputs[position] = value
+
+            component.tick(time)
+
+    def advance_block(self, n_steps: int):
+        """Executes `n_steps` time-steps of the simulation at once.
+
+        Components run in the same schedule as `advance`, but each one is
+        handed the time points and input samples of all its ticks in the
+        block through `Component.process_block` and returns the output block.
+        Chains of LTI components are filtered in the frequency domain
+        instead (see `src.core.lti`).
+
+        In event-driven simulations, pure components only process the ticks
+        where their input or clock changes (see `_process_events`).
+
+        A topology with registers may feed samples back within the block, so
+        it is run one time-step at a time instead.
+        """
+        if n_steps <= 0:
+            return
+
+        if self.schedule is None:
+            self.compile()
+
+        if self.latches:
+            for _ in range(n_steps):
+                self.advance()
+            return
+
+        # Accumulate the clock sample by sample, exactly like `advance` does
+        deltas = np.full(n_steps, self.dt)
+        deltas[0] = self.current_time
+        times = np.add.accumulate(deltas)
+        self.timebase.extend(times)
+
+        first_step = self.step
+        steps = np.arange(first_step, first_step + n_steps)
+
+        # Value held by each wire before the block, and its writes in it
+        blocks: Dict[Wire, Tuple[float, np.ndarray]] = {}
+
+        input_times = times[-first_step % self.input_divisor::
+                            self.input_divisor]
+        inputs = sample_signal(self.input_function, input_times)
+        self._write_block(self.input_wire, inputs, times, first_step, blocks)
+
+        chains = {chain.stages[0]: chain for chain in self.chains}
+        chained = {stage for chain in self.chains for stage in chain.stages}
+
+        for position, (component, divisor) in enumerate(self.plan):
+            offset = -first_step % divisor
+            tick_times = times[offset::divisor]
+            if len(tick_times) == 0:
+                continue
+
+            # Later stages of a chain ran along with its first one
+            if component in chained and component not in chains:
+                continue
+
+            input_wire = component.input_wire
+            held, samples = blocks[input_wire]
+            if input_wire.stride != divisor:
+                samples = sample_held(held, samples, input_wire.stride,
+                                      first_step, steps[offset::divisor])
+
+            if component in chains:
+                chain = chains[component]
+                for stage, outputs in zip(chain.stages,
+                                          chain.process_block(samples)):
+                    self._write_block(stage.output_wire, outputs, times,
+                                      first_step, blocks)
+                continue
+
+            if self.event_driven and component.pure and samples.ndim == 1:
+                outputs = self._process_events(position, tick_times, samples)
+            else:
+                outputs = component.process_block(tick_times, samples)
+            self._write_block(component.output_wire, outputs, times,
+                              first_step, blocks)
+
+        self.step = first_step + n_steps
+        self.current_time = float(times[-1]) + self.dt
+
+    def _process_events(self, position: int, times: np.ndarray,
+                        inputs: np.ndarray) -> np.ndarray:
+        """Block counterpart of `_propagate_events` for the pure component at
+        `position` in the plan: processes only the ticks where its input or
+        clock changes, and holds its output over the others."""
+        component = self.plan[position][0]
+        clocks = component.clock(times)
+
+        due = np.empty(len(times), dtype=bool)
+        np.not_equal(inputs[1:], inputs[:-1], out=due[1:])
+        if clocks is None:
+            first, last = (inputs[0], None), (inputs[-1], None)
+        else:
+            due[1:] |= clocks[1:] != clocks[:-1]
+            first, last = (inputs[0], clocks[0]), (inputs[-1], clocks[-1])
+        due[0] = first != self.last_inputs[position]
+        self.last_inputs[position] = last
+
+        outputs = component.process_block(times[due], inputs[due])
+        held = np.cumsum(due) - 1
+        if not due[0]:
+            outputs = np.concatenate(([component.output_wire.voltage],
+                                      outputs))
+            held += 1
+
+        return outputs[held]
+
+    def advance_fused(self, n_steps: int):
+        """Executes `n_steps` time-steps through a generated kernel that
+        inlines the whole topology into a single loop (see
+        `src.core.codegen.fuse`).
+
+        Produces the same samples as calling `advance` `n_steps` times.
+        """
+        if n_steps <= 0:
+            return
+
+        if self.schedule is None:
+            self.compile()
+        if self.batch is not None:
+            raise ValueError("Batched simulations only run in blocks; use "
+                             "advance_block")
+        if self.kernel is None:
+            self.kernel = fuse(self)
+
+        kernel, components, wires = self.kernel
+        first_step = self.step
+
+        self.step, self.current_time, times, recorded = kernel(
+            n_steps, first_step, self.current_time, self.dt,
+            self.input_function, components, wires)
+
+        times = np.array(times)
+        self.timebase.extend(times)
+
+        for wire, values in recorded:
+            if len(values) > 0:
+                stride = wire.stride
+                wire.write_block_async(np.array(values),
+                                       times[-first_step % stride::stride])
+
+    def advance_parallel(self, n_steps: int, workers: Optional[int] = None,
+                         warmup: Optional[float] = None):
+        """Executes `n_steps` time-steps split over `workers` processes (all
+        cores by default), each chunk starting `warmup` seconds early so
+        filter state can settle (by default, as long as the components
+        take to; see `src.core.parallel.run_parallel`)."""
+        if n_steps <= 0:
+            return
+
+        run_parallel(self, n_steps, workers, warmup)
+
+    def advance_partitioned(self, n_steps: int,
+                            workers: Optional[int] = None):
+        """Executes `n_steps` time-steps with every independent branch of the
+        topology in a process of its own (see
+        `src.core.partition.run_partitioned`)."""
+        if n_steps <= 0:
+            return
+
+        run_partitioned(self, n_steps, workers)
+
+    def advance_pipelined(self, n_steps: int, block_size: int = 4096,
+                          queue_depth: int = 4):
+        """Executes `n_steps` time-steps in blocks of `block_size`, running
+        every component in a thread of its own so consecutive stages overlap
+        (see `src.core.pipeline.run_pipelined`).
+
+        Topologies with registers are run one time-step at a time instead, as
+        in `advance_block`, and event-driven simulations through
+        `advance_block`.
+        """
+        if n_steps <= 0:
+            return
+
+        if self.schedule is None:
+            self.compile()
+
+        if self.latches or self.event_driven:
+            self.advance_block(n_steps)
+            return
+
+        run_pipelined(self, n_steps, block_size, queue_depth)
+
+    def _write_block(self, wire: Wire, values: np.ndarray, times: np.ndarray,
+                     first_step: int,
+                     blocks: Dict[Wire, Tuple[float, np.ndarray]]):
+        blocks[wire] = (wire.voltage, values)
+
+        if len(values) > 0:
+            stride = wire.stride
+            wire.write_block_async(values,
+                                   times[-first_step % stride::stride])
+
     def reset(self):
         self.current_time = 0.0
+        self.step = 0
+        self.timebase.clear()
+        self.last_inputs = [math.nan] * len(self.plan)
         for wire in self.wires:
             wire.reset()
         for component in self.components:
             component.reset()
+
+        # Batched wires left the shared store for stores of their own
+        self._bind_wires()
@@ -0,0 +1,232 @@
+from .signals import with_block
+from .types import SignalGenerator
+
+from typing import Dict, List
+import ast
+import builtins
+import math
+
+import numpy as np
+
+
+# `math` functions a signal expression may call, with their NumPy
+# counterparts used by the block form
+MATH_FUNCTIONS: Dict[str, str] = {
+    'sin': 'sin', 'cos': 'cos', 'tan': 'tan',
+    'asin': 'arcsin', 'acos': 'arccos', 'atan': 'arctan',
+    'atan2': 'arctan2', 'hypot': 'hypot',
+    'sinh': 'sinh', 'cosh': 'cosh', 'tanh': 'tanh',
+    'asinh': 'arcsinh', 'acosh': 'arccosh', 'atanh': 'arctanh',
+    'exp': 'exp', 'expm1': 'expm1',
+    'log': 'log', 'log2': 'log2', 'log10': 'log10', 'log1p': 'log1p',
+    'sqrt': 'sqrt', 'pow': 'power',
+    'fabs': 'abs', 'floor': 'floor', 'ceil': 'ceil', 'trunc': 'trunc',
+    'fmod': 'fmod', 'copysign': 'copysign',
+    'degrees': 'degrees', 'radians': 'radians'
+}
+
+MATH_CONSTANTS = ('pi', 'e', 'tau', 'inf')
+
+# Builtins a signal expression may call, with their element-wise NumPy
+# counterparts
+BUILTIN_FUNCTIONS: Dict[str, str] = {
+    'abs': 'abs', 'min': 'minimum', 'max': 'maximum'
+}
+
+_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+              ast.Pow, ast.UAdd, ast.USub, ast.Not, ast.And, ast.Or,
+              ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Load)
+
+# Compiled signal functions, by source text
+_SIGNAL_CACHE: Dict[str, SignalGenerator] = {}
+
+
+def compile_signal(source: str) -> SignalGenerator:
+    """Compiles a signal function written as a one-argument lambda (such as
+    'lambda t: math.sin(2 * math.pi * t)') into a generator with a block
+    form (see `src.core.signals`).
+
+    The expression may only use numbers, its argument, arithmetic,
+    comparisons, conditional expressions, the `math` functions and
+    constants listed in `MATH_FUNCTIONS` and `MATH_CONSTANTS`, and the
+    builtins in `BUILTIN_FUNCTIONS`; anything else raises `ValueError`. The
+    block form evaluates it over a whole array of times with the matching
+    NumPy functions. Results are cached by source text.
+    """
+    if source not in _SIGNAL_CACHE:
+        _SIGNAL_CACHE[source] = _compile(source)
+
+    return _SIGNAL_CACHE[source]
+
+
+def _compile(source: str) -> SignalGenerator:
+    try:
+        tree = ast.parse(source.strip(), mode='eval')
+    except SyntaxError as error:
+        raise ValueError(f"Invalid signal function: {error.msg}") from None
+
+    function = tree.body
+    arguments = function.args if isinstance(function, ast.Lambda) else None
+    if arguments is None or len(arguments.args) != 1 \
+            or arguments.posonlyargs or arguments.vararg \
+            or arguments.kwonlyargs or arguments.kwarg \
+            or arguments.defaults:
+        raise ValueError("Signal function must be a lambda of one argument, "
+                         "such as 'lambda t: math.sin(2 * math.pi * t)'")
+
+    name = arguments.args[0].arg
+    if name in ('math', 'np', *BUILTIN_FUNCTIONS, *_BOOLEAN_OPERATORS):
+        raise ValueError(f"Signal function argument may not be named {name}")
+    _check(function.body, name)
+
+    scalar_func = eval(compile(tree, '<signal>', 'eval'),
+                       {'math': math, '__builtins__': {},
+                        **{builtin: getattr(builtins, builtin)
+                           for builtin in BUILTIN_FUNCTIONS}})
+
+    vectorized = ast.Expression(ast.Lambda(
+        function.args, _Vectorizer().visit(function.body)))
+    array_func = eval(compile(ast.fix_missing_locations(vectorized),
+                              '<signal>', 'eval'),
+                      {'np': np, '__builtins__': {}, **_BOOLEAN_OPERATORS})
+
+    def block_func(times: np.ndarray) -> np.ndarray:
+        # Expressions not depending on time evaluate to a single value
+        return np.broadcast_to(np.asarray(array_func(times), dtype=float),
+                               times.shape)
+
+    return with_block(scalar_func, block_func)
+
+
+def _and(*values: np.ndarray) -> np.ndarray:
+    """Element-wise `and`: like Python's, the first false operand, or the
+    last one if none is."""
+    result = values[-1]
+    for value in reversed(values[:-1]):
+        result = np.where(value, result, value)
+
+    return result
+
+
+def _or(*values: np.ndarray) -> np.ndarray:
+    """Element-wise `or`: the first true operand, or the last one."""
+    result = values[-1]
+    for value in reversed(values[:-1]):
+        result = np.where(value, value, result)
+
+    return result
+
+
+# Functions the block form calls for `and` and `or`, by name
+_BOOLEAN_OPERATORS = {'_and': _and, '_or': _or}
+
+
+def _check(node: ast.AST, name: str):
+    """Raises `ValueError` unless the expression `node` (of the argument
+    `name`) sticks to the whitelisted syntax."""
+    if isinstance(node, ast.Call):
+        if not _is_function(node.func):
+            raise ValueError(f"Unsupported call in signal function: "
+                             f"{ast.unparse(node.func)}")
+        if node.keywords:
+            raise ValueError(f"Keyword arguments are not supported in "
+                             f"signal function: {ast.unparse(node.func)}")
+        children = node.args
+    elif isinstance(node, ast.Attribute):
+        if not isinstance(node.value, ast.Name) or node.value.id != 'math' \
+                or node.attr not in MATH_CONSTANTS:
+            raise ValueError(f"Unsupported value in signal function: "
+                             f"{ast.unparse(node)}")
+        return
+    elif isinstance(node, ast.Name):
+        if node.id != name:
+            raise ValueError(f"Unknown name in signal function: {node.id}")
+        return
+    elif isinstance(node, ast.Constant):
+        if type(node.value) not in (int, float):
+            raise ValueError(f"Unsupported constant in signal function: "
+                             f"{node.value!r}")
+        return
+    elif isinstance(node, (ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare,
+                           ast.IfExp)):
+        children = list(ast.iter_child_nodes(node))
+    elif isinstance(node, _OPERATORS):
+        return
+    else:
+        raise ValueError(f"Unsupported syntax in signal function: "
+                         f"{type(node).__name__}")
+
+    for child in children:
+        _check(child, name)
+
+
+def _is_function(node: ast.AST) -> bool:
+    if isinstance(node, ast.Name):
+        return node.id in BUILTIN_FUNCTIONS
+
+    return isinstance(node, ast.Attribute) \
+        and isinstance(node.value, ast.Name) and node.value.id == 'math' \
+        and node.attr in MATH_FUNCTIONS
+
+
+class _Vectorizer(ast.NodeTransformer):
+    """Rewrites a checked signal expression to evaluate element-wise over
+    NumPy arrays: `math` and builtin functions become their NumPy
+    counterparts, conditionals `np.where`, `not` and comparisons logical
+    functions, and `and` and `or` the element-wise `_and` and `_or`."""
+
+    @staticmethod
+    def _numpy(name: str) -> ast.expr:
+        return ast.Attribute(ast.Name('np', ast.Load()), name, ast.Load())
+
+    def _call(self, name: str, args: List[ast.expr]) -> ast.expr:
+        return ast.Call(self._numpy(name), args, [])
+
+    def _reduce(self, name: str, args: List[ast.expr]) -> ast.expr:
+        result = args[0]
+        for arg in args[1:]:
+            result = self._call(name, [result, arg])
+        return result
+
+    def visit_Attribute(self, node: ast.Attribute) -> ast.expr:
+        # Only `math` constants get here; calls are rewritten whole
+        return ast.Constant(getattr(math, node.attr))
+
+    def visit_Call(self, node: ast.Call) -> ast.expr:
+        args = [self.visit(arg) for arg in node.args]
+        if isinstance(node.func, ast.Name):
+            if node.func.id == 'abs':
+                return self._call('abs', args)
+            # `min` and `max` take any number of arguments
+            return self._reduce(BUILTIN_FUNCTIONS[node.func.id], args)
+
+        if node.func.attr == 'log' and len(args) == 2:
+            return ast.BinOp(self._call('log', args[:1]), ast.Div(),
+                             self._call('log', args[1:]))
+
+        return self._call(MATH_FUNCTIONS[node.func.attr], args)
+
+    def visit_IfExp(self, node: ast.IfExp) -> ast.expr:
+        return self._call('where', [self.visit(node.test),
+                                    self.visit(node.body),
+                                    self.visit(node.orelse)])
+
+    def visit_BoolOp(self, node: ast.BoolOp) -> ast.expr:
+        # `and` and `or` yield one of their operands, not a truth value
+        name = '_and' if isinstance(node.op, ast.And) else '_or'
+        return ast.Call(ast.Name(name, ast.Load()),
+                        [self.visit(value) for value in node.values], [])
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.expr:
+        if isinstance(node.op, ast.Not):
+            return self._call('logical_not', [self.visit(node.operand)])
+        return self.generic_visit(node)
+
+    def visit_Compare(self, node: ast.Compare) -> ast.expr:
+        # Chained comparisons hold when every link does
+        operands = [self.visit(node.left)] + [self.visit(comparator)
+                                              for comparator in
+                                              node.comparators]
+        links = [ast.Compare(left, [op], [right]) for left, op, right
+                 in zip(operands, node.ops, operands[1:])]
+        return self._reduce('logical_and', links)
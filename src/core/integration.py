@@ -0,0 +1,46 @@
+from .batch import prepend
+
+from typing import Any, Dict, Tuple
+import math
+
+import numpy as np
+
+
+# Weights of the three newest samples (newest first) in the area under a
+# sampled signal over one time-step, per unit of step length:
+# - 'rectangle': the newest sample held over the step (first order).
+# - 'trapezoid': the mean of the step's end points (second order).
+# - 'parabolic': the parabola through the three newest samples (third
+#   order, Adams-Moulton).
+INTEGRATION_RULES: Dict[str, Tuple[float, float, float]] = {
+    'rectangle': (1.0, 0.0, 0.0),
+    'trapezoid': (0.5, 0.5, 0.0),
+    'parabolic': (5 / 12, 8 / 12, -1 / 12)
+}
+
+
+def integration_weights(rule: str) -> Tuple[float, float, float]:
+    if rule not in INTEGRATION_RULES:
+        raise ValueError(f"Unknown integration rule: {rule}")
+
+    return INTEGRATION_RULES[rule]
+
+
+def step_areas(weights: Tuple[float, float, float], samples: np.ndarray,
+               last_sample: Any, older_sample: Any) -> np.ndarray:
+    """Area under each time-step of a block of evenly spaced samples, per
+    unit of step length. `last_sample` and `older_sample` are the two
+    samples preceding the block (newest first)."""
+    history = prepend(older_sample, prepend(last_sample, samples))
+
+    return weights[0] * history[..., 2:] + weights[1] * history[..., 1:-1] \
+        + weights[2] * history[..., :-2]
+
+
+def wrap_phase(phase: Any) -> Any:
+    """Phase (or array of phases) brought into [-pi, pi], so a running
+    phase never grows large enough to lose precision."""
+    if np.ndim(phase) == 0:
+        return math.remainder(phase, 2 * math.pi)
+
+    return phase - 2 * np.pi * np.round(phase / (2 * np.pi))
@@ -0,0 +1,140 @@
+from .batch import prepend
+from .components import Component
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# Smallest FFT used by `overlap_save`, in samples
+MIN_FFT_SIZE = 256
+
+
+def fft_size(n_taps: int, n_samples: int) -> int:
+    """Power of two a few times longer than the filter, but not much longer
+    than the samples to filter."""
+    size = MIN_FFT_SIZE
+    while size < 4 * n_taps:
+        size *= 2
+    while size // 2 >= n_samples + n_taps - 1 and size // 2 >= 2 * n_taps:
+        size //= 2
+
+    return size
+
+
+def overlap_save(taps: np.ndarray, buffer: np.ndarray, inputs: np.ndarray,
+                 spectrum: Optional[np.ndarray] = None) -> np.ndarray:
+    """FIR filters `inputs` in the frequency domain.
+
+    Computes `y[n] = sum(taps[k] * x[n - k])` along the last axis, where the
+    inputs preceding the block are taken from `buffer` (most recent first,
+    at least `len(taps) - 1` of them). `spectrum` may hold the real FFT of
+    `taps` at the size picked for this block, to skip recomputing it.
+    """
+    n_taps = len(taps)
+    n_inputs = inputs.shape[-1]
+    overlap = n_taps - 1
+    size = fft_size(n_taps, n_inputs)
+    step = size - overlap
+
+    if spectrum is None or len(spectrum) != size // 2 + 1:
+        spectrum = np.fft.rfft(taps, size)
+
+    # Consecutive segments overlapping by `overlap` samples, zero-padded so
+    # the last one is complete
+    n_segments = -(-n_inputs // step)
+    samples = np.zeros(inputs.shape[:-1] + (n_segments * step + overlap,))
+    samples[..., :overlap] = buffer[..., :overlap][..., ::-1]
+    samples[..., overlap:overlap + n_inputs] = inputs
+    segments = np.lib.stride_tricks.sliding_window_view(
+        samples, size, axis=-1)[..., ::step, :]
+
+    filtered = np.fft.irfft(np.fft.rfft(segments, axis=-1) * spectrum, size,
+                            axis=-1)
+
+    return filtered[..., overlap:overlap + step].reshape(
+        inputs.shape[:-1] + (-1,))[..., :n_inputs]
+
+
+class LTIChain:
+    """Consecutive linear time-invariant components evaluated together in
+    the frequency domain.
+
+    Every stage is an FIR filter (see `Component.lti`); only the last one may
+    decimate. The stages are run with `overlap_save` one after the other, so
+    every intermediate wire still gets its samples, and their filter
+    spectra are cached between blocks.
+    """
+
+    def __init__(self, stages: List[Component]):
+        self.stages = stages
+
+        # Taps, FFT size and spectrum last used by each stage
+        self.spectra: Dict[int, Tuple[np.ndarray, int, np.ndarray]] = {}
+
+    def _spectrum(self, position: int, taps: np.ndarray,
+                  size: int) -> np.ndarray:
+        cached = self.spectra.get(position)
+        if cached is None or cached[0] is not taps or cached[1] != size:
+            cached = (taps, size, np.fft.rfft(taps, size))
+            self.spectra[position] = cached
+
+        return cached[2]
+
+    def process_block(self, inputs: np.ndarray) -> List[np.ndarray]:
+        """Runs the block through every stage and returns the samples each
+        one writes to its output wire."""
+        outputs = []
+        for position, stage in enumerate(self.stages):
+            taps = stage.taps
+            n_inputs = inputs.shape[-1]
+            spectrum = self._spectrum(position, taps,
+                                      fft_size(len(taps), n_inputs))
+            filtered = overlap_save(taps, stage.buffer, inputs, spectrum)
+
+            n_taps = len(taps)
+            stage.buffer = prepend(stage.buffer[..., ::-1],
+                                   inputs)[..., -n_taps:][..., ::-1].copy()
+
+            factor = stage.decimation
+            if factor > 1:
+                filtered = filtered[..., -stage.count % factor::factor]
+                stage.count = (stage.count + n_inputs) % factor
+
+            outputs.append(filtered)
+            inputs = filtered
+
+        return outputs
+
+
+def find_chains(plan: List[Tuple[Component, int]]) -> List[LTIChain]:
+    """Groups the LTI components of a compiled plan into maximal chains.
+
+    A chain continues from one component to the next when the first one's
+    output wire feeds nothing but the second one, both tick at the same
+    rate and the first one does not decimate.
+    """
+    divisors = dict(plan)
+    chained = set()
+
+    chains = []
+    for component, divisor in plan:
+        if not component.lti or component in chained:
+            continue
+
+        stages = [component]
+        while stages[-1].decimation == 1:
+            effects = stages[-1].output_wire.effects
+            if len(effects) != 1:
+                break
+
+            follower = effects[0]
+            if not follower.lti or follower in chained \
+                    or divisors.get(follower) != divisor:
+                break
+            stages.append(follower)
+
+        chained.update(stages)
+        chains.append(LTIChain(stages))
+
+    return chains
@@ -0,0 +1,143 @@
+from typing import Any, Dict, Tuple
+import math
+
+import numpy as np
+
+
+# Samples generated by the rotation recurrence between two exactly
+# evaluated phasors, which bounds the rounding error it accumulates
+RESYNC_INTERVAL = 4096
+
+
+class Oscillator:
+    """Numerically controlled oscillator for the carrier
+    exp(i * (2*pi*`frequency`*t + `phase`)).
+
+    The phase is accumulated in cycles and wrapped into [0, 1) before it is
+    turned into an angle, so it keeps full precision however long the run.
+    Blocks of evenly spaced ticks are generated by a rotation recurrence:
+    every `RESYNC_INTERVAL`-th phasor is evaluated exactly and the ones in
+    between are the previous one turned by the phase step, which costs one
+    complex multiplication per sample instead of a cosine and a sine.
+
+    The latest values are cached by the time (or block of times) they were
+    computed for, so components sharing the oscillator (see
+    `OscillatorBank`) compute each carrier once per tick or block. Batched
+    simulations may give `frequency` and `phase` as columns.
+    """
+
+    def __init__(self, frequency: Any, phase: Any = 0.0):
+        self.frequency = frequency
+        self.phase = phase
+
+        # Phase offset, in cycles
+        self.offset = phase / (2 * math.pi)
+
+        # Latest results paired with the time (or block of times) they hold
+        # for; replaced whole, so concurrent readers never see a mismatch
+        self.cached_angle: Tuple[float, float] = (math.nan, 0.0)
+        self.cached_cos: Tuple[float, float] = (math.nan, 1.0)
+        self.cached_sin: Tuple[float, float] = (math.nan, 0.0)
+        self.cached_angles: Tuple[Any, Any] = (None, None)
+        self.cached_phasors: Tuple[Any, Any] = (None, None)
+
+    def angle(self, time: float) -> float:
+        """Carrier phase at `time`, in [0, 2*pi)."""
+        cached_time, value = self.cached_angle
+        if time != cached_time:
+            value = 2 * math.pi * ((self.frequency * time + self.offset) % 1.0)
+            self.cached_angle = (time, value)
+
+        return value
+
+    def cos(self, time: float) -> float:
+        cached_time, value = self.cached_cos
+        if time != cached_time:
+            value = math.cos(self.angle(time))
+            self.cached_cos = (time, value)
+
+        return value
+
+    def sin(self, time: float) -> float:
+        cached_time, value = self.cached_sin
+        if time != cached_time:
+            value = math.sin(self.angle(time))
+            self.cached_sin = (time, value)
+
+        return value
+
+    def angles(self, times: np.ndarray) -> np.ndarray:
+        """Block counterpart of `angle`, at the evenly spaced `times` (such
+        as a component's ticks in a block)."""
+        key = _block_key(times)
+        cached_key, values = self.cached_angles
+        if key == cached_key:
+            return values
+
+        values = self._angles(times)
+        self.cached_angles = (key, values)
+        return values
+
+    def _angles(self, times: np.ndarray) -> np.ndarray:
+        # Same wrapping as `angle`; subtracting the floor is much faster
+        # than NumPy's floating-point modulo
+        cycles = self.frequency * times + self.offset
+        return 2 * np.pi * (cycles - np.floor(cycles))
+
+    def phasors(self, times: np.ndarray) -> np.ndarray:
+        """Carrier phasors exp(i * angle) at the evenly spaced `times`."""
+        key = _block_key(times)
+        cached_key, values = self.cached_phasors
+        if key == cached_key:
+            return values
+
+        n_times = len(times)
+        anchors = np.exp(1j * self._angles(times[::RESYNC_INTERVAL]))
+        if n_times == 1:
+            return anchors
+
+        step = (times[-1] - times[0]) / (n_times - 1)
+        rotation = np.exp(2j * np.pi * ((self.frequency * step) % 1.0))
+
+        # One row of rotations per interval, starting from its anchor
+        n_intervals = anchors.shape[-1]
+        factors = np.empty(anchors.shape + (RESYNC_INTERVAL,), dtype=complex)
+        factors[...] = np.expand_dims(rotation, -1)
+        factors[..., 0] = anchors
+
+        values = np.multiply.accumulate(factors, axis=-1).reshape(
+            anchors.shape[:-1] + (n_intervals * RESYNC_INTERVAL,))
+        values = values[..., :n_times]
+
+        self.cached_phasors = (key, values)
+        return values
+
+
+class OscillatorBank:
+    """Carriers shared by the components of a simulation (see
+    `Component.request_carriers`): every component asking for the same
+    frequency and phase gets the same `Oscillator`."""
+
+    def __init__(self):
+        self.oscillators: Dict[tuple, Oscillator] = {}
+
+    def carrier(self, frequency: Any, phase: Any = 0.0) -> Oscillator:
+        key = (_key(frequency), _key(phase))
+        if key not in self.oscillators:
+            self.oscillators[key] = Oscillator(frequency, phase)
+
+        return self.oscillators[key]
+
+
+def _block_key(times: np.ndarray) -> tuple:
+    """Identifies a block of evenly spaced times."""
+    return float(times[0]), float(times[-1]), len(times)
+
+
+def _key(value: Any) -> Any:
+    """Hashable stand-in for a scalar or array parameter."""
+    if np.ndim(value) == 0:
+        return float(value)
+
+    array = np.asarray(value, dtype=float)
+    return array.shape, array.tobytes()
@@ -0,0 +1,279 @@
+from .components import Component
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import copy
+import math
+import multiprocessing
+import os
+import sys
+
+import numpy as np
+
+
+# Simulation and run parameters handed to the worker processes. Workers are
+# forked, so they inherit these instead of unpickling them (input functions
+# are usually closures).
+_FORKED: Dict[str, Any] = {}
+
+
+def can_fork() -> bool:
+    """Whether worker processes can be forked, which is how they inherit
+    `_FORKED`. Windows cannot fork, and forking is unsafe on macOS, where
+    system libraries may hold locks in the parent."""
+    return 'fork' in multiprocessing.get_all_start_methods() \
+        and sys.platform != 'darwin'
+
+
+def _period(sim) -> int:
+    """Smallest number of time-steps after which every tick divisor and wire
+    stride of `sim` lines up again. Chunks start on multiples of it, so
+    components reset there are in phase with the uninterrupted run."""
+    period = sim.input_divisor
+    for component, divisor in sim.plan:
+        period = math.lcm(period, divisor, component.output_wire.stride)
+
+    return period
+
+
+def _settling(sim) -> int:
+    """Time-steps it takes the fading state of `sim` to settle from a
+    reset: the longest sum of `Component.settling` along the signal path,
+    since a component only settles once its input has."""
+    writers = {component.output_wire: component
+               for component, _ in sim.plan}
+
+    steps: Dict[Component, int] = {}
+    for component, divisor in sim.plan:
+        upstream = writers.get(component.input_wire)
+        steps[component] = steps.get(upstream, 0) \
+            + divisor * component.settling(divisor * sim.dt)
+
+    return max(steps.values(), default=0)
+
+
+def _scan_levels(sim) -> int:
+    """Longest chain of components with `scan_state` along the signal path.
+    A scan component's increments depend on its input, hence on the state of
+    the scan components upstream, so the prefix-scan needs one pass per
+    level."""
+    writers = {component.output_wire: component
+               for component in sim.schedule}
+
+    depth: Dict[Component, int] = {}
+    for component in sim.schedule:
+        upstream = writers.get(component.input_wire)
+        depth[component] = depth.get(upstream, 0) \
+            + (1 if component.scan_state else 0)
+
+    return max(depth.values(), default=0)
+
+
+def _boundaries(first_step: int, n_steps: int, n_chunks: int,
+                period: int) -> List[int]:
+    """Chunk start steps (plus the final step), rounded to `period`."""
+    bounds = [first_step]
+    for k in range(1, n_chunks):
+        step = first_step + k * n_steps // n_chunks
+        bounds.append(-(-step // period) * period)
+    bounds.append(first_step + n_steps)
+
+    return bounds
+
+
+def _scan_values(sim) -> List[Tuple[Any, ...]]:
+    return [tuple(copy.copy(getattr(component, name))
+                  for name in component.scan_state)
+            for component in sim.schedule]
+
+
+def _set_scan_values(sim, values: List[Tuple[Any, ...]]):
+    for component, state in zip(sim.schedule, values):
+        for name, value in zip(component.scan_state, state):
+            setattr(component, name, copy.copy(value))
+
+
+def _restart(sim, step: int, initial: bool):
+    """Puts the worker's copy of the simulation at `step`, either in the
+    state it was forked in (`initial`) or freshly reset."""
+    times = _FORKED['times']
+    first_step = _FORKED['first_step']
+
+    if initial:
+        for component, state in zip(sim.schedule, _FORKED['states']):
+            component.set_state(copy.deepcopy(state))
+        for wire, voltage in zip(sim.wires, _FORKED['voltages']):
+            wire.voltage = voltage
+    else:
+        for component in sim.schedule:
+            component.reset()
+        for wire in sim.wires:
+            wire.voltage = wire.dtype(0)
+
+    sim.step = step
+    sim.current_time = float(times[step - first_step])
+    sim.last_inputs = [math.nan] * len(sim.plan)
+
+    sim.timebase.clear()
+    _record(sim)
+
+
+def _record(sim):
+    """Drops the samples recorded so far and records in full from now on
+    (except for wires the caller does not record at all)."""
+    for wire, mode in zip(sim.wires, _FORKED['modes']):
+        wire.set_recording('off' if mode == 'off' else 'full')
+
+
+def _enter(chunk: int, scan: List[Tuple[Any, ...]]):
+    """Brings the worker's simulation to the start of the warm-up of
+    `chunk`, with the scan state `scan` at that point."""
+    sim = _FORKED['sim']
+    bounds = _FORKED['bounds']
+    warmup, period = _FORKED['warmup'], _FORKED['period']
+
+    if chunk == 0:
+        _restart(sim, bounds[0], initial=True)
+        return sim
+
+    # One period of priming settles time-keeping state (such as the time of
+    # the previous tick) and a first warm-up the fading state upstream of
+    # the scan state, which is then set to its known value
+    start = bounds[chunk] - warmup
+    _restart(sim, start - warmup - period, initial=False)
+    sim.advance_block(period + warmup)
+    _set_scan_values(sim, scan)
+
+    return sim
+
+
+def _scan_chunk(chunk: int, scan: List[Tuple[Any, ...]]) -> List[Any]:
+    """Runs from the start of `chunk`'s warm-up to the start of the next
+    chunk's warm-up and returns how much the scan state grew meanwhile."""
+    sim = _enter(chunk, scan)
+    bounds, warmup = _FORKED['bounds'], _FORKED['warmup']
+
+    start = bounds[chunk] - (warmup if chunk > 0 else 0)
+    sim.advance_block(bounds[chunk + 1] - warmup - start)
+
+    return [tuple(end - begin for end, begin in zip(after, before))
+            for after, before in zip(_scan_values(sim), scan)]
+
+
+def _run_chunk(chunk: int, scan: List[Tuple[Any, ...]]) \
+        -> Tuple[List[np.ndarray], Optional[tuple]]:
+    """Runs `chunk` after its warm-up and returns the samples written to
+    every wire during the chunk. The last chunk also returns the final state
+    of the components and wires."""
+    sim = _enter(chunk, scan)
+    bounds, warmup = _FORKED['bounds'], _FORKED['warmup']
+
+    # The second warm-up settles the state downstream of the scan state
+    if chunk > 0:
+        sim.advance_block(warmup)
+        _record(sim)
+    sim.advance_block(bounds[chunk + 1] - bounds[chunk])
+
+    histories = [wire.history.copy() for wire in sim.wires]
+    final = None
+    if chunk == len(bounds) - 2:
+        final = ([component.get_state() for component in sim.schedule],
+                 [wire.voltage for wire in sim.wires])
+
+    return histories, final
+
+
+def run_parallel(sim, n_steps: int, workers: Optional[int] = None,
+                 warmup: Optional[float] = None):
+    """Runs `n_steps` time-steps of `sim` split into consecutive chunks, one
+    per worker process, and stitches the wire histories back in order.
+
+    A chunk cannot see the state left by the one before it, so it starts
+    early from freshly reset components and drops what it records meanwhile:
+    state that fades (filters, detectors, delay lines) settles within
+    `warmup` seconds, by default the time `Component.settling` gives for the
+    topology. State listed in `Component.scan_state` never fades (an
+    oscillator's phase). It is set after a first warm-up, to a value found
+    by a prefix-scan of the growth of every chunk measured in a preliminary
+    parallel pass, and a second warm-up lets the components downstream of it
+    settle before the chunk begins.
+
+    Samples match a sequential run up to what the warm-up leaves of the
+    fading state. Runs too short to split, with a component that is not
+    `Component.chunkable`, or on platforms that cannot fork (see
+    `can_fork`) are run sequentially.
+    """
+    if sim.schedule is None:
+        sim.compile()
+
+    if not can_fork() or \
+            not all(component.chunkable for component in sim.schedule):
+        sim.advance_block(n_steps)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    first_step = sim.step
+    period = _period(sim)
+    warmup_steps = _settling(sim) if warmup is None \
+        else int(round(warmup / sim.dt))
+    warmup_steps = -(-warmup_steps // period) * period
+
+    # Every chunk but the first needs room for priming and both warm-ups
+    n_chunks = min(workers, n_steps // (2 * warmup_steps + 2 * period))
+    if n_chunks <= 1:
+        sim.advance_block(n_steps)
+        return
+
+    bounds = _boundaries(first_step, n_steps, n_chunks, period)
+
+    # Clock of the whole run, accumulated exactly like `advance` does
+    deltas = np.full(n_steps, sim.dt)
+    deltas[0] = sim.current_time
+    times = np.add.accumulate(deltas)
+
+    _FORKED.update(
+        sim=sim, times=times, first_step=first_step, bounds=bounds,
+        warmup=warmup_steps, period=period,
+        modes=[wire.recording[0] for wire in sim.wires],
+        states=[copy.deepcopy(component.get_state())
+                for component in sim.schedule],
+        voltages=[wire.voltage for wire in sim.wires])
+
+    # Scan state at the start of each chunk's warm-up (the first chunk
+    # starts from the current state)
+    scan = [_scan_values(sim)] * n_chunks
+    context = multiprocessing.get_context('fork')
+    try:
+        with ProcessPoolExecutor(n_chunks, mp_context=context) as pool:
+            for _ in range(_scan_levels(sim)):
+                growth = list(pool.map(_scan_chunk, range(n_chunks - 1),
+                                       scan[:-1]))
+                for chunk, grown in enumerate(growth):
+                    scan[chunk + 1] = [
+                        tuple(begin + delta
+                              for begin, delta in zip(state, deltas))
+                        for state, deltas in zip(scan[chunk], grown)]
+
+            results = list(pool.map(_run_chunk, range(n_chunks), scan))
+    finally:
+        _FORKED.clear()
+
+    sim.timebase.extend(times)
+    for chunk, (histories, _) in enumerate(results):
+        start = bounds[chunk]
+        chunk_times = times[start - first_step:bounds[chunk + 1] - first_step]
+
+        for wire, values in zip(sim.wires, histories):
+            if len(values) > 0:
+                stride = wire.stride
+                wire.write_block_async(values,
+                                       chunk_times[-start % stride::stride])
+
+    states, voltages = results[-1][1]
+    for component, state in zip(sim.schedule, states):
+        component.set_state(state)
+    for wire, voltage in zip(sim.wires, voltages):
+        wire.voltage = voltage
+
+    sim.step = first_step + n_steps
+    sim.current_time = float(times[-1]) + sim.dt
@@ -0,0 +1,168 @@
+from .components import Component
+from .lti import find_chains
+from .parallel import can_fork
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import multiprocessing
+import os
+
+import numpy as np
+
+
+# Simulation and partitions handed to the worker processes, which inherit
+# them by forking (see `src.core.parallel`)
+_FORKED: Dict[str, Any] = {}
+
+
+def split_branches(sim) -> Tuple[List[Component], List[List[Component]]]:
+    """Splits the compiled topology of `sim` into a trunk and independent
+    branches.
+
+    The trunk is the run of components from the source up to the first wire
+    feeding more than one component. Below it, the components fall into
+    weakly connected groups sharing nothing but that wire; each group is a
+    branch, in schedule order. A topology without fan-out is all trunk.
+    """
+    trunk: List[Component] = []
+    wire = sim.input_wire
+    while len(wire.effects) == 1 and wire.effects[0] not in trunk:
+        trunk.append(wire.effects[0])
+        wire = wire.effects[0].output_wire
+
+    below = [component for component in sim.schedule
+             if component not in trunk]
+
+    # Union-find over the components below the trunk
+    parents = {component: component for component in below}
+
+    def root(component: Component) -> Component:
+        while parents[component] is not component:
+            parents[component] = parents[parents[component]]
+            component = parents[component]
+        return component
+
+    for component in below:
+        for effect in component.output_wire.effects:
+            if effect in parents:
+                parents[root(effect)] = root(component)
+
+    branches: Dict[Component, List[Component]] = {}
+    for component in below:
+        branches.setdefault(root(component), []).append(component)
+
+    return trunk, list(branches.values())
+
+
+def _group(branches: List[List[Component]],
+           n_groups: int) -> List[List[Component]]:
+    """Deals the branches (largest first) to the `n_groups` groups holding
+    the fewest components so far."""
+    groups: List[List[Component]] = [[] for _ in range(n_groups)]
+    for branch in sorted(branches, key=len, reverse=True):
+        min(groups, key=len).extend(branch)
+
+    return groups
+
+
+def _run_group(index: int) \
+        -> Tuple[List[Tuple[int, np.ndarray]], tuple]:
+    """Runs the trunk and the branches of group `index` on the worker's copy
+    of the simulation. Returns the samples written to the wires the group
+    drives (the trunk's go with group 0) and the final state of its wires
+    and components, identified by position in `sim.wires` and
+    `sim.schedule`."""
+    sim = _FORKED['sim']
+    members = set(_FORKED['trunk']) | set(_FORKED['groups'][index])
+
+    kept = [position for position, (component, _) in enumerate(sim.plan)
+            if component in members]
+    sim.last_inputs = [sim.last_inputs[position] for position in kept]
+    sim.plan = [sim.plan[position] for position in kept]
+    sim.schedule = [component for component, _ in sim.plan]
+    sim.latches = [(component, divisor) for component, divisor in sim.plan
+                   if component.registered]
+    sim.chains = find_chains(sim.plan)
+    sim.kernel = None
+
+    owned = {component.output_wire for component in sim.schedule
+             if index == 0 or component not in _FORKED['trunk']}
+    if index == 0:
+        owned.add(sim.input_wire)
+    positions = [position for position, wire in enumerate(sim.wires)
+                 if wire in owned]
+
+    # Record in full (except for wires not recorded at all); the parent
+    # records the samples in its own mode
+    for position in positions:
+        wire = sim.wires[position]
+        wire.set_recording('off' if wire.recording[0] == 'off' else 'full')
+
+    sim.advance_block(_FORKED['n_steps'])
+
+    histories = [(position, sim.wires[position].history.copy())
+                 for position in positions]
+    final = ([(position, component.get_state())
+              for position, component in zip(kept, sim.schedule)
+              if index == 0 or component not in _FORKED['trunk']],
+             [(position, sim.wires[position].voltage)
+              for position in positions],
+             list(zip(kept, sim.last_inputs)))
+
+    return histories, final
+
+
+def run_partitioned(sim, n_steps: int, workers: Optional[int] = None):
+    """Runs `n_steps` time-steps of `sim` with its independent branches (see
+    `split_branches`) in separate worker processes, and merges the wire
+    histories back into `sim`.
+
+    Every worker recomputes the source and the trunk itself rather than
+    receiving them, which is cheap next to the branches. Branches are
+    grouped when there are more of them than `workers` (all cores by
+    default). Produces the same samples as `advance_block`, which it falls
+    back to on platforms that cannot fork (see `can_fork`).
+    """
+    if sim.schedule is None:
+        sim.compile()
+
+    trunk, branches = split_branches(sim)
+    n_groups = min(workers or os.cpu_count() or 1, len(branches))
+    if n_groups <= 1 or not can_fork():
+        sim.advance_block(n_steps)
+        return
+
+    groups = _group(branches, n_groups)
+    first_step = sim.step
+
+    # Clock of the whole run, accumulated exactly like `advance` does
+    deltas = np.full(n_steps, sim.dt)
+    deltas[0] = sim.current_time
+    times = np.add.accumulate(deltas)
+
+    _FORKED.update(sim=sim, trunk=trunk, groups=groups, n_steps=n_steps)
+    context = multiprocessing.get_context('fork')
+    try:
+        with ProcessPoolExecutor(n_groups, mp_context=context) as pool:
+            results = list(pool.map(_run_group, range(n_groups)))
+    finally:
+        _FORKED.clear()
+
+    sim.timebase.extend(times)
+    for histories, (states, voltages, last_inputs) in results:
+        for position, values in histories:
+            wire = sim.wires[position]
+            if len(values) > 0:
+                stride = wire.stride
+                wire.write_block_async(values,
+                                       times[-first_step % stride::stride])
+
+        for position, voltage in voltages:
+            sim.wires[position].voltage = voltage
+        for position, state in states:
+            sim.schedule[position].set_state(state)
+        for position, value in last_inputs:
+            sim.last_inputs[position] = value
+
+    sim.step = first_step + n_steps
+    sim.current_time = float(times[-1]) + sim.dt
@@ -0,0 +1,180 @@
+from .components import Wire, Component
+from .lti import LTIChain
+from .schedule import sample_held
+from .signals import sample_signal
+
+from queue import Queue
+from typing import Dict, List, NamedTuple, Optional, Union
+import threading
+
+import numpy as np
+
+
+class Block(NamedTuple):
+    """Samples written to a wire during one block of time-steps."""
+
+    first_step: int
+    times: np.ndarray  # every time-step of the block
+    held: float  # the wire's value before the block
+    samples: np.ndarray
+
+
+class _Stage(threading.Thread):
+    """Worker running one component (or one chain of LTI components) on the
+    blocks arriving at its input, and handing its output blocks on."""
+
+    def __init__(self, unit: Union[Component, LTIChain], divisor: int):
+        super().__init__(daemon=True)
+        self.unit = unit
+        self.divisor = divisor
+
+        self.inbox: Optional[Queue] = None
+        self.outboxes: List[Queue] = []
+        self.error: Optional[BaseException] = None
+
+    @property
+    def input_wire(self) -> Wire:
+        if isinstance(self.unit, LTIChain):
+            return self.unit.stages[0].input_wire
+        return self.unit.input_wire
+
+    @property
+    def output_wire(self) -> Wire:
+        if isinstance(self.unit, LTIChain):
+            return self.unit.stages[-1].output_wire
+        return self.unit.output_wire
+
+    def run(self):
+        while True:
+            block = self.inbox.get()
+            if block is None:
+                break
+
+            # After a failure, keep draining the inbox so upstream stages
+            # never block
+            if self.error is not None:
+                continue
+
+            try:
+                block = self.process(block)
+            except BaseException as error:
+                self.error = error
+                continue
+
+            for outbox in self.outboxes:
+                outbox.put(block)
+
+        for outbox in self.outboxes:
+            outbox.put(None)
+
+    def process(self, block: Block) -> Block:
+        first_step, times = block.first_step, block.times
+        divisor = self.divisor
+
+        offset = -first_step % divisor
+        steps = np.arange(first_step + offset, first_step + len(times),
+                          divisor)
+        input_wire = self.input_wire
+
+        samples = block.samples
+        if len(steps) > 0 and input_wire.stride != divisor:
+            samples = sample_held(block.held, samples, input_wire.stride,
+                                  first_step, steps)
+
+        if isinstance(self.unit, LTIChain):
+            stages = self.unit.stages
+            outputs = self.unit.process_block(samples) if len(steps) > 0 \
+                else [samples[:0]] * len(stages)
+        else:
+            stages = [self.unit]
+            outputs = [self.unit.process_block(times[offset::divisor],
+                                               samples)] \
+                if len(steps) > 0 else [samples[:0]]
+
+        for stage, values in zip(stages, outputs):
+            output_wire = stage.output_wire
+            held = output_wire.voltage
+            if len(values) > 0:
+                stride = output_wire.stride
+                output_wire.write_block_async(
+                    values, times[-first_step % stride::stride])
+
+        return Block(first_step, times, held, outputs[-1])
+
+
+def run_pipelined(sim, n_steps: int, block_size: int = 4096,
+                  queue_depth: int = 4):
+    """Runs `n_steps` time-steps of `sim` in blocks, with every component
+    (or chain of LTI components) in a thread of its own.
+
+    Stages hand blocks to the stages reading their output wire through
+    queues holding at most `queue_depth` blocks, so a fast stage waits for a
+    slow one instead of piling blocks up. While one stage works on a block,
+    the stages upstream already work on the next ones; NumPy releases the
+    GIL in large array operations, so stages overlap on multiple cores.
+
+    Produces the same samples as `advance_block` called with blocks of
+    `block_size` time-steps.
+    """
+    if sim.schedule is None:
+        sim.compile()
+
+    chains = {chain.stages[0]: chain for chain in sim.chains}
+    chained = {stage for chain in sim.chains for stage in chain.stages}
+
+    stages: List[_Stage] = []
+    for component, divisor in sim.plan:
+        if component in chains:
+            stages.append(_Stage(chains[component], divisor))
+        elif component not in chained:
+            stages.append(_Stage(component, divisor))
+
+    # Connect every stage to the ones reading the wire it writes
+    readers: Dict[Wire, List[Queue]] = {}
+    for stage in stages:
+        stage.inbox = Queue(queue_depth)
+        readers.setdefault(stage.input_wire, []).append(stage.inbox)
+    for stage in stages:
+        stage.outboxes = readers.get(stage.output_wire, [])
+    sources = readers.get(sim.input_wire, [])
+
+    for stage in stages:
+        stage.start()
+
+    first_step = sim.step
+    time = sim.current_time
+    try:
+        for start in range(0, n_steps, block_size):
+            count = min(block_size, n_steps - start)
+            step = first_step + start
+
+            deltas = np.full(count, sim.dt)
+            deltas[0] = time
+            times = np.add.accumulate(deltas)
+            sim.timebase.extend(times)
+            time = float(times[-1]) + sim.dt
+
+            input_times = times[-step % sim.input_divisor::
+                                sim.input_divisor]
+            inputs = sample_signal(sim.input_function, input_times)
+
+            held = sim.input_wire.voltage
+            if len(inputs) > 0:
+                sim.input_wire.write_block_async(
+                    inputs, times[-step % sim.input_wire.stride::
+                                  sim.input_wire.stride])
+
+            for inbox in sources:
+                inbox.put(Block(step, times, held, inputs))
+    finally:
+        for inbox in sources:
+            inbox.put(None)
+        for stage in stages:
+            stage.join()
+
+    for stage in stages:
+        if stage.error is not None:
+            raise stage.error
+
+    sim.step = first_step + n_steps
+    sim.current_time = time
@@ -0,0 +1,55 @@
+from .components import Wire
+from .schedule import compile_schedule
+from .signals import sample_signal
+from .types import SignalGenerator
+
+from typing import Dict, Tuple
+import math
+
+import numpy as np
+
+
+def estimate_bandwidth(signal: SignalGenerator, rate: float,
+                       duration: float = 1.0,
+                       fraction: float = 0.999) -> Tuple[float, float]:
+    """Samples `signal` at `rate` Hz for `duration` seconds and returns its
+    bandwidth (the frequency below which `fraction` of its energy lies) and
+    its peak magnitude."""
+    n_samples = max(2, int(round(duration * rate)))
+    times = np.arange(n_samples) / rate
+    samples = sample_signal(signal, times)
+
+    energy = np.abs(np.fft.rfft(samples * np.hanning(n_samples))) ** 2
+    cumulative = np.cumsum(energy)
+    if cumulative[-1] == 0:
+        return 0.0, 0.0
+
+    index = int(np.searchsorted(cumulative, fraction * cumulative[-1]))
+    bandwidth = index * rate / n_samples
+
+    return bandwidth, float(np.max(np.abs(samples)))
+
+
+def max_frequency(source: Wire, bandwidth: float, peak: float = 1.0) -> float:
+    """Highest frequency carried by `source` or any wire it drives, when
+    `source` carries no content above `bandwidth` and stays within
+    +/-`peak`.
+
+    Walks the components in schedule order, each one reporting its output
+    content from its input's (see `Component.max_frequency`).
+    """
+    frequencies: Dict[Wire, float] = {source: bandwidth}
+    for component in compile_schedule(source):
+        frequencies[component.output_wire] = component.max_frequency(
+            frequencies.get(component.input_wire, bandwidth), peak)
+
+    return max(frequencies.values())
+
+
+def nyquist_dt(frequency: float, oversampling: float, rate: float) -> float:
+    """Coarsest time-step sampling `frequency` at least `oversampling` times
+    per cycle and fitting a whole number of times into a sample period at
+    `rate` Hz (so components running at `rate` keep an exact divisor)."""
+    steps = max(1, math.ceil(oversampling * frequency / rate))
+
+    return 1.0 / (rate * steps)
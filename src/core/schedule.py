@@ -0,0 +1,130 @@
+from .batch import prepend
+from .components import Wire, Component
+
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+
+def compile_schedule(source: Wire) -> List[Component]:
+    """Orders the components driven (directly or not) by `source` so that
+    every component runs after all components writing to its input wire.
+
+    The order is built once from `Wire.effects` with Kahn's algorithm.
+    Registers (see `Component.registered`) do not depend on their input
+    within a time-step, so they come first and may close feedback loops.
+    Raises `ValueError` if the reachable graph contains a cycle without a
+    register, since such a loop could never settle within a single
+    time-step.
+    """
+
+    # Collect every component reachable from the source
+    reachable: List[Component] = []
+    seen = set()
+    stack = list(source.effects)
+    while stack:
+        component = stack.pop()
+        if component in seen:
+            continue
+        seen.add(component)
+        reachable.append(component)
+        stack.extend(component.output_wire.effects)
+
+    # Reachable components driving each component's input within a step
+    drivers: Dict[Component, List[Component]] = \
+        {component: [] for component in reachable}
+    for component in reachable:
+        for effect in component.output_wire.effects:
+            if not effect.registered:
+                drivers[effect].append(component)
+
+    pending = {component: len(drivers[component]) for component in reachable}
+
+    ready = [component for component in reachable if component.registered]
+    ready += [component for component in source.effects
+              if pending[component] == 0 and not component.registered]
+    schedule: List[Component] = []
+    while ready:
+        component = ready.pop(0)
+        schedule.append(component)
+
+        for effect in component.output_wire.effects:
+            if effect.registered:
+                continue
+
+            pending[effect] -= 1
+            if pending[effect] == 0:
+                ready.append(effect)
+
+    if len(schedule) < len(reachable):
+        loop = _find_loop(drivers, [component for component in reachable
+                                    if pending[component] > 0])
+        raise ValueError(
+            "Combinational loop detected: "
+            + " -> ".join(f"{type(component).__name__} "
+                          f"({component.output_wire.name})"
+                          for component in loop)
+            + "; insert a Delay to break it")
+
+    return schedule
+
+
+def upstream(schedule: List[Component],
+             wires: Iterable[Wire]) -> List[Component]:
+    """Returns the components of `schedule` that `wires` depend on: the ones
+    writing them, the ones writing their inputs and so on, in schedule
+    order."""
+    writers: Dict[Wire, List[Component]] = {}
+    for component in schedule:
+        writers.setdefault(component.output_wire, []).append(component)
+
+    needed = set()
+    stack = [writer for wire in wires for writer in writers.get(wire, [])]
+    while stack:
+        component = stack.pop()
+        if component in needed:
+            continue
+        needed.add(component)
+        stack.extend(writers.get(component.input_wire, []))
+
+    return [component for component in schedule if component in needed]
+
+
+def _find_loop(drivers: Dict[Component, List[Component]],
+               stuck: List[Component]) -> List[Component]:
+    """Returns one cycle among the components left unscheduled, in signal
+    flow order, with the first component repeated at the end.
+
+    Every stuck component has a stuck driver, so walking drivers backwards
+    from any of them eventually revisits a component.
+    """
+    stuck_set = set(stuck)
+
+    path: List[Component] = []
+    position: Dict[Component, int] = {}
+    component = stuck[0]
+    while component not in position:
+        position[component] = len(path)
+        path.append(component)
+        component = next(driver for driver in drivers[component]
+                         if driver in stuck_set)
+
+    loop = path[position[component]:]
+    loop.reverse()
+
+    return loop + loop[:1]
+
+
+def sample_held(held: float, samples: np.ndarray, stride: int,
+                first_step: int, steps: np.ndarray) -> np.ndarray:
+    """Reads a wire written every `stride` time-steps at the time-steps
+    `steps`, holding each value until the next write.
+
+    `samples` are the writes made during the block starting at `first_step`
+    and `held` is the wire's value before that block (one per row of a
+    batched block).
+    """
+    first_write = first_step + (-first_step % stride)
+    index = (steps - first_write) // stride + 1
+
+    return prepend(held, samples)[..., index]
@@ -0,0 +1,27 @@
+from .types import BlockGenerator, SignalGenerator
+
+import numpy as np
+
+
+def with_block(signal_func: SignalGenerator,
+               block_func: BlockGenerator) -> SignalGenerator:
+    """Attaches `block_func`, the block form of `signal_func`, to it.
+
+    The block form maps an array of times to the array of samples
+    `signal_func` returns at those times, so block engines can generate a
+    whole block of the source at once (see `sample_signal`).
+    """
+    signal_func.block = block_func
+
+    return signal_func
+
+
+def sample_signal(signal: SignalGenerator, times: np.ndarray) -> np.ndarray:
+    """Samples `signal` at `times`, through its block form when it has one
+    (see `with_block`) and one call per sample otherwise."""
+    block_func = getattr(signal, 'block', None)
+    if block_func is not None:
+        return np.asarray(block_func(times), dtype=float)
+
+    return np.fromiter(map(signal, times.tolist()), dtype=float,
+                       count=len(times))
@@ -1,4 +1,9 @@
 from typing import Callable
 
+import numpy as np
+
 
 SignalGenerator = Callable[[float], float]
+
+# Block form of a signal generator: samples at an array of times
+BlockGenerator = Callable[[np.ndarray], np.ndarray]
@@ -1,56 +1,137 @@
+from src.core.batch import last, prepend
 from src.core.components import Component, Wire
+from src.core.oscillators import OscillatorBank
+from src.modules.filters import BiquadCascade, FIR, one_pole
 
+from typing import Optional, Union
 import math
 
+import numpy as np
+
 
 class AMDemodulator(Component):
-    """AM Demodulator using envelope detection with low-pass filter."""
+    """AM Demodulator using envelope detection with low-pass filter.
+
+    `lowpass` smooths the rectified input (see `src.modules.filters`); the
+    default is a one-pole moving average. Every demodulator needs a filter
+    of its own, since the filter keeps the state.
+    """
+
+    __slots__ = ('carrier_freq', 'modulation_index', 'lowpass')
+
+    kernel_state = ('lowpass.state',)
+    chunkable = True
+    batchable = True
+    parameters = ('carrier_freq', 'modulation_index')
 
     def __init__(self,
                  input_wire: Wire,
                  output_wire: Wire,
                  carrier_freq: float,
-                 modulation_index: float = 0.5):
+                 modulation_index: float = 0.5,
+                 lowpass: Optional[Union[FIR, BiquadCascade]] = None):
         super().__init__(input_wire, output_wire)
         self.carrier_freq = carrier_freq
         self.modulation_index = modulation_index
 
+        if lowpass is None:
+            lowpass = BiquadCascade(one_pole(0.02))
+        self.lowpass = lowpass
+
         self.reset()
 
+    @property
+    def kernel(self) -> str:
+        return self.lowpass.kernel('lowpass', 'abs({input})', '{envelope}') \
+            + "{output} = ({envelope} - 1.0) / {modulation_index}\n"
+
     def reset(self):
-        self.envelope = 1.0
-        self.alpha = 0.02
+        # Settled on the envelope of an unmodulated carrier
+        self.lowpass.reset(1.0)
+
+    def settling(self, dt: float) -> int:
+        return self.lowpass.settling()
 
     def tick(self, time: float):
         inp = abs(self.input_wire.read())
 
-        self.envelope = self.alpha * inp + (1 - self.alpha) * self.envelope
+        envelope = self.lowpass.step(inp)
 
-        message = (self.envelope - 1.0) / self.modulation_index
+        message = (envelope - 1.0) / self.modulation_index
         self.output_wire.write(message, time)
 
+    def process_block(self, times: np.ndarray,
+                      inputs: np.ndarray) -> np.ndarray:
+        envelope = self.lowpass.process(np.abs(inputs))
+
+        return (envelope - 1.0) / self.modulation_index
+
 
 class FMDemodulator(Component):
-    """FM Demodulator using zero-crossing detection with smoothing."""
+    """FM Demodulator using zero-crossing detection with smoothing.
+
+    `lowpass` smooths the frequency estimate, which only changes once per
+    carrier cycle (see `src.modules.filters`); the default is a one-pole
+    moving average.
+    """
+
+    __slots__ = ('carrier_freq', 'freq_deviation', 'lowpass', 'prev_value',
+                 'prev_time', 'last_crossing_time', 'inst_freq')
+
+    # Kernel template of the zero-crossing detector; the low-pass follows
+    # it (see `kernel`)
+    detector = """
+{current} = {input}
+if {prev_value} <= 0 < {current}:
+    if {last_crossing_time} > 0:
+        {period} = {time} - {last_crossing_time}
+        if {period} > 0:
+            {inst_freq} = 1.0 / {period}
+    {last_crossing_time} = {time}
+{normalized} = ({inst_freq} - {carrier_freq}) / {freq_deviation}
+{prev_value} = {current}
+{prev_time} = {time}
+"""
+    kernel_state = ('prev_value', 'prev_time', 'last_crossing_time',
+                    'inst_freq', 'lowpass.state')
+    chunkable = True
+    batchable = True
+    parameters = ('carrier_freq', 'freq_deviation')
 
     def __init__(self,
                  input_wire: Wire,
                  output_wire: Wire,
                  carrier_freq: float,
-                 freq_deviation: float = 5.0):
+                 freq_deviation: float = 5.0,
+                 lowpass: Optional[Union[FIR, BiquadCascade]] = None):
         super().__init__(input_wire, output_wire)
         self.carrier_freq = carrier_freq
         self.freq_deviation = freq_deviation
 
+        if lowpass is None:
+            lowpass = BiquadCascade(one_pole(0.05))
+        self.lowpass = lowpass
+
         self.reset()
 
+    @property
+    def kernel(self) -> str:
+        return self.detector.lstrip('\n') \
+            + self.lowpass.kernel('lowpass', '{normalized}', '{output}')
+
     def reset(self):
         self.prev_value = 0.0
         self.prev_time = 0.0
         self.last_crossing_time = 0.0
         self.inst_freq = self.carrier_freq
-        self.smoothed_output = 0.0
-        self.alpha = 0.05
+        self.lowpass.reset()
+
+    def settling(self, dt: float) -> int:
+        # Two zero crossings measure the first period (allowing for a
+        # carrier deviated down to half its frequency), then the low-pass
+        # settles
+        period = 1.0 / (float(np.min(self.carrier_freq)) * dt)
+        return 4 * math.ceil(period) + self.lowpass.settling()
 
     def tick(self, time: float):
         current = self.input_wire.read()
@@ -65,17 +146,70 @@ class FMDemodulator(Component):
         freq_offset = self.inst_freq - self.carrier_freq
         normalized = freq_offset / self.freq_deviation
 
-        self.smoothed_output = (self.alpha * normalized +
-                                (1 - self.alpha) * self.smoothed_output)
+        smoothed = self.lowpass.step(normalized)
 
         self.prev_value = current
         self.prev_time = time
-        self.output_wire.write(self.smoothed_output, time)
+        self.output_wire.write(smoothed, time)
+
+    def process_block(self, times: np.ndarray,
+                      inputs: np.ndarray) -> np.ndarray:
+        # Rows of a batched block may cross zero at different ticks, so the
+        # crossings are handled as masks over the whole block
+        shape = np.broadcast_shapes(inputs.shape, np.shape(self.carrier_freq),
+                                    np.shape(self.freq_deviation))
+        inputs = np.broadcast_to(inputs, shape)
+
+        previous = prepend(self.prev_value, inputs[..., :-1])
+        crossing = (previous <= 0) & (inputs > 0)
+
+        # Time of the latest crossing before each tick (times increase)
+        latest = np.maximum.accumulate(
+            prepend(self.last_crossing_time,
+                    np.where(crossing, times, -np.inf)), axis=-1)
+        last_crossing_times = latest[..., :-1]
+
+        # A crossing updates the frequency estimate only when an earlier
+        # crossing is known and the period between them is positive.
+        periods = times - last_crossing_times
+        valid = crossing & (last_crossing_times > 0) & (periods > 0)
+
+        # Hold each estimate until the next one (forward fill)
+        estimates = prepend(self.inst_freq,
+                            1.0 / np.where(valid, periods, 1.0))
+        marks = np.where(valid, np.arange(1, len(times) + 1), 0)
+        inst_freq = np.take_along_axis(
+            estimates, np.maximum.accumulate(marks, axis=-1), axis=-1)
+
+        freq_offset = inst_freq - self.carrier_freq
+        normalized = freq_offset / self.freq_deviation
+
+        outputs = self.lowpass.process(normalized)
+
+        self.last_crossing_time = last(latest)
+        self.inst_freq = last(inst_freq)
+        self.prev_value = last(inputs)
+        self.prev_time = float(times[-1])
+
+        return outputs
 
 
 class PMDemodulator(Component):
     """PM Demodulator using coherent detection."""
 
+    __slots__ = ('carrier_freq', 'phase_deviation')
+
+    kernel = """
+{angle} = 2 * pi * (({carrier_freq} * {time}) % 1.0)
+{ref_cos} = cos({angle})
+{ref_sin} = sin({angle})
+{phase} = atan2({input} * {ref_sin}, {input} * {ref_cos})
+{output} = {phase} / {phase_deviation}
+"""
+    chunkable = True
+    batchable = True
+    parameters = ('carrier_freq', 'phase_deviation')
+
     def __init__(self,
                  input_wire: Wire,
                  output_wire: Wire,
@@ -85,11 +219,16 @@ class PMDemodulator(Component):
         self.carrier_freq = carrier_freq
         self.phase_deviation = phase_deviation
 
+        self.request_carriers(OscillatorBank())
+
+    def request_carriers(self, oscillators: OscillatorBank):
+        self.carriers = (oscillators.carrier(self.carrier_freq),)
+
     def tick(self, time: float):
         inp = self.input_wire.read()
 
-        ref_cos = math.cos(2 * math.pi * self.carrier_freq * time)
-        ref_sin = math.sin(2 * math.pi * self.carrier_freq * time)
+        ref_cos = self.carriers[0].cos(time)
+        ref_sin = self.carriers[0].sin(time)
 
         i_component = inp * ref_cos
         q_component = inp * ref_sin
@@ -98,3 +237,16 @@ class PMDemodulator(Component):
 
         message = phase / self.phase_deviation
         self.output_wire.write(message, time)
+
+    def process_block(self, times: np.ndarray,
+                      inputs: np.ndarray) -> np.ndarray:
+        reference = self.carriers[0].phasors(times)
+        ref_cos = reference.real
+        ref_sin = reference.imag
+
+        i_component = inputs * ref_cos
+        q_component = inputs * ref_sin
+
+        phase = np.arctan2(q_component, i_component)
+
+        return phase / self.phase_deviation
@@ -1,7 +1,13 @@
+from src.core.batch import last, prepend
 from src.core.components import Component, Wire
+from src.core.integration import integration_weights, step_areas, \
+    wrap_phase
+from src.core.oscillators import OscillatorBank
 
 import math
 
+import numpy as np
+
 
 class AMModulator(Component):
     """Amplitude Modulation (AM).
@@ -11,6 +17,17 @@ class AMModulator(Component):
     where m is the modulation index.
     """
 
+    __slots__ = ('carrier_freq', 'modulation_index')
+
+    kernel = """
+{carrier} = cos(2 * pi * (({carrier_freq} * {time}) % 1.0))
+{envelope} = 1.0 + {modulation_index} * {input}
+{output} = {envelope} * {carrier}
+"""
+    chunkable = True
+    batchable = True
+    parameters = ('carrier_freq', 'modulation_index')
+
     def __init__(self,
                  input_wire: Wire,
                  output_wire: Wire,
@@ -20,29 +37,72 @@ class AMModulator(Component):
         self.carrier_freq = carrier_freq
         self.modulation_index = modulation_index
 
+        self.request_carriers(OscillatorBank())
+
+    def request_carriers(self, oscillators: OscillatorBank):
+        self.carriers = (oscillators.carrier(self.carrier_freq),)
+
     def tick(self, time: float):
         message = self.input_wire.read()
-        carrier = math.cos(2 * math.pi * self.carrier_freq * time)
+        carrier = self.carriers[0].cos(time)
 
         envelope = 1.0 + self.modulation_index * message
         self.output_wire.write(envelope * carrier, time)
 
+    def max_frequency(self, bandwidth: float, peak: float = 1.0) -> float:
+        # Sidebands at fc +/- the message frequencies
+        return float(np.max(self.carrier_freq)) + bandwidth
+
+    def process_block(self, times: np.ndarray,
+                      inputs: np.ndarray) -> np.ndarray:
+        carrier = self.carriers[0].phasors(times).real
+
+        envelope = 1.0 + self.modulation_index * inputs
+        return envelope * carrier
+
 
 class FMModulator(Component):
     """Frequency Modulation (FM).
 
     Carrier frequency varies with the message signal.
     Instantaneous frequency: fc + kf * message(t)
+
+    The phase integrates the instantaneous frequency with `integration`,
+    one of `INTEGRATION_RULES`, and is kept wrapped into [-pi, pi].
     """
 
+    __slots__ = ('carrier_freq', 'freq_deviation', 'weights', 'phase_integral',
+                 'last_time', 'last_freq', 'older_freq')
+
+    kernel = """
+{dt} = {time} - {last_time}
+{inst_freq} = {carrier_freq} + {freq_deviation} * {input}
+if {dt} > 0:
+    {area} = ({weights}[0] * {inst_freq} + {weights}[1] * {last_freq}
+              + {weights}[2] * {older_freq})
+    {phase_integral} = remainder({phase_integral} + 2 * pi * {area} * {dt},
+                                 2 * pi)
+{older_freq} = {last_freq}
+{last_freq} = {inst_freq}
+{output} = cos({phase_integral})
+{last_time} = {time}
+"""
+    kernel_state = ('phase_integral', 'last_time', 'last_freq', 'older_freq')
+    chunkable = True
+    scan_state = ('phase_integral',)
+    batchable = True
+    parameters = ('carrier_freq', 'freq_deviation')
+
     def __init__(self,
                  input_wire: Wire,
                  output_wire: Wire,
                  carrier_freq: float,
-                 freq_deviation: float = 10.0):
+                 freq_deviation: float = 10.0,
+                 integration: str = 'rectangle'):
         super().__init__(input_wire, output_wire)
         self.carrier_freq = carrier_freq
         self.freq_deviation = freq_deviation
+        self.weights = integration_weights(integration)
 
         self.reset()
 
@@ -50,18 +110,62 @@ class FMModulator(Component):
         self.phase_integral = 0.0
         self.last_time = 0.0
 
+        # Instantaneous frequencies of the two previous ticks, as if the
+        # message had been 0 before the first one
+        self.last_freq = self.carrier_freq
+        self.older_freq = self.carrier_freq
+
+    def settling(self, dt: float) -> int:
+        # Instantaneous frequencies of the two previous ticks
+        return 2
+
     def tick(self, time: float):
         message = self.input_wire.read()
         dt = time - self.last_time
 
+        inst_freq = self.carrier_freq + self.freq_deviation * message
         if dt > 0:
-            inst_freq = self.carrier_freq + self.freq_deviation * message
-            self.phase_integral += 2 * math.pi * inst_freq * dt
+            weights = self.weights
+            area = (weights[0] * inst_freq + weights[1] * self.last_freq
+                    + weights[2] * self.older_freq)
+            self.phase_integral = wrap_phase(
+                self.phase_integral + 2 * math.pi * area * dt)
+
+        self.older_freq = self.last_freq
+        self.last_freq = inst_freq
 
         signal = math.cos(self.phase_integral)
         self.output_wire.write(signal, time)
         self.last_time = time
 
+    def max_frequency(self, bandwidth: float, peak: float = 1.0) -> float:
+        # Carson's rule: 98% of the power lies within (peak deviation +
+        # message bandwidth) of the carrier
+        deviation = float(np.max(np.abs(self.freq_deviation))) * peak
+        return float(np.max(self.carrier_freq)) + deviation + bandwidth
+
+    def process_block(self, times: np.ndarray,
+                      inputs: np.ndarray) -> np.ndarray:
+        dt = np.diff(times, prepend=self.last_time)
+
+        inst_freq = self.carrier_freq + self.freq_deviation * inputs
+        areas = step_areas(self.weights, inst_freq, self.last_freq,
+                           self.older_freq)
+        increments = np.where(dt > 0, 2 * np.pi * areas * dt, 0.0)
+
+        # The phase is the running sum of the increments, accumulated in the
+        # same order as the scalar integrator (which also wraps it on every
+        # tick, so the two agree up to rounding).
+        phase = np.add.accumulate(prepend(self.phase_integral, increments),
+                                  axis=-1)[..., 1:]
+
+        self.phase_integral = wrap_phase(last(phase))
+        self.last_time = float(times[-1])
+        self.older_freq = last(prepend(self.last_freq, inst_freq)[..., :-1])
+        self.last_freq = last(inst_freq)
+
+        return np.cos(phase)
+
 
 class PMModulator(Component):
     """Phase Modulation (PM).
@@ -70,6 +174,17 @@ class PMModulator(Component):
     Output: cos(2*pi*fc*t + kp * message(t))
     """
 
+    __slots__ = ('carrier_freq', 'phase_deviation')
+
+    kernel = """
+{phase} = 2 * pi * (({carrier_freq} * {time}) % 1.0)
+{phase} += {phase_deviation} * {input}
+{output} = cos({phase})
+"""
+    chunkable = True
+    batchable = True
+    parameters = ('carrier_freq', 'phase_deviation')
+
     def __init__(self,
                  input_wire: Wire,
                  output_wire: Wire,
@@ -79,9 +194,28 @@ class PMModulator(Component):
         self.carrier_freq = carrier_freq
         self.phase_deviation = phase_deviation
 
+        self.request_carriers(OscillatorBank())
+
+    def request_carriers(self, oscillators: OscillatorBank):
+        self.carriers = (oscillators.carrier(self.carrier_freq),)
+
     def tick(self, time: float):
         message = self.input_wire.read()
-        phase = 2 * math.pi * self.carrier_freq * time
+        phase = self.carriers[0].angle(time)
         phase += self.phase_deviation * message
 
         self.output_wire.write(math.cos(phase), time)
+
+    def max_frequency(self, bandwidth: float, peak: float = 1.0) -> float:
+        # Carson's rule, with a peak frequency deviation of kp * peak times
+        # the message bandwidth
+        deviation = float(np.max(np.abs(self.phase_deviation))) * peak
+        return float(np.max(self.carrier_freq)) \
+            + (deviation + 1.0) * bandwidth
+
+    def process_block(self, times: np.ndarray,
+                      inputs: np.ndarray) -> np.ndarray:
+        phase = self.carriers[0].angles(times) \
+            + self.phase_deviation * inputs
+
+        return np.cos(phase)
@@ -8,6 +8,12 @@ class DeltaModulationDecoder(Component):
     1 = step up, 0 = step down.
     """
 
+    __slots__ = ('sample_period', 'step_size', 'reconstructed',
+                 'last_sample_index')
+
+    chunkable = True
+    scan_state = ('reconstructed',)
+
     def __init__(self,
                  input_wire: Wire,
                  output_wire: Wire,
@@ -46,6 +52,10 @@ class PCMDecoder(Component):
     analog value.
     """
 
+    __slots__ = ('sample_period', 'n_bits', 'v_min', 'v_max', 'bit_period',
+                 'n_levels', 'accumulated_code', 'bits_received',
+                 'last_bit_index', 'output_value')
+
     def __init__(self,
                  input_wire: Wire,
                  output_wire: Wire,
@@ -1,5 +1,7 @@
 from src.core.components import Component, Wire
 
+import math
+
 
 class DeltaModulationEncoder(Component):
     """Delta Modulation Encoder.
@@ -8,6 +10,9 @@ class DeltaModulationEncoder(Component):
     1 = signal increased, 0 = signal decreased.
     """
 
+    __slots__ = ('sample_period', 'step_size', 'approximation',
+                 'last_sample_index', 'current_bit')
+
     def __init__(self,
                  input_wire: Wire,
                  output_wire: Wire,
@@ -49,6 +54,11 @@ class PCMEncoder(Component):
     representation bit-by-bit.
     """
 
+    __slots__ = ('sample_period', 'n_bits', 'v_min', 'v_max', 'bit_period',
+                 'n_levels', 'current_code', 'last_sample_index')
+
+    chunkable = True
+
     def __init__(self,
                  input_wire: Wire,
                  output_wire: Wire,
@@ -71,6 +81,9 @@ class PCMEncoder(Component):
         self.current_code = 0
         self.last_sample_index = -1
 
+    def settling(self, dt: float) -> int:
+        return math.ceil(self.sample_period / dt)
+
     def tick(self, time: float):
         sample_index = int(time / self.sample_period)
 
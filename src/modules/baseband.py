@@ -0,0 +1,298 @@
+from src.core.batch import last, prepend
+from src.core.components import Component, Wire
+from src.core.integration import integration_weights, step_areas, \
+    wrap_phase
+
+from typing import Optional
+import cmath
+import math
+
+import numpy as np
+
+
+def _check_envelope(wire: Wire):
+    if wire.dtype is not complex:
+        raise ValueError(f"Wire '{wire.name}' must be complex to carry a "
+                         "complex envelope")
+
+
+class AMBasebandModulator(Component):
+    """Amplitude Modulation (AM), complex-baseband equivalent.
+
+    Outputs the complex envelope of `AMModulator`'s signal:
+    1 + m * message(t). The carrier is left out, so the time-step only needs
+    to resolve the message; `carrier_freq` is kept on the output wire for
+    display.
+    """
+
+    __slots__ = ('modulation_index',)
+
+    chunkable = True
+    batchable = True
+    parameters = ('modulation_index',)
+
+    def __init__(self,
+                 input_wire: Wire,
+                 output_wire: Wire,
+                 carrier_freq: Optional[float] = None,
+                 modulation_index: float = 0.5):
+        _check_envelope(output_wire)
+        super().__init__(input_wire, output_wire)
+        self.modulation_index = modulation_index
+
+        output_wire.carrier_freq = carrier_freq
+
+    def tick(self, time: float):
+        message = self.input_wire.read()
+        self.output_wire.write(complex(1.0 + self.modulation_index * message),
+                               time)
+
+    def process_block(self, times: np.ndarray,
+                      inputs: np.ndarray) -> np.ndarray:
+        return (1.0 + self.modulation_index * inputs).astype(complex)
+
+
+class FMBasebandModulator(Component):
+    """Frequency Modulation (FM), complex-baseband equivalent.
+
+    Outputs exp(j * phase), where the phase integrates 2*pi*kf*message(t)
+    (with `integration`, as in `FMModulator`): the complex envelope of
+    `FMModulator`'s signal.
+    """
+
+    __slots__ = ('freq_deviation', 'weights', 'phase_integral', 'last_time',
+                 'last_freq', 'older_freq')
+
+    chunkable = True
+    scan_state = ('phase_integral',)
+    batchable = True
+    parameters = ('freq_deviation',)
+
+    def __init__(self,
+                 input_wire: Wire,
+                 output_wire: Wire,
+                 carrier_freq: Optional[float] = None,
+                 freq_deviation: float = 10.0,
+                 integration: str = 'rectangle'):
+        _check_envelope(output_wire)
+        super().__init__(input_wire, output_wire)
+        self.freq_deviation = freq_deviation
+        self.weights = integration_weights(integration)
+
+        output_wire.carrier_freq = carrier_freq
+
+        self.reset()
+
+    def reset(self):
+        self.phase_integral = 0.0
+        self.last_time = 0.0
+
+        # Frequency deviations of the two previous ticks
+        self.last_freq = 0.0
+        self.older_freq = 0.0
+
+    def settling(self, dt: float) -> int:
+        # Instantaneous frequencies of the two previous ticks
+        return 2
+
+    def tick(self, time: float):
+        message = self.input_wire.read()
+        dt = time - self.last_time
+
+        inst_freq = self.freq_deviation * message
+        if dt > 0:
+            weights = self.weights
+            area = (weights[0] * inst_freq + weights[1] * self.last_freq
+                    + weights[2] * self.older_freq)
+            self.phase_integral = wrap_phase(
+                self.phase_integral + 2 * math.pi * area * dt)
+
+        self.older_freq = self.last_freq
+        self.last_freq = inst_freq
+
+        self.output_wire.write(cmath.exp(1j * self.phase_integral), time)
+        self.last_time = time
+
+    def max_frequency(self, bandwidth: float, peak: float = 1.0) -> float:
+        # Carson's rule, around 0 Hz instead of the carrier
+        return float(np.max(np.abs(self.freq_deviation))) * peak + bandwidth
+
+    def process_block(self, times: np.ndarray,
+                      inputs: np.ndarray) -> np.ndarray:
+        dt = np.diff(times, prepend=self.last_time)
+
+        inst_freq = self.freq_deviation * inputs
+        areas = step_areas(self.weights, inst_freq, self.last_freq,
+                           self.older_freq)
+        increments = np.where(dt > 0, 2 * np.pi * areas * dt, 0.0)
+        phase = np.add.accumulate(prepend(self.phase_integral, increments),
+                                  axis=-1)[..., 1:]
+
+        self.phase_integral = wrap_phase(last(phase))
+        self.last_time = float(times[-1])
+        self.older_freq = last(prepend(self.last_freq, inst_freq)[..., :-1])
+        self.last_freq = last(inst_freq)
+
+        return np.exp(1j * phase)
+
+
+class PMBasebandModulator(Component):
+    """Phase Modulation (PM), complex-baseband equivalent.
+
+    Outputs exp(j * kp * message(t)): the complex envelope of
+    `PMModulator`'s signal.
+    """
+
+    __slots__ = ('phase_deviation',)
+
+    chunkable = True
+    batchable = True
+    parameters = ('phase_deviation',)
+
+    def __init__(self,
+                 input_wire: Wire,
+                 output_wire: Wire,
+                 carrier_freq: Optional[float] = None,
+                 phase_deviation: float = math.pi / 2):
+        _check_envelope(output_wire)
+        super().__init__(input_wire, output_wire)
+        self.phase_deviation = phase_deviation
+
+        output_wire.carrier_freq = carrier_freq
+
+    def tick(self, time: float):
+        message = self.input_wire.read()
+        self.output_wire.write(cmath.exp(1j * self.phase_deviation * message),
+                               time)
+
+    def max_frequency(self, bandwidth: float, peak: float = 1.0) -> float:
+        deviation = float(np.max(np.abs(self.phase_deviation))) * peak
+        return (deviation + 1.0) * bandwidth
+
+    def process_block(self, times: np.ndarray,
+                      inputs: np.ndarray) -> np.ndarray:
+        return np.exp(1j * self.phase_deviation * inputs)
+
+
+class AMBasebandDemodulator(Component):
+    """AM Demodulator working on the complex envelope: the envelope is its
+    magnitude, so no detector filter is needed."""
+
+    __slots__ = ('modulation_index',)
+
+    chunkable = True
+    batchable = True
+    parameters = ('modulation_index',)
+
+    def __init__(self,
+                 input_wire: Wire,
+                 output_wire: Wire,
+                 modulation_index: float = 0.5):
+        _check_envelope(input_wire)
+        super().__init__(input_wire, output_wire)
+        self.modulation_index = modulation_index
+
+    def tick(self, time: float):
+        envelope = abs(self.input_wire.read())
+        self.output_wire.write((envelope - 1.0) / self.modulation_index, time)
+
+    def process_block(self, times: np.ndarray,
+                      inputs: np.ndarray) -> np.ndarray:
+        return (np.abs(inputs) - 1.0) / self.modulation_index
+
+
+class FMBasebandDemodulator(Component):
+    """FM Demodulator working on the complex envelope: a frequency
+    discriminator measuring the phase advance between consecutive
+    samples."""
+
+    __slots__ = ('freq_deviation', 'prev_value', 'prev_time', 'last_output')
+
+    chunkable = True
+    batchable = True
+    parameters = ('freq_deviation',)
+
+    def __init__(self,
+                 input_wire: Wire,
+                 output_wire: Wire,
+                 freq_deviation: float = 5.0):
+        _check_envelope(input_wire)
+        super().__init__(input_wire, output_wire)
+        self.freq_deviation = freq_deviation
+
+        self.reset()
+
+    def reset(self):
+        self.prev_value = 1.0 + 0.0j
+        self.prev_time = 0.0
+        self.last_output = 0.0
+
+    def settling(self, dt: float) -> int:
+        return 1
+
+    def tick(self, time: float):
+        current = self.input_wire.read()
+        dt = time - self.prev_time
+
+        if dt > 0:
+            advance = cmath.phase(current * self.prev_value.conjugate())
+            self.last_output = \
+                advance / (2 * math.pi * dt) / self.freq_deviation
+
+        self.prev_value = current
+        self.prev_time = time
+        self.output_wire.write(self.last_output, time)
+
+    def process_block(self, times: np.ndarray,
+                      inputs: np.ndarray) -> np.ndarray:
+        previous = prepend(self.prev_value, inputs[..., :-1])
+        dt = np.diff(times, prepend=self.prev_time)
+
+        advance = np.angle(inputs * np.conj(previous))
+        valid = dt > 0
+
+        # Hold the last estimate over ticks that do not advance the clock
+        estimates = prepend(self.last_output, advance / (
+            2 * np.pi * np.where(valid, dt, 1.0)) / self.freq_deviation)
+        marks = np.where(valid, np.arange(1, len(times) + 1), 0)
+        outputs = estimates[..., np.maximum.accumulate(marks)]
+
+        self.prev_value = last(inputs)
+        self.prev_time = float(times[-1])
+        self.last_output = last(outputs)
+
+        return outputs
+
+
+class PMBasebandDemodulator(Component):
+    """PM Demodulator working on the complex envelope: the phase is its
+    argument."""
+
+    __slots__ = ('phase_deviation',)
+
+    chunkable = True
+    batchable = True
+    parameters = ('phase_deviation',)
+
+    def __init__(self,
+                 input_wire: Wire,
+                 output_wire: Wire,
+                 phase_deviation: float = math.pi / 2):
+        _check_envelope(input_wire)
+        super().__init__(input_wire, output_wire)
+        self.phase_deviation = phase_deviation
+
+    def tick(self, time: float):
+        phase = cmath.phase(self.input_wire.read())
+        self.output_wire.write(phase / self.phase_deviation, time)
+
+    def process_block(self, times: np.ndarray,
+                      inputs: np.ndarray) -> np.ndarray:
+        return np.angle(inputs) / self.phase_deviation
+
+
+def upconvert(envelope: np.ndarray, times: np.ndarray,
+              carrier_freq: float) -> np.ndarray:
+    """Passband signal Re(envelope * exp(j*2*pi*fc*t)) at `times`, for
+    display."""
+    return np.real(envelope * np.exp(2j * np.pi * carrier_freq * times))
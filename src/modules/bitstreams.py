@@ -0,0 +1,117 @@
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+# Generator polynomials x^n + x^m + 1 of the standard pseudo-random binary
+# sequences (ITU-T O.150), as (n, m) by sequence order
+PRBS_TAPS: Dict[int, Tuple[int, int]] = {
+    7: (7, 6),
+    15: (15, 14),
+    23: (23, 18),
+    31: (31, 28)
+}
+
+
+class PackedBits:
+    """A sequence of `n_bits` bits stored eight per byte, most significant
+    bit first (the layout of `np.packbits`).
+
+    `packed` may be any `uint8` array, including a memory map of a file
+    (see `from_file`), so payloads far larger than memory work too.
+    """
+
+    def __init__(self, packed: np.ndarray, n_bits: Optional[int] = None):
+        if n_bits is None:
+            n_bits = 8 * len(packed)
+        if not 0 < n_bits <= 8 * len(packed):
+            raise ValueError(f"{len(packed)} bytes cannot hold {n_bits} bits")
+
+        self.packed = packed
+        self.n_bits = n_bits
+
+    @classmethod
+    def from_bits(cls, bits: np.ndarray) -> 'PackedBits':
+        """Packs an array of 0/1 values."""
+        bits = np.asarray(bits)
+        return cls(np.packbits(bits.astype(bool)), len(bits))
+
+    @classmethod
+    def from_string(cls, bitstream: str) -> 'PackedBits':
+        """Packs a string of ones and zeros (any other character counts as
+        a zero)."""
+        characters = np.frombuffer(bitstream.encode(), dtype=np.uint8)
+        return cls.from_bits(characters == ord('1'))
+
+    @classmethod
+    def from_file(cls, path: str, n_bits: Optional[int] = None) \
+            -> 'PackedBits':
+        """Payload read from the raw bytes of the file at `path` (all of
+        them unless `n_bits` is given). The file is memory-mapped, so only
+        the parts a simulation reaches are ever loaded."""
+        return cls(np.memmap(path, dtype=np.uint8, mode='r'), n_bits)
+
+    def __len__(self) -> int:
+        return self.n_bits
+
+    def bits(self, indices: np.ndarray) -> np.ndarray:
+        """Values (0 or 1) of the bits at `indices`."""
+        return (self.packed[indices >> 3] >> (7 - (indices & 7))) & 1
+
+    def unpack(self) -> np.ndarray:
+        """All the bits, one per byte."""
+        return np.unpackbits(self.packed, count=self.n_bits)
+
+
+def prbs(order: int, n_bits: Optional[int] = None,
+         seed: Optional[int] = None) -> PackedBits:
+    """Pseudo-random binary sequence PRBS`order` (one of `PRBS_TAPS`), as
+    produced by a linear-feedback shift register over its generator
+    polynomial x^n + x^m + 1.
+
+    Returns `n_bits` bits (one full period, 2^order - 1 bits, by default),
+    starting from the register state `seed` (all ones by default).
+
+    Rather than clocking the register bit by bit, the sequence is extended
+    in slices with the recurrence b[k] = b[k - n] ^ b[k - m], which only
+    reaches `m` bits back. Squaring the polynomial over GF(2) gives
+    x^2n + x^2m + 1, so b[k] = b[k - 2n] ^ b[k - 2m] holds too; once enough
+    bits exist, the taps are doubled and the slices with them, so a
+    sequence of N bits takes O(log N) vectorized steps.
+    """
+    if order not in PRBS_TAPS:
+        raise ValueError(f"Unsupported PRBS order: {order} "
+                         f"(expected one of {sorted(PRBS_TAPS)})")
+
+    n, m = PRBS_TAPS[order]
+    if n_bits is None:
+        n_bits = 2 ** n - 1
+    if seed is None:
+        seed = 2 ** n - 1
+    if not 0 < seed < 2 ** n:
+        raise ValueError(f"PRBS{order} seed must be a non-zero {n}-bit "
+                         "register state")
+
+    bits = np.empty(max(n_bits, n), dtype=np.uint8)
+    bits[:n] = [(seed >> (n - 1 - position)) & 1 for position in range(n)]
+
+    length, scale = n, 1
+    while length < len(bits):
+        while length >= 2 * scale * n:
+            scale *= 2
+
+        far, near = scale * n, scale * m
+        count = min(near, len(bits) - length)
+        np.bitwise_xor(bits[length - far:length - far + count],
+                       bits[length - near:length - near + count],
+                       out=bits[length:length + count])
+        length += count
+
+    return PackedBits.from_bits(bits[:n_bits])
+
+
+def random_bits(n_bits: int, seed: Optional[int] = None) -> PackedBits:
+    """`n_bits` uniformly random bits. Equal `seed`s give equal payloads."""
+    rng = np.random.default_rng(seed)
+    return PackedBits(rng.integers(0, 256, -(-n_bits // 8), dtype=np.uint8),
+                      n_bits)
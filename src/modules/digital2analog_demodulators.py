@@ -1,4 +1,5 @@
 from src.core.components import Component, Wire
+from src.core.oscillators import OscillatorBank
 
 import math
 
@@ -6,6 +7,11 @@ import math
 class ASKDemodulator(Component):
     """ASK Demodulator using envelope detection."""
 
+    __slots__ = ('bit_duration', 'accumulator', 'sample_count',
+                 'last_bit_index', 'decoded_bit')
+
+    chunkable = True
+
     def __init__(self,
                  input_wire: Wire,
                  output_wire: Wire,
@@ -22,6 +28,10 @@ class ASKDemodulator(Component):
         self.last_bit_index = -1
         self.decoded_bit = 0.0
 
+    def settling(self, dt: float) -> int:
+        # Decisions depend on no more than the last two bits
+        return 2 * math.ceil(self.bit_duration / dt)
+
     def tick(self, time: float):
         bit_index = int(time / self.bit_duration)
 
@@ -43,6 +53,11 @@ class ASKDemodulator(Component):
 class FSKDemodulator(Component):
     """FSK Demodulator using zero-crossing detection."""
 
+    __slots__ = ('freq_0', 'freq_1', 'bit_duration', 'threshold', 'last_value',
+                 'zero_crossings', 'last_bit_index', 'decoded_bit')
+
+    chunkable = True
+
     def __init__(self,
                  input_wire: Wire,
                  output_wire: Wire,
@@ -63,6 +78,10 @@ class FSKDemodulator(Component):
         self.last_bit_index = -1
         self.decoded_bit = 0.0
 
+    def settling(self, dt: float) -> int:
+        # Decisions depend on no more than the last two bits
+        return 2 * math.ceil(self.bit_duration / dt)
+
     def tick(self, time: float):
         bit_index = int(time / self.bit_duration)
         current = self.input_wire.read()
@@ -85,6 +104,11 @@ class FSKDemodulator(Component):
 class PSKDemodulator(Component):
     """PSK Demodulator using coherent detection."""
 
+    __slots__ = ('carrier_freq', 'bit_duration', 'accumulator', 'sample_count',
+                 'last_bit_index', 'decoded_bit')
+
+    chunkable = True
+
     def __init__(self,
                  input_wire: Wire,
                  output_wire: Wire,
@@ -94,14 +118,22 @@ class PSKDemodulator(Component):
         self.carrier_freq = carrier_freq
         self.bit_duration = 1.0 / baud_rate
 
+        self.request_carriers(OscillatorBank())
         self.reset()
 
+    def request_carriers(self, oscillators: OscillatorBank):
+        self.carriers = (oscillators.carrier(self.carrier_freq),)
+
     def reset(self):
         self.accumulator = 0.0
         self.sample_count = 0
         self.last_bit_index = -1
         self.decoded_bit = 0.0
 
+    def settling(self, dt: float) -> int:
+        # Decisions depend on no more than the last two bits
+        return 2 * math.ceil(self.bit_duration / dt)
+
     def tick(self, time: float):
         bit_index = int(time / self.bit_duration)
 
@@ -114,7 +146,7 @@ class PSKDemodulator(Component):
             self.sample_count = 0
             self.last_bit_index = bit_index
 
-        ref = math.sin(2 * math.pi * self.carrier_freq * time)
+        ref = self.carriers[0].sin(time)
         self.accumulator += self.input_wire.read() * ref
         self.sample_count += 1
 
@@ -1,6 +1,5 @@
 from src.core.components import Component, Wire
-
-import math
+from src.core.oscillators import OscillatorBank
 
 
 class ASKModulator(Component):
@@ -10,6 +9,10 @@ class ASKModulator(Component):
     Binary 0 = carrier at zero (or low) amplitude
     """
 
+    __slots__ = ('carrier_freq', 'bit_duration')
+
+    chunkable = True
+
     def __init__(self,
                  input_wire: Wire,
                  output_wire: Wire,
@@ -19,11 +22,16 @@ class ASKModulator(Component):
         self.carrier_freq = carrier_freq
         self.bit_duration = 1.0 / baud_rate
 
+        self.request_carriers(OscillatorBank())
+
+    def request_carriers(self, oscillators: OscillatorBank):
+        self.carriers = (oscillators.carrier(self.carrier_freq),)
+
     def tick(self, time: float):
         bit = self.input_wire.read()
         amplitude = 1.0 if bit > 0.5 else 0.0
 
-        carrier = math.sin(2 * math.pi * self.carrier_freq * time)
+        carrier = self.carriers[0].sin(time)
         self.output_wire.write(amplitude * carrier, time)
 
 
@@ -34,6 +42,10 @@ class FSKModulator(Component):
     Binary 0 = carrier at frequency f0
     """
 
+    __slots__ = ('freq_0', 'freq_1', 'bit_duration')
+
+    chunkable = True
+
     def __init__(self,
                  input_wire: Wire,
                  output_wire: Wire,
@@ -45,11 +57,17 @@ class FSKModulator(Component):
         self.freq_1 = freq_1
         self.bit_duration = 1.0 / baud_rate
 
+        self.request_carriers(OscillatorBank())
+
+    def request_carriers(self, oscillators: OscillatorBank):
+        self.carriers = (oscillators.carrier(self.freq_0),
+                         oscillators.carrier(self.freq_1))
+
     def tick(self, time: float):
         bit = self.input_wire.read()
-        freq = self.freq_1 if bit > 0.5 else self.freq_0
+        carrier = self.carriers[1] if bit > 0.5 else self.carriers[0]
 
-        signal = math.sin(2 * math.pi * freq * time)
+        signal = carrier.sin(time)
         self.output_wire.write(signal, time)
 
 
@@ -60,6 +78,10 @@ class PSKModulator(Component):
     Binary 0 = carrier with 180 degree phase shift
     """
 
+    __slots__ = ('carrier_freq', 'bit_duration')
+
+    chunkable = True
+
     def __init__(self,
                  input_wire: Wire,
                  output_wire: Wire,
@@ -69,9 +91,15 @@ class PSKModulator(Component):
         self.carrier_freq = carrier_freq
         self.bit_duration = 1.0 / baud_rate
 
+        self.request_carriers(OscillatorBank())
+
+    def request_carriers(self, oscillators: OscillatorBank):
+        self.carriers = (oscillators.carrier(self.carrier_freq),)
+
     def tick(self, time: float):
         bit = self.input_wire.read()
-        phase = 0.0 if bit > 0.5 else math.pi
 
-        signal = math.sin(2 * math.pi * self.carrier_freq * time + phase)
+        # A 180 degree phase shift negates the carrier
+        carrier = self.carriers[0].sin(time)
+        signal = carrier if bit > 0.5 else -carrier
         self.output_wire.write(signal, time)
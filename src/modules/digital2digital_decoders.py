@@ -1,12 +1,31 @@
 from src.core.components import Component, Wire
 
+import math
+
+import numpy as np
+
 
 class NRZLDecoder(Component):
+
+    __slots__ = ('bit_duration', 'last_decoded_bit')
+    pure = True
+    chunkable = True
+
     def __init__(self, input_wire: Wire, output_wire: Wire, baud_rate: float):
         super().__init__(input_wire, output_wire)
         self.bit_duration = 1.0 / baud_rate
         self.last_decoded_bit = 0.0
 
+    def clock(self, times):
+        # Whether in the sampling window
+        cycle_pos = times % self.bit_duration
+        return (cycle_pos >= (self.bit_duration * 0.5)) & \
+            (cycle_pos < (self.bit_duration * 0.6))
+
+    def settling(self, dt: float) -> int:
+        # Decisions depend on no more than the last two bits
+        return 2 * math.ceil(self.bit_duration / dt)
+
     def tick(self, time: float):
         # Sample in the middle of the bit period for stability
         cycle_pos = time % self.bit_duration
@@ -24,6 +43,12 @@ class NRZLDecoder(Component):
 
 
 class NRZIDecoder(Component):
+
+    __slots__ = ('bit_duration', 'previous_level', 'last_decoded_bit',
+                 'current_bit_index')
+    pure = True
+    chunkable = True
+
     def __init__(self, input_wire: Wire, output_wire: Wire, baud_rate: float):
         super().__init__(input_wire, output_wire)
         self.bit_duration = 1.0 / baud_rate
@@ -32,6 +57,15 @@ class NRZIDecoder(Component):
         self.last_decoded_bit = 0.0
         self.current_bit_index = -1
 
+    def clock(self, times):
+        # Bit index, and whether it passed the sampling point
+        return np.floor(times / self.bit_duration) * 2 + \
+            (times % self.bit_duration >= (self.bit_duration * 0.5))
+
+    def settling(self, dt: float) -> int:
+        # Decisions depend on no more than the last two bits
+        return 2 * math.ceil(self.bit_duration / dt)
+
     def tick(self, time: float):
         bit_index = int(time / self.bit_duration)
         cycle_pos = time % self.bit_duration
@@ -56,11 +90,26 @@ class NRZIDecoder(Component):
 
 
 class BipolarAMIDecoder(Component):
+
+    __slots__ = ('bit_duration', 'last_decoded_bit')
+    pure = True
+    chunkable = True
+
     def __init__(self, input_wire: Wire, output_wire: Wire, baud_rate: float):
         super().__init__(input_wire, output_wire)
         self.bit_duration = 1.0 / baud_rate
         self.last_decoded_bit = 0.0
 
+    def clock(self, times):
+        # Whether in the sampling window
+        cycle_pos = times % self.bit_duration
+        return (cycle_pos >= (self.bit_duration * 0.5)) & \
+            (cycle_pos < (self.bit_duration * 0.6))
+
+    def settling(self, dt: float) -> int:
+        # Decisions depend on no more than the last two bits
+        return 2 * math.ceil(self.bit_duration / dt)
+
     def tick(self, time: float):
         cycle_pos = time % self.bit_duration
 
@@ -79,11 +128,26 @@ class BipolarAMIDecoder(Component):
 
 
 class PseudoternaryDecoder(Component):
+
+    __slots__ = ('bit_duration', 'last_decoded_bit')
+    pure = True
+    chunkable = True
+
     def __init__(self, input_wire: Wire, output_wire: Wire, baud_rate: float):
         super().__init__(input_wire, output_wire)
         self.bit_duration = 1.0 / baud_rate
         self.last_decoded_bit = 0.0
 
+    def clock(self, times):
+        # Whether in the sampling window
+        cycle_pos = times % self.bit_duration
+        return (cycle_pos >= (self.bit_duration * 0.5)) & \
+            (cycle_pos < (self.bit_duration * 0.6))
+
+    def settling(self, dt: float) -> int:
+        # Decisions depend on no more than the last two bits
+        return 2 * math.ceil(self.bit_duration / dt)
+
     def tick(self, time: float):
         cycle_pos = time % self.bit_duration
 
@@ -101,6 +165,12 @@ class PseudoternaryDecoder(Component):
 
 
 class ManchesterDecoder(Component):
+
+    __slots__ = ('bit_duration', 'last_decoded_bit', 'sample_1',
+                 'current_bit_index', 'sampled_first_half')
+    pure = True
+    chunkable = True
+
     def __init__(self, input_wire: Wire, output_wire: Wire, baud_rate: float):
         super().__init__(input_wire, output_wire)
         self.bit_duration = 1.0 / baud_rate
@@ -110,6 +180,18 @@ class ManchesterDecoder(Component):
         self.current_bit_index = -1
         self.sampled_first_half = False
 
+    def clock(self, times):
+        # Bit index, and how many of the sampling points it passed
+        cycle_pos = times % self.bit_duration
+        return np.floor(times / self.bit_duration) * 4 + \
+            (cycle_pos >= (self.bit_duration * 0.25)) + \
+            (cycle_pos >= (self.bit_duration * 0.75)) + \
+            (cycle_pos >= (self.bit_duration * 0.85))
+
+    def settling(self, dt: float) -> int:
+        # Decisions depend on no more than the last two bits
+        return 2 * math.ceil(self.bit_duration / dt)
+
     def tick(self, time: float):
         bit_index = int(time / self.bit_duration)
         cycle_pos = time % self.bit_duration
@@ -139,6 +221,12 @@ class ManchesterDecoder(Component):
 
 
 class DifferentialManchesterDecoder(Component):
+
+    __slots__ = ('bit_duration', 'last_decoded_bit', 'prev_second_half',
+                 'current_bit_index')
+    pure = True
+    chunkable = True
+
     def __init__(self, input_wire: Wire, output_wire: Wire, baud_rate: float):
         super().__init__(input_wire, output_wire)
         self.bit_duration = 1.0 / baud_rate
@@ -148,6 +236,18 @@ class DifferentialManchesterDecoder(Component):
         self.prev_second_half = -1.0
         self.current_bit_index = -1
 
+    def clock(self, times):
+        # Bit index, and how many of the sampling points it passed
+        cycle_pos = times % self.bit_duration
+        return np.floor(times / self.bit_duration) * 4 + \
+            (cycle_pos >= (self.bit_duration * 0.25)) + \
+            (cycle_pos >= (self.bit_duration * 0.75)) + \
+            (cycle_pos >= (self.bit_duration * 0.85))
+
+    def settling(self, dt: float) -> int:
+        # Decisions depend on no more than the last two bits
+        return 2 * math.ceil(self.bit_duration / dt)
+
     def tick(self, time: float):
         bit_index = int(time / self.bit_duration)
         cycle_pos = time % self.bit_duration
@@ -1,5 +1,7 @@
 from src.core.components import Component, Wire
 
+import numpy as np
+
 
 class NRZLEncoder(Component):
     """Non-Return-to-Zero Level (NRZ-L).
@@ -10,6 +12,11 @@ class NRZLEncoder(Component):
     interface.
     """
 
+    __slots__ = ('high', 'low')
+
+    pure = True
+    chunkable = True
+
     def __init__(self, input_wire: Wire, output_wire: Wire,
                  baud_rate: float = 0.0,
                  high_level: float = 1.0, low_level: float = -1.0):
@@ -34,6 +41,11 @@ class NRZIEncoder(Component):
     1 = transition at beginning of interval (flip level)
     """
 
+    __slots__ = ('bit_duration', 'high', 'low', 'current_level',
+                 'last_bit_index')
+
+    pure = True
+
     def __init__(self, input_wire: Wire, output_wire: Wire,
                  baud_rate: float, high_level: float = 1.0,
                  low_level: float = -1.0):
@@ -48,6 +60,10 @@ class NRZIEncoder(Component):
         self.current_level = self.low
         self.last_bit_index = -1
 
+    def clock(self, times):
+        # Bit index
+        return np.floor(times / self.bit_duration)
+
     def tick(self, time: float):
         # Calculate which bit number we are currently processing
         current_bit_index = int(time / self.bit_duration)
@@ -80,11 +96,20 @@ class ManchesterEncoder(Component):
     Requires 'baud_rate' to calculate the bit period.
     """
 
+    __slots__ = ('bit_duration',)
+
+    pure = True
+    chunkable = True
+
     def __init__(self, input_wire: Wire, output_wire: Wire,
                  baud_rate: float):
         super().__init__(input_wire, output_wire)
         self.bit_duration = 1.0 / baud_rate
 
+    def clock(self, times):
+        # Whether in the first half of the bit
+        return times % self.bit_duration < (self.bit_duration / 2.0)
+
     def tick(self, time: float):
         inp = self.input_wire.read()
         is_logic_1 = inp > 0.5
@@ -107,6 +132,11 @@ class BipolarAMIEncoder(Component):
     1 = positive or negative level, alternating for successive ones
     """
 
+    __slots__ = ('bit_duration', 'last_polarity', 'current_voltage',
+                 'last_bit_index')
+
+    pure = True
+
     def __init__(self, input_wire: Wire, output_wire: Wire, baud_rate: float):
         super().__init__(input_wire, output_wire)
         self.bit_duration = 1.0 / baud_rate
@@ -120,6 +150,10 @@ class BipolarAMIEncoder(Component):
         self.current_voltage = 0.0
         self.last_bit_index = -1
 
+    def clock(self, times):
+        # Bit index
+        return np.floor(times / self.bit_duration)
+
     def tick(self, time: float):
         current_bit_index = int(time / self.bit_duration)
 
@@ -147,6 +181,11 @@ class PseudoternaryEncoder(Component):
     1 = no line signal
     """
 
+    __slots__ = ('bit_duration', 'last_polarity', 'current_voltage',
+                 'last_bit_index')
+
+    pure = True
+
     def __init__(self, input_wire: Wire, output_wire: Wire, baud_rate: float):
         super().__init__(input_wire, output_wire)
         self.bit_duration = 1.0 / baud_rate
@@ -158,6 +197,10 @@ class PseudoternaryEncoder(Component):
         self.current_voltage = 0.0
         self.last_bit_index = -1
 
+    def clock(self, times):
+        # Bit index
+        return np.floor(times / self.bit_duration)
+
     def tick(self, time: float):
         current_bit_index = int(time / self.bit_duration)
 
@@ -186,6 +229,11 @@ class DifferentialManchesterEncoder(Component):
     1 = no transition at beginning of interval
     """
 
+    __slots__ = ('bit_duration', 'previous_end_level', 'current_start_level',
+                 'last_bit_index')
+
+    pure = True
+
     def __init__(self, input_wire: Wire, output_wire: Wire, baud_rate: float):
         super().__init__(input_wire, output_wire)
         self.bit_duration = 1.0 / baud_rate
@@ -197,6 +245,11 @@ class DifferentialManchesterEncoder(Component):
         self.current_start_level = -1.0
         self.last_bit_index = -1
 
+    def clock(self, times):
+        # Half-bit index
+        return np.floor(times / self.bit_duration) * 2 + \
+            (times % self.bit_duration >= (self.bit_duration / 2.0))
+
     def tick(self, time: float):
         current_bit_index = int(time / self.bit_duration)
 
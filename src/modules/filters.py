@@ -0,0 +1,544 @@
+from src.core.batch import prepend
+from src.core.components import Component, Wire
+from src.core.lti import fft_size, overlap_save
+
+from typing import List, Optional, Tuple, Union
+import math
+
+import numpy as np
+
+
+# Longest FIR filter `FIR` applies directly in `process` (one pass over the
+# block per tap) before switching to the FFT (see `overlap_save`)
+DIRECT_FIR_TAPS = 16
+
+# Samples per chunk `BiquadCascade.process` solves at once
+IIR_CHUNK = 128
+
+# Fraction of its starting state a filter is considered settled at (see
+# `BiquadCascade.settling`)
+SETTLING_TOLERANCE = 1e-13
+
+FILTER_KINDS = ('lowpass', 'highpass', 'bandpass')
+
+
+def _check_cutoff(cutoff: float):
+    if not 0.0 < cutoff < 0.5:
+        raise ValueError(f"Cutoff must lie strictly between 0 and 0.5 "
+                         f"(Nyquist), got {cutoff}")
+
+
+def fir_lowpass(n_taps: int, cutoff: float, gain: float = 1.0) -> np.ndarray:
+    """Hamming-windowed sinc low-pass filter.
+
+    `cutoff` is relative to the sample rate the filter runs at (0.5 is
+    Nyquist, which passes everything) and `gain` is the DC gain.
+    """
+    if not 0.0 < cutoff <= 0.5:
+        raise ValueError(f"Cutoff must lie between 0 and 0.5 (Nyquist), "
+                         f"got {cutoff}")
+
+    n = np.arange(n_taps) - (n_taps - 1) / 2.0
+    taps = np.sinc(2 * cutoff * n) * np.hamming(n_taps)
+
+    return gain * taps / taps.sum()
+
+
+def fir_highpass(n_taps: int, cutoff: float) -> np.ndarray:
+    """Windowed-sinc high-pass filter with unit gain at Nyquist: the
+    complement of `fir_lowpass`, so `n_taps` must be odd."""
+    if n_taps % 2 == 0:
+        raise ValueError("A high-pass FIR filter needs an odd number of taps")
+
+    taps = -fir_lowpass(n_taps, cutoff)
+    taps[n_taps // 2] += 1.0
+
+    return taps
+
+
+def fir_bandpass(n_taps: int, low: float, high: float) -> np.ndarray:
+    """Windowed-sinc band-pass filter between the cutoffs `low` and `high`,
+    with unit gain at the centre of the band."""
+    if not low < high:
+        raise ValueError("Band-pass cutoffs must satisfy low < high")
+
+    taps = fir_lowpass(n_taps, high) - fir_lowpass(n_taps, low)
+
+    return taps / abs(_fir_response(taps, (low + high) / 2))
+
+
+def _fir_response(taps: np.ndarray, frequency: float) -> complex:
+    return complex(taps @ np.exp(-2j * np.pi * frequency
+                                 * np.arange(len(taps))))
+
+
+def one_pole(alpha: float) -> np.ndarray:
+    """Second-order sections of the exponential moving average
+    `y[k] = alpha * x[k] + (1 - alpha) * y[k - 1]`."""
+    return np.array([[alpha, 0.0, 0.0, 1.0, alpha - 1.0, 0.0]])
+
+
+def butterworth(order: int,
+                cutoff: Union[float, Tuple[float, float]],
+                kind: str = 'lowpass') -> np.ndarray:
+    """Butterworth filter of `order` as second-order sections (one row
+    (b0, b1, b2, 1, a1, a2) per biquad, as `BiquadCascade` takes them).
+
+    `kind` is one of `FILTER_KINDS`; a band-pass filter takes its two
+    cutoffs as `cutoff` and has twice `order` poles. Cutoffs are relative
+    to the sample rate (0.5 is Nyquist). The analog prototype is mapped with
+    the bilinear transform, prewarped so the cutoffs land exactly; every
+    section has unit gain in the pass band (at DC, at Nyquist or at the
+    centre of the band).
+    """
+    if kind not in FILTER_KINDS:
+        raise ValueError(f"Unknown filter kind: {kind} "
+                         f"(expected one of {', '.join(FILTER_KINDS)})")
+    if order < 1:
+        raise ValueError("Filter order must be at least 1")
+
+    # Butterworth poles for a cutoff of 1 rad/s, in the left half-plane
+    prototype = np.exp(1j * np.pi * (2 * np.arange(order) + order + 1)
+                       / (2 * order))
+
+    # Analog frequencies the bilinear transform maps onto the cutoffs
+    if kind == 'bandpass':
+        low, high = cutoff
+        _check_cutoff(low)
+        _check_cutoff(high)
+        if not low < high:
+            raise ValueError("Band-pass cutoffs must satisfy low < high")
+
+        warped_low, warped_high = math.tan(math.pi * low), \
+            math.tan(math.pi * high)
+        centre = math.sqrt(warped_low * warped_high)
+        width = warped_high - warped_low
+
+        # s -> (s^2 + centre^2) / (width * s) splits every pole in two
+        scaled = prototype * width / 2
+        root = np.sqrt(scaled ** 2 - centre ** 2)
+        poles = np.concatenate((scaled + root, scaled - root))
+        reference = math.atan(centre) / math.pi
+    else:
+        _check_cutoff(cutoff)
+        warped = math.tan(math.pi * cutoff)
+        if kind == 'lowpass':
+            poles, reference = warped * prototype, 0.0
+        else:
+            poles, reference = warped / prototype, 0.5
+
+    sections = []
+    for pair in _conjugate_pairs((1 + poles) / (1 - poles)):
+        if len(pair) == 1:
+            denominator = [1.0, -pair[0].real, 0.0]
+        else:
+            first, second = pair
+            denominator = [1.0, -(first + second).real,
+                           (first * second).real]
+
+        # Zeros at z = -1 (low-pass), z = 1 (high-pass) or one of each
+        if kind == 'bandpass':
+            numerator = [1.0, 0.0, -1.0]
+        elif len(pair) == 1:
+            numerator = [1.0, 1.0 if kind == 'lowpass' else -1.0, 0.0]
+        else:
+            numerator = [1.0, 2.0 if kind == 'lowpass' else -2.0, 1.0]
+
+        section = np.array(numerator + denominator)
+        section[:3] /= abs(_section_response(section, reference))
+        sections.append(section)
+
+    return np.array(sections)
+
+
+def _conjugate_pairs(poles: np.ndarray) -> List[Tuple[complex, ...]]:
+    """Groups poles into complex conjugate pairs, and real poles two at a
+    time (a lone one last)."""
+    tolerance = 1e-10
+    upper = [pole for pole in poles if pole.imag > tolerance]
+    real = sorted(complex(pole.real) for pole in poles
+                  if abs(pole.imag) <= tolerance)
+
+    pairs: List[Tuple[complex, ...]] = [(pole, pole.conjugate())
+                                        for pole in upper]
+    pairs += [tuple(real[start:start + 2])
+              for start in range(0, len(real), 2)]
+
+    return pairs
+
+
+def _section_response(section: np.ndarray, frequency: float) -> complex:
+    delays = np.exp(-2j * np.pi * frequency * np.arange(3))
+    return complex(section[:3] @ delays) / complex(section[3:] @ delays)
+
+
+class FIR:
+    """FIR filter `y[n] = sum(taps[k] * x[n - k])` keeping its most recent
+    inputs across calls, so a signal may be fed one sample at a time
+    (`step`) or in blocks (`process`) interchangeably.
+
+    Blocks are filtered directly for short filters and in the frequency
+    domain (see `overlap_save`) for long ones, unless `method` ('direct' or
+    'fft') says otherwise. Blocks may be batched (batch x time).
+    """
+
+    def __init__(self, taps: np.ndarray, method: str = 'auto'):
+        taps = np.asarray(taps, dtype=float)
+        if taps.ndim != 1 or len(taps) == 0:
+            raise ValueError("FIR taps must be a non-empty 1-D array")
+        if method not in ('auto', 'direct', 'fft'):
+            raise ValueError(f"Unknown FIR method: {method}")
+
+        self.taps = taps
+        self.method = method
+
+        # Spectrum of the taps at the FFT size last used
+        self.spectrum: Tuple[int, Optional[np.ndarray]] = (0, None)
+
+        self.reset()
+
+    def reset(self, level: float = 0.0):
+        """Clears the filter, or settles it as if its input had held
+        `level` forever."""
+        # Most recent input samples, newest first
+        self.buffer = np.full(len(self.taps), float(level))
+
+    def step(self, value: float) -> float:
+        """Filters one sample."""
+        buffer = self.buffer
+        buffer[1:] = buffer[:-1]
+        buffer[0] = value
+
+        return float(self.taps @ buffer)
+
+    def settling(self) -> int:
+        """Samples after which the output no longer depends on the state
+        the filter started from."""
+        return len(self.taps)
+
+    def kernel(self, path: str, value: str, output: str) -> str:
+        """Kernel template lines (see `Component.kernel`) filtering `value`
+        into `output`, for a component holding the filter at `path`."""
+        return f"{output} = {{{path}}}.step({value})\n"
+
+    def process(self, inputs: np.ndarray) -> np.ndarray:
+        """Filters a block of samples (along the last axis)."""
+        taps = self.taps
+        n_taps = len(taps)
+        samples = prepend(self.buffer[..., ::-1], inputs)
+
+        if self.method == 'fft' \
+                or (self.method == 'auto' and n_taps > DIRECT_FIR_TAPS):
+            size = fft_size(n_taps, inputs.shape[-1])
+            if self.spectrum[0] != size:
+                self.spectrum = (size, np.fft.rfft(taps, size))
+            outputs = overlap_save(taps, self.buffer, inputs,
+                                   self.spectrum[1])
+        else:
+            # One shifted view of the samples per tap
+            n_inputs = inputs.shape[-1]
+            outputs = np.zeros(samples.shape[:-1] + (n_inputs,))
+            for delay, tap in enumerate(taps.tolist()):
+                start = n_taps - delay
+                outputs += tap * samples[..., start:start + n_inputs]
+
+        self.buffer = samples[..., -n_taps:][..., ::-1].copy()
+
+        return outputs
+
+
+class BiquadCascade:
+    """IIR filter made of second-order sections in series, each run in
+    transposed direct form II. `sections` holds one row
+    (b0, b1, b2, a0, a1, a2) per section (see `butterworth`).
+
+    Like `FIR`, it keeps its state across calls to `step` and `process`.
+    Blocks are solved `IIR_CHUNK` samples at a time: the cascade is written
+    as a state-space system, whose output over a chunk is the zero-state
+    response (a product with a precomputed matrix of the impulse response)
+    plus the free response from the state at the start of the chunk. Only
+    the chunk-to-chunk state update runs sequentially. Blocks may be
+    batched (batch x time).
+
+    `sections` may also hold one cascade per row of a batch (batch x
+    sections x 6), such as one filter per point of a parameter sweep; such
+    a filter only runs in blocks.
+    """
+
+    def __init__(self, sections: np.ndarray):
+        sections = np.array(sections, dtype=float, ndmin=2)
+        if sections.shape[-1] != 6 or sections.shape[-2] == 0:
+            raise ValueError("Second-order sections must be an array of "
+                             "rows (b0, b1, b2, a0, a1, a2)")
+        if np.any(sections[..., 3] == 0):
+            raise ValueError("Second-order sections need a0 != 0")
+
+        self.sections = sections / sections[..., 3:4]
+
+        # (b0, b1, b2, a1, a2) per section, as Python floats for `step`
+        self.coefficients = [tuple(row) for row in
+                             self.sections[:, [0, 1, 2, 4, 5]].tolist()] \
+            if sections.ndim == 2 else None
+
+        self._build_chunk()
+        self.reset()
+
+    def _build_chunk(self):
+        """State-space form of the cascade, whose state is the sections'
+        delay elements (z1, z2 of each in turn), and the matrices solving a
+        chunk of `IIR_CHUNK` samples. Every matrix has the leading axes of
+        `sections` in front."""
+        batch = self.sections.shape[:-2]
+        n_states = 2 * self.sections.shape[-2]
+        transition = np.zeros(batch + (n_states, n_states))
+        drive = np.zeros(batch + (n_states,))
+        readout = np.zeros(batch + (n_states,))
+        feedthrough = np.ones(batch)
+
+        # Each section is driven by the output of the ones before it
+        for index in range(n_states // 2):
+            b0, b1, b2, _, a1, a2 = np.moveaxis(
+                self.sections[..., index, :], -1, 0)
+            z1, z2 = 2 * index, 2 * index + 1
+            gains = np.stack((b1 - a1 * b0, b2 - a2 * b0), axis=-1)
+
+            transition[..., z1:z2 + 1, :z1] = \
+                gains[..., :, None] * readout[..., None, :z1]
+            transition[..., z1, z1] = -a1
+            transition[..., z1, z2] = 1.0
+            transition[..., z2, z1] = -a2
+            drive[..., z1:z2 + 1] = gains * feedthrough[..., None]
+
+            readout = b0[..., None] * readout
+            readout[..., z1] = 1.0
+            feedthrough = b0 * feedthrough
+
+        powers = [np.broadcast_to(np.eye(n_states), transition.shape)]
+        for _ in range(IIR_CHUNK):
+            powers.append(transition @ powers[-1])
+        self.powers = np.stack(powers, axis=-3)
+
+        # Output over a chunk from its starting state, and from its inputs
+        self.free = _rows(readout[..., None, :],
+                          self.powers[..., :IIR_CHUNK, :, :])
+        impulse = np.concatenate(
+            (feedthrough[..., None],
+             (self.free[..., :-1, :] @ drive[..., :, None])[..., 0]),
+            axis=-1)
+        lags = np.subtract.outer(np.arange(IIR_CHUNK), np.arange(IIR_CHUNK))
+        self.forced = np.where(lags >= 0,
+                               impulse[..., np.maximum(lags, 0)], 0.0)
+
+        # State at the end of a chunk from its inputs (the last `r` rows
+        # serve a chunk of `r` samples)
+        self.pushes = (self.powers[..., IIR_CHUNK - 1::-1, :, :]
+                       @ drive[..., None, :, None])[..., 0]
+
+    def reset(self, level: float = 0.0):
+        """Clears the filter, or settles it as if its input had held
+        `level` forever."""
+        n_sections = self.sections.shape[-2]
+        state = np.zeros(self.sections.shape[:-2] + (n_sections, 2))
+        if level:
+            for index in range(n_sections):
+                b0, b1, b2, _, a1, a2 = np.moveaxis(
+                    self.sections[..., index, :], -1, 0)
+                output = level * (b0 + b1 + b2) / (1.0 + a1 + a2)
+                state[..., index, 0] = output - b0 * level
+                state[..., index, 1] = b2 * level - a2 * output
+                level = output
+        state = state.reshape(state.shape[:-2] + (2 * n_sections,))
+
+        # Plain floats while unbatched, for `step`; an array (batch x state)
+        # once batched
+        self.state = state.tolist() if state.ndim == 1 else state
+
+    def step(self, value: float) -> float:
+        """Filters one sample."""
+        if self.coefficients is None:
+            raise ValueError("A filter with sections per batch row only "
+                             "runs in blocks")
+
+        state = self.state
+        for index, (b0, b1, b2, a1, a2) in enumerate(self.coefficients):
+            z1 = 2 * index
+            output = b0 * value + state[z1]
+            state[z1] = b1 * value - a1 * output + state[z1 + 1]
+            state[z1 + 1] = b2 * value - a2 * output
+            value = output
+
+        return value
+
+    def settling(self) -> int:
+        """Samples after which what is left of the state the filter started
+        from falls below `SETTLING_TOLERANCE`, judging by its slowest
+        pole."""
+        sections = self.sections.reshape(-1, 6)
+        radius = max(float(np.max(np.abs(np.roots(row[3:])), initial=0.0))
+                     for row in sections)
+        if radius == 0.0:
+            return 2 * self.sections.shape[-2]
+        if radius >= 1.0:
+            raise ValueError("An unstable filter never settles")
+
+        return math.ceil(math.log(SETTLING_TOLERANCE) / math.log(radius))
+
+    def kernel(self, path: str, value: str, output: str) -> str:
+        """Kernel template lines (see `Component.kernel`) filtering `value`
+        into `output`, for a component holding the filter at `path`: `step`
+        unrolled over the sections, with the state in locals (the component
+        lists `path + '.state'` in `kernel_state`)."""
+        if self.coefficients is None:
+            return f"{output} = {{{path}}}.step({value})\n"
+
+        coefficients, state = f"{{{path}.coefficients", f"{{{path}.state"
+        lines = [f"{{section_input}} = {value}"]
+        for index in range(len(self.coefficients)):
+            b0, b1, b2, a1, a2 = (f"{coefficients}[{index}][{k}]}}"
+                                  for k in range(5))
+            z1, z2 = (f"{state}[{k}]}}" for k in (2 * index, 2 * index + 1))
+            lines += [
+                f"{{section_output}} = {b0} * {{section_input}} + {z1}",
+                f"{z1} = {b1} * {{section_input}} - {a1} * "
+                f"{{section_output}} + {z2}",
+                f"{z2} = {b2} * {{section_input}} - {a2} * "
+                f"{{section_output}}",
+                "{section_input} = {section_output}"]
+        lines.append(f"{output} = {{section_input}}")
+
+        return '\n'.join(lines) + '\n'
+
+    def process(self, inputs: np.ndarray) -> np.ndarray:
+        """Filters a block of samples (along the last axis)."""
+        state = np.asarray(self.state, dtype=float)
+        n_inputs = inputs.shape[-1]
+        n_chunks, rest = divmod(n_inputs, IIR_CHUNK)
+        batch = np.broadcast_shapes(inputs.shape[:-1], state.shape[:-1],
+                                    self.sections.shape[:-2])
+        split = n_chunks * IIR_CHUNK
+
+        outputs = np.empty(batch + (n_inputs,))
+        if n_chunks:
+            chunks = inputs[..., :split].reshape(
+                inputs.shape[:-1] + (n_chunks, IIR_CHUNK))
+            pushes = chunks @ self.pushes
+            transition = np.swapaxes(self.powers[..., IIR_CHUNK, :, :],
+                                     -1, -2)
+
+            starts = np.empty(batch + (n_chunks, state.shape[-1]))
+            for chunk in range(n_chunks):
+                starts[..., chunk, :] = state
+                state = _rows(state, transition) + pushes[..., chunk, :]
+
+            outputs[..., :split] = (
+                chunks @ np.swapaxes(self.forced, -1, -2)
+                + starts @ np.swapaxes(self.free, -1, -2)).reshape(
+                batch + (split,))
+
+        if rest:
+            tail = inputs[..., split:]
+            outputs[..., split:] = \
+                _rows(tail, np.swapaxes(self.forced[..., :rest, :rest],
+                                        -1, -2)) \
+                + _rows(state, np.swapaxes(self.free[..., :rest, :], -1, -2))
+            state = _rows(state, np.swapaxes(self.powers[..., rest, :, :],
+                                             -1, -2)) \
+                + _rows(tail, self.pushes[..., IIR_CHUNK - rest:, :])
+
+        self.state = state.tolist() if state.ndim == 1 else state
+
+        return outputs
+
+
+def _rows(vectors: np.ndarray, matrices: np.ndarray) -> np.ndarray:
+    """Each vector (along the last axis) times the matrix of the same batch
+    row, `vectors[..., i] @ matrices[..., i, j]`, broadcasting the batch
+    axes."""
+    return (vectors[..., None, :] @ matrices)[..., 0, :]
+
+
+class FIRFilter(Component):
+    """Component filtering its input with `taps` (see `fir_lowpass` and
+    friends). The block engine chains it with neighbouring FIR stages (see
+    `Component.lti`)."""
+
+    __slots__ = ('filter', 'count')
+
+    lti = True
+    chunkable = True
+    batchable = True
+
+    def __init__(self,
+                 input_wire: Wire,
+                 output_wire: Wire,
+                 taps: np.ndarray,
+                 method: str = 'auto',
+                 tick_rate: Optional[float] = None):
+        super().__init__(input_wire, output_wire, tick_rate)
+        self.filter = FIR(taps, method)
+        self.count = 0
+
+    @property
+    def kernel(self) -> str:
+        return self.filter.kernel('filter', '{input}', '{output}')
+
+    @property
+    def taps(self) -> np.ndarray:
+        return self.filter.taps
+
+    @property
+    def buffer(self) -> np.ndarray:
+        return self.filter.buffer
+
+    @buffer.setter
+    def buffer(self, buffer: np.ndarray):
+        self.filter.buffer = buffer
+
+    def reset(self):
+        self.filter.reset()
+
+    def settling(self, dt: float) -> int:
+        return self.filter.settling()
+
+    def tick(self, time: float):
+        self.output_wire.write(self.filter.step(self.input_wire.read()), time)
+
+    def process_block(self, times: np.ndarray,
+                      inputs: np.ndarray) -> np.ndarray:
+        return self.filter.process(inputs)
+
+
+class BiquadFilter(Component):
+    """Component filtering its input with a cascade of second-order
+    `sections` (see `butterworth`)."""
+
+    __slots__ = ('filter',)
+
+    kernel_state = ('filter.state',)
+    chunkable = True
+    batchable = True
+
+    def __init__(self,
+                 input_wire: Wire,
+                 output_wire: Wire,
+                 sections: np.ndarray,
+                 tick_rate: Optional[float] = None):
+        super().__init__(input_wire, output_wire, tick_rate)
+        self.filter = BiquadCascade(sections)
+
+    @property
+    def kernel(self) -> str:
+        return self.filter.kernel('filter', '{input}', '{output}')
+
+    def reset(self):
+        self.filter.reset()
+
+    def settling(self, dt: float) -> int:
+        return self.filter.settling()
+
+    def tick(self, time: float):
+        self.output_wire.write(self.filter.step(self.input_wire.read()), time)
+
+    def process_block(self, times: np.ndarray,
+                      inputs: np.ndarray) -> np.ndarray:
+        return self.filter.process(inputs)
@@ -1,7 +1,18 @@
+from src.core.signals import with_block
 from src.core.types import SignalGenerator
+from src.modules.bitstreams import PackedBits
 
+from typing import Callable, Optional, Sequence, Union
 import math
 
+import numpy as np
+
+
+# Waveform shapes over one cycle, as functions of the fraction of the cycle
+# elapsed (in [0, 1)). Written with plain arithmetic so they work on Python
+# floats and NumPy arrays alike.
+Shape = Callable[[Union[float, np.ndarray]], Union[float, np.ndarray]]
+
 
 def create_digital_signal(bitstream: str,
                           baud_rate: float,
@@ -12,9 +23,29 @@ def create_digital_signal(bitstream: str,
     Input `bitstream` is a string of ones and zeros.
     """
 
+    return create_bitstream_signal(PackedBits.from_string(bitstream),
+                                   baud_rate, voltage_levels)
+
+
+def create_bitstream_signal(bits: PackedBits,
+                            baud_rate: float,
+                            voltage_levels: tuple = (0.0, 1.0)) \
+        -> SignalGenerator:
+    """Digital signal generator over packed bits (see
+    `src.modules.bitstreams`), repeating them once they run out.
+
+    Bits are looked up straight from the packed bytes, so payloads of
+    millions of bits (PRBS sequences, random or file-backed payloads) cost
+    no more than short ones.
+    """
+
     low, high = voltage_levels
     bit_duration = 1.0 / baud_rate
-    total_bits = len(bitstream)
+    total_bits = len(bits)
+
+    # Plain Python ints per byte for the scalar path, without a copy
+    data = memoryview(bits.packed)
+    levels = (low, high)
 
     def signal_func(time: float) -> float:
         if time < 0:
@@ -22,9 +53,15 @@ def create_digital_signal(bitstream: str,
 
         bit_index = int(time / bit_duration) % total_bits
 
-        return high if bitstream[bit_index] == '1' else low
+        return levels[(data[bit_index >> 3] >> (7 - (bit_index & 7))) & 1]
 
-    return signal_func
+    def block_func(times: np.ndarray) -> np.ndarray:
+        bit_indices = (times / bit_duration).astype(np.int64) % total_bits
+
+        return np.where((times >= 0) & (bits.bits(bit_indices) == 1),
+                        high, low)
+
+    return with_block(signal_func, block_func)
 
 
 def create_sine_wave(frequency: float,
@@ -35,4 +72,135 @@ def create_sine_wave(frequency: float,
     def signal_func(time: float) -> float:
         return amplitude * math.sin(2 * math.pi * frequency * time + phase)
 
-    return signal_func
+    def block_func(times: np.ndarray) -> np.ndarray:
+        return amplitude * np.sin(2 * np.pi * frequency * times + phase)
+
+    return with_block(signal_func, block_func)
+
+
+def create_multitone(frequencies: Sequence[float],
+                     amplitudes: Optional[Sequence[float]] = None,
+                     phases: Optional[Sequence[float]] = None) \
+        -> SignalGenerator:
+    """Sum of sine waves, one per entry of `frequencies` (unit amplitude
+    and zero phase unless given)."""
+    if amplitudes is None:
+        amplitudes = [1.0] * len(frequencies)
+    if phases is None:
+        phases = [0.0] * len(frequencies)
+    if not len(frequencies) == len(amplitudes) == len(phases):
+        raise ValueError("Every tone needs an amplitude and a phase")
+
+    tones = list(zip(frequencies, amplitudes, phases))
+
+    omegas = np.array([2 * np.pi * tone[0] for tone in tones])
+    gains = np.array([tone[1] for tone in tones])
+    offsets = np.array([tone[2] for tone in tones])
+
+    def signal_func(time: float) -> float:
+        return sum(amplitude * math.sin(2 * math.pi * frequency * time + phase)
+                   for frequency, amplitude, phase in tones)
+
+    def block_func(times: np.ndarray) -> np.ndarray:
+        return gains @ np.sin(np.outer(omegas, times) + offsets[:, None])
+
+    return with_block(signal_func, block_func)
+
+
+def create_chirp(start_freq: float,
+                 stop_freq: float,
+                 sweep_time: float,
+                 amplitude: float = 1.0,
+                 phase: float = 0.0) -> SignalGenerator:
+    """Linear chirp sweeping from `start_freq` to `stop_freq` in
+    `sweep_time` seconds, starting over after every sweep."""
+    sweep_rate = (stop_freq - start_freq) / sweep_time
+
+    def signal_func(time: float) -> float:
+        elapsed = time % sweep_time
+        return amplitude * math.sin(
+            2 * math.pi * (start_freq + sweep_rate * elapsed / 2) * elapsed
+            + phase)
+
+    def block_func(times: np.ndarray) -> np.ndarray:
+        elapsed = times % sweep_time
+        return amplitude * np.sin(
+            2 * np.pi * (start_freq + sweep_rate * elapsed / 2) * elapsed
+            + phase)
+
+    return with_block(signal_func, block_func)
+
+
+def _periodic(shape: Shape, frequency: float, amplitude: float,
+              phase: float) -> SignalGenerator:
+    """Generator repeating `shape` `frequency` times per second, shifted by
+    `phase` radians."""
+    cycle_offset = phase / (2 * math.pi)
+
+    def signal_func(time: float) -> float:
+        return amplitude * shape((frequency * time + cycle_offset) % 1.0)
+
+    def block_func(times: np.ndarray) -> np.ndarray:
+        return amplitude * shape((frequency * times + cycle_offset) % 1.0)
+
+    return with_block(signal_func, block_func)
+
+
+def create_square_wave(frequency: float,
+                       amplitude: float = 1.0,
+                       phase: float = 0.0,
+                       duty_cycle: float = 0.5) -> SignalGenerator:
+    """Square wave, at +`amplitude` for the first `duty_cycle` of every
+    cycle and at -`amplitude` for the rest."""
+    if not 0.0 <= duty_cycle <= 1.0:
+        raise ValueError("Duty cycle must lie between 0 and 1")
+
+    return _periodic(lambda fraction: 1.0 - 2.0 * (fraction >= duty_cycle),
+                     frequency, amplitude, phase)
+
+
+def create_triangle_wave(frequency: float,
+                         amplitude: float = 1.0,
+                         phase: float = 0.0) -> SignalGenerator:
+    """Triangle wave, rising through zero at the start of every cycle like
+    a sine wave."""
+    return _periodic(
+        lambda fraction: 1.0 - 4.0 * abs((fraction + 0.25) % 1.0 - 0.5),
+        frequency, amplitude, phase)
+
+
+def create_sawtooth_wave(frequency: float,
+                         amplitude: float = 1.0,
+                         phase: float = 0.0) -> SignalGenerator:
+    """Rising sawtooth wave, crossing zero at the start of every cycle."""
+    return _periodic(lambda fraction: 2.0 * ((fraction + 0.5) % 1.0) - 1.0,
+                     frequency, amplitude, phase)
+
+
+def create_band_limited_noise(bandwidth: float,
+                              rms: float = 1.0,
+                              low_freq: float = 0.0,
+                              n_tones: int = 64,
+                              seed: Optional[int] = None) -> SignalGenerator:
+    """Noise with its power spread between `low_freq` and `bandwidth` Hz,
+    at an RMS level of `rms`.
+
+    Built as a sum of `n_tones` sine waves at random frequencies in the band
+    with random phases, so it is a function of time like every other
+    generator: any engine and any block size sample the same waveform, and
+    nothing leaks outside the band. Equal `seed`s give equal noise.
+    """
+    if not 0.0 <= low_freq < bandwidth:
+        raise ValueError("Noise band must satisfy 0 <= low_freq < bandwidth")
+    if n_tones < 1:
+        raise ValueError("Noise needs at least one tone")
+
+    rng = np.random.default_rng(seed)
+    frequencies = rng.uniform(low_freq, bandwidth, n_tones)
+    phases = rng.uniform(0.0, 2 * np.pi, n_tones)
+
+    # Each tone carries an equal share of the power
+    amplitude = rms * math.sqrt(2.0 / n_tones)
+
+    return create_multitone(frequencies.tolist(), [amplitude] * n_tones,
+                            phases.tolist())
@@ -0,0 +1,170 @@
+from src.core.components import Wire
+from src.core.signals import with_block
+from src.core.types import SignalGenerator
+
+from typing import Optional
+import os
+import struct
+import wave
+
+import numpy as np
+
+
+# Sample formats of PCM WAV files by sample width (in bytes), with the
+# offset and scale bringing them into [-1, 1). 24-bit samples are
+# assembled from their bytes.
+_WAV_FORMATS = {
+    1: (np.uint8, 128.0, 128.0),
+    2: (np.dtype('<i2'), 0.0, 2.0 ** 15),
+    3: (np.uint8, 0.0, 2.0 ** 23),
+    4: (np.dtype('<i4'), 0.0, 2.0 ** 31)
+}
+
+
+class _WavFrames:
+    """Memory map over the frames of a PCM WAV file, read as floats in
+    [-1, 1) one channel (or the mean of all of them) at a time."""
+
+    def __init__(self, path: str, channel: Optional[int], loop: bool):
+        try:
+            with wave.open(path, 'rb') as wav:
+                n_channels = wav.getnchannels()
+                self.width = wav.getsampwidth()
+                self.rate = wav.getframerate()
+                self.n_frames = wav.getnframes()
+        except wave.Error as error:
+            raise ValueError(f"Cannot read {path}: {error}") from None
+
+        if self.width not in _WAV_FORMATS:
+            raise ValueError(f"Unsupported WAV sample width: {self.width}")
+        if channel is not None and not 0 <= channel < n_channels:
+            raise ValueError(f"{path} has no channel {channel}")
+        if self.n_frames == 0:
+            raise ValueError(f"{path} holds no samples")
+
+        dtype, self.offset, self.scale = _WAV_FORMATS[self.width]
+        shape = (self.n_frames, n_channels) if self.width != 3 \
+            else (self.n_frames, n_channels, 3)
+        self.frames = np.memmap(path, dtype=dtype, mode='r',
+                                offset=_wav_data_offset(path), shape=shape)
+
+        self.channel = channel
+        self.loop = loop
+
+    def at(self, indices: np.ndarray) -> np.ndarray:
+        """Samples at the frame `indices`; silence outside the file unless
+        it loops. Only the frames asked for are read."""
+        if self.loop:
+            indices = indices % self.n_frames
+        inside = (indices >= 0) & (indices < self.n_frames)
+
+        frames = self.frames[indices[inside]]
+        if self.width == 3:
+            frames = frames.astype(np.int32)
+            frames = frames[..., 0] | (frames[..., 1] << 8) \
+                | (frames[..., 2] << 16)
+            # Sign-extend from 24 bits
+            frames = (frames ^ 0x800000) - 0x800000
+
+        frames = (frames - self.offset) / self.scale
+        if self.channel is None:
+            frames = frames.mean(axis=-1)
+        else:
+            frames = frames[:, self.channel]
+
+        samples = np.zeros(np.shape(indices))
+        samples[inside] = frames
+        return samples
+
+
+def _wav_data_offset(path: str) -> int:
+    """Byte offset of the samples in the WAV file at `path`."""
+    with open(path, 'rb') as file:
+        file.seek(12)
+        while True:
+            header = file.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path} has no data chunk")
+
+            chunk_id, size = struct.unpack('<4sI', header)
+            if chunk_id == b'data':
+                return file.tell()
+
+            # Chunks are padded to an even size
+            file.seek(size + (size & 1), os.SEEK_CUR)
+
+
+def create_wav_signal(path: str,
+                      channel: Optional[int] = None,
+                      gain: float = 1.0,
+                      loop: bool = False) -> SignalGenerator:
+    """Signal streamed from the PCM WAV file at `path`, scaled into
+    [-`gain`, `gain`).
+
+    Plays one `channel` (the mean of all channels by default), silent
+    before the start and after the end of the file unless it loops. The
+    file is memory-mapped and only the frames around the times asked for
+    are read, so clips far larger than memory stream block by block.
+    Frames are interpolated linearly to any time-step; nothing filters
+    them, so a time-step coarser than the audio's content aliases it.
+    """
+    frames = _WavFrames(path, channel, loop)
+    rate = frames.rate
+
+    def block_func(times: np.ndarray) -> np.ndarray:
+        positions = times * rate
+        indices = np.floor(positions).astype(np.int64)
+        fractions = positions - indices
+
+        before, after = frames.at(indices), frames.at(indices + 1)
+        return gain * (before + fractions * (after - before))
+
+    def signal_func(time: float) -> float:
+        return float(block_func(np.array([time]))[0])
+
+    return with_block(signal_func, block_func)
+
+
+def save_trace(wire: Wire, path: str):
+    """Saves the samples `wire` recorded, with their timestamps, as a
+    trace `create_trace_signal` can play back. The trace is a NumPy
+    `.npy` file holding the timestamps and the samples as its two rows."""
+    history = wire.history
+    if wire.dtype is not float or history.ndim != 1:
+        raise ValueError("Only real-valued, unbatched wires can be saved "
+                         "as traces")
+
+    np.save(path, np.stack((wire.time_axis, history)))
+
+
+def create_trace_signal(path: str) -> SignalGenerator:
+    """Signal replaying the trace saved at `path` (see `save_trace`).
+
+    Each sample holds until the next one, as on the wire it was recorded
+    from; the signal is 0 before the first sample and holds the last one
+    after the end. The trace is memory-mapped and each block only reads
+    the samples it spans.
+    """
+    trace = np.load(path, mmap_mode='r')
+    if trace.ndim != 2 or len(trace) != 2 or trace.shape[1] == 0:
+        raise ValueError(f"{path} does not hold a trace")
+    timestamps, samples = trace[0], trace[1]
+
+    def signal_func(time: float) -> float:
+        index = int(np.searchsorted(timestamps, time, side='right')) - 1
+        return float(samples[index]) if index >= 0 else 0.0
+
+    def block_func(times: np.ndarray) -> np.ndarray:
+        # Narrow the search to the samples the block spans, so the rest of
+        # the trace stays on disk
+        start = max(0, int(np.searchsorted(timestamps, times[0],
+                                           side='right')) - 1)
+        stop = max(start + 1, int(np.searchsorted(timestamps, times[-1],
+                                                  side='right')))
+        window = np.asarray(samples[start:stop])
+
+        indices = np.searchsorted(timestamps[start:stop], times,
+                                  side='right') - 1
+        return np.where(indices >= 0, window[np.maximum(indices, 0)], 0.0)
+
+    return with_block(signal_func, block_func)
@@ -0,0 +1,211 @@
+from src.core.batch import prepend
+from src.core.components import Component, Wire
+from src.modules.filters import fir_lowpass
+
+from typing import Optional
+
+import numpy as np
+
+
+def _boxcar_taps(factor: int, stages: int, gain: float) -> np.ndarray:
+    """Impulse response of a CIC filter: `stages` cascaded moving sums of
+    length `factor`, scaled to a DC gain of `gain`."""
+    taps = np.ones(1)
+    for _ in range(stages):
+        taps = np.convolve(taps, np.ones(factor))
+
+    return gain * taps / taps.sum()
+
+
+class Interpolator(Component):
+    """Polyphase FIR interpolator.
+
+    Ticks `factor` times per input sample: every `factor`-th tick it latches
+    a new sample from the (slower) input wire, and every tick it outputs one
+    phase of the interpolation filter. The input wire must be written once
+    every `factor` ticks of this component.
+    """
+
+    __slots__ = ('factor', 'polyphase', 'delay', 'phase')
+
+    chunkable = True
+    kernel = """
+if {phase} == 0:
+    {delay}[1:] = {delay}[:-1]
+    {delay}[0] = {input}
+{output} = float({polyphase}[{phase}] @ {delay})
+{phase} = ({phase} + 1) % {factor}
+"""
+    kernel_state = ('phase',)
+    batchable = True
+
+    def __init__(self,
+                 input_wire: Wire,
+                 output_wire: Wire,
+                 factor: int,
+                 taps: Optional[np.ndarray] = None,
+                 tick_rate: Optional[float] = None):
+        super().__init__(input_wire, output_wire, tick_rate)
+        self.factor = factor
+
+        if taps is None:
+            taps = fir_lowpass(8 * factor, 0.5 / factor, factor)
+
+        # Row `p` holds the taps applied at phase `p`, newest sample first
+        n_phases = -(-len(taps) // factor)
+        padded = np.zeros(n_phases * factor)
+        padded[:len(taps)] = taps
+        self.polyphase = padded.reshape(n_phases, factor).T.copy()
+
+        self.reset()
+
+    def reset(self):
+        self.delay = np.zeros(self.polyphase.shape[1])
+        self.phase = 0
+
+    def settling(self, dt: float) -> int:
+        return self.delay.shape[-1] * self.factor
+
+    def tick(self, time: float):
+        if self.phase == 0:
+            self.delay[1:] = self.delay[:-1]
+            self.delay[0] = self.input_wire.read()
+
+        output = float(self.polyphase[self.phase] @ self.delay)
+        self.phase = (self.phase + 1) % self.factor
+
+        self.output_wire.write(output, time)
+
+    def process_block(self, times: np.ndarray,
+                      inputs: np.ndarray) -> np.ndarray:
+        n_taps = len(self.delay)
+        positions = np.arange(inputs.shape[-1])
+
+        # Samples latched in this block, appended to the delay line (oldest
+        # first), and the index of the newest latched sample at each tick
+        first_latch = -self.phase % self.factor
+        samples = prepend(self.delay[..., ::-1],
+                          inputs[..., first_latch::self.factor])
+        newest = (n_taps - 1) + (positions - first_latch) // self.factor + 1
+
+        phases = (self.phase + positions) % self.factor
+        window = samples[..., newest[:, None] - np.arange(n_taps)]
+        outputs = np.einsum('...ij,ij->...i', window, self.polyphase[phases])
+
+        self.delay = samples[..., -n_taps:][..., ::-1].copy()
+        self.phase = (self.phase + inputs.shape[-1]) % self.factor
+
+        return outputs
+
+
+class Decimator(Component):
+    """FIR decimator.
+
+    Filters every input sample and writes one output every `factor` ticks,
+    so the output wire runs `factor` times slower than the component.
+    """
+
+    __slots__ = ('factor', 'decimation', 'taps', 'buffer', 'count')
+
+    lti = True
+    kernel = """
+{buffer}[1:] = {buffer}[:-1]
+{buffer}[0] = {input}
+if {count} == 0:
+    {output} = float({taps} @ {buffer})
+    {write}({output})
+{count} = ({count} + 1) % {factor}
+"""
+    kernel_state = ('count',)
+    chunkable = True
+    batchable = True
+
+    def __init__(self,
+                 input_wire: Wire,
+                 output_wire: Wire,
+                 factor: int,
+                 taps: Optional[np.ndarray] = None,
+                 tick_rate: Optional[float] = None):
+        super().__init__(input_wire, output_wire, tick_rate)
+        self.factor = factor
+        self.decimation = factor
+
+        if taps is None:
+            taps = fir_lowpass(8 * factor, 0.5 / factor, 1.0)
+        self.taps = np.asarray(taps, dtype=float)
+
+        self.reset()
+
+    def reset(self):
+        # Most recent input samples, newest first
+        self.buffer = np.zeros(len(self.taps))
+        self.count = 0
+
+    def settling(self, dt: float) -> int:
+        return len(self.taps)
+
+    def tick(self, time: float):
+        self.buffer[1:] = self.buffer[:-1]
+        self.buffer[0] = self.input_wire.read()
+
+        if self.count == 0:
+            self.output_wire.write(float(self.taps @ self.buffer), time)
+
+        self.count = (self.count + 1) % self.factor
+
+    def process_block(self, times: np.ndarray,
+                      inputs: np.ndarray) -> np.ndarray:
+        n_taps = len(self.taps)
+        samples = prepend(self.buffer[..., ::-1], inputs)
+        n_inputs = inputs.shape[-1]
+
+        # Positions (in `samples`) of the inputs that complete an output
+        ends = n_taps + np.arange(-self.count % self.factor, n_inputs,
+                                  self.factor)
+        window = samples[..., ends[:, None] - np.arange(n_taps)]
+        outputs = window @ self.taps
+
+        self.buffer = samples[..., -n_taps:][..., ::-1].copy()
+        self.count = (self.count + n_inputs) % self.factor
+
+        return outputs
+
+
+class CICInterpolator(Interpolator):
+    """Interpolator with a cascaded integrator-comb (CIC) response: `stages`
+    moving sums of length `factor` (hold, then linear, then quadratic
+    interpolation, ...)."""
+
+    __slots__ = ()
+
+    def __init__(self,
+                 input_wire: Wire,
+                 output_wire: Wire,
+                 factor: int,
+                 stages: int = 2,
+                 tick_rate: Optional[float] = None):
+        super().__init__(input_wire, output_wire, factor,
+                         taps=_boxcar_taps(factor, stages, factor),
+                         tick_rate=tick_rate)
+
+
+class CICDecimator(Decimator):
+    """Decimator with a cascaded integrator-comb (CIC) response: `stages`
+    moving averages of length `factor`.
+
+    The response is evaluated directly as an FIR at the output rate, which
+    avoids the unbounded integrator growth of the textbook structure in
+    floating point.
+    """
+
+    __slots__ = ()
+
+    def __init__(self,
+                 input_wire: Wire,
+                 output_wire: Wire,
+                 factor: int,
+                 stages: int = 3,
+                 tick_rate: Optional[float] = None):
+        super().__init__(input_wire, output_wire, factor,
+                         taps=_boxcar_taps(factor, stages, 1.0),
+                         tick_rate=tick_rate)
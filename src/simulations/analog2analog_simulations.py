@@ -2,131 +2,340 @@ from .types import Scenario
 
 from src.core.components.base import Wire
 from src.core.engine import Simulation
+from src.core.expressions import compile_signal
+from src.core.sampling import estimate_bandwidth, max_frequency, nyquist_dt
 from src.modules.analog2analog_modulators import \
     AMModulator, FMModulator, PMModulator
 from src.modules.analog2analog_demodulators import \
     AMDemodulator, FMDemodulator, PMDemodulator
+from src.modules.baseband import \
+    AMBasebandModulator, FMBasebandModulator, PMBasebandModulator, \
+    AMBasebandDemodulator, FMBasebandDemodulator, PMBasebandDemodulator
+from src.modules.filters import BiquadCascade, butterworth
+from src.modules.recordings import create_trace_signal, create_wav_signal
+from src.modules.resamplers import Decimator, Interpolator
 
 from typing import Dict, Callable
-import math
+import os
+
+import numpy as np
 
 
 DEFAULT_SIGNAL = 'lambda t: math.sin(2 * math.pi * t)'
 
+# Rate (in Hz) at which the message is generated and the demodulated
+# output is kept; only the passband path runs at the full simulation rate
+DEFAULT_MESSAGE_RATE = 100.0
+
+# Time-steps per cycle of the highest frequency the modulators generate,
+# when the time-step is picked automatically
+DEFAULT_OVERSAMPLING = 20.0
+
+# Rule integrating the FM phase (see
+# `src.core.integration.INTEGRATION_RULES`)
+DEFAULT_INTEGRATION = 'trapezoid'
+
+# Butterworth low-pass smoothing the passband AM and FM detectors: its
+# order, and its cutoff as a fraction of the carrier frequency (between
+# the message and the ripple the detectors leave at the carrier frequency
+# and above)
+DETECTOR_ORDER = 4
+DETECTOR_CUTOFF = 0.5
+
+
+def auto_dt(message: Wire, input_func: Callable[[float], float],
+            message_rate: float, oversampling: float) -> float:
+    """Coarsest time-step that samples every wire driven by `message`
+    `oversampling` times per cycle of its highest frequency (Carson's rule
+    for FM and PM), given the bandwidth and peak of the message measured
+    over its first second. Never coarser than a message sample."""
+    bandwidth, peak = estimate_bandwidth(input_func, message_rate)
+
+    return nyquist_dt(max_frequency(message, bandwidth, peak), oversampling,
+                      message_rate)
+
+
+def resampling_factor(dt: float, message_rate: float) -> int:
+    """Time-steps per message sample (as `Simulation.rate_divisor` counts
+    them). At 1 the scenarios leave the interpolator and decimator out,
+    since their filters would only delay and colour the message."""
+    return max(1, round(1.0 / (message_rate * dt)))
+
+
+def detector_lowpass(carrier_freq: float, dt: float) -> BiquadCascade:
+    """Low-pass for a passband AM or FM detector ticking every `dt`
+    seconds (see `DETECTOR_ORDER` and `DETECTOR_CUTOFF`). A sweep over
+    carrier frequencies gets a filter per point, one row each."""
+    sections = [butterworth(DETECTOR_ORDER, DETECTOR_CUTOFF * freq * dt)
+                for freq in np.ravel(carrier_freq)]
+
+    return BiquadCascade(sections[0] if np.ndim(carrier_freq) == 0
+                         else np.array(sections))
 
-def parse_signal_func(func_str: str) -> Callable[[float], float]:
-    """Parses a lambda string into a callable function."""
-    return eval(func_str, {'math': math, '__builtins__': {}})
+
+def message_source(signal_func: str, input_file: str) \
+        -> Callable[[float], float]:
+    """Message generator: the recording at `input_file` (a WAV file or a
+    trace saved with `src.modules.recordings.save_trace`) when one is
+    given, and the `signal_func` expression otherwise."""
+    if not input_file:
+        return compile_signal(signal_func)
+
+    extension = os.path.splitext(input_file)[1].lower()
+    if extension == '.wav':
+        return create_wav_signal(input_file)
+    if extension == '.npy':
+        return create_trace_signal(input_file)
+
+    raise ValueError(f"Unsupported input file: {input_file} "
+                     "(expected a .wav file or a .npy trace)")
 
 
 def analog_to_analog(carrier_freq: float = 20.0,
                      modulation_index: float = 0.5,
                      freq_deviation: float = 5.0,
-                     signal_func: str = DEFAULT_SIGNAL):
-    """Showcase: displays AM, FM, and PM side by side."""
+                     signal_func: str = DEFAULT_SIGNAL,
+                     message_rate: float = DEFAULT_MESSAGE_RATE,
+                     oversampling: float = DEFAULT_OVERSAMPLING,
+                     dt: float = 0.0,
+                     integration: str = DEFAULT_INTEGRATION):
+    """Showcase: displays AM, FM, and PM side by side.
+
+    The time-step is picked with `auto_dt` unless `dt` is positive, and the
+    FM phase integrated with the `integration` rule.
+    """
 
     w_input = Wire("Analog Input")
+    w_message = Wire("Interpolated Input")
     w_am = Wire("AM Modulated")
     w_fm = Wire("FM Modulated")
     w_pm = Wire("PM Modulated")
 
-    input_func = parse_signal_func(signal_func)
+    input_func = compile_signal(signal_func)
+
+    modulators = [
+        AMModulator(w_message, w_am, carrier_freq=carrier_freq,
+                    modulation_index=modulation_index),
+        FMModulator(w_message, w_fm, carrier_freq=carrier_freq,
+                    freq_deviation=freq_deviation, integration=integration),
+        PMModulator(w_message, w_pm, carrier_freq=carrier_freq)
+    ]
+
+    dt = dt or auto_dt(w_message, input_func, message_rate, oversampling)
+    factor = resampling_factor(dt, message_rate)
+    if factor == 1:
+        w_message.name = w_input.name
+        w_input = w_message
 
     sim = Simulation(
         input_wire=w_input,
         input_function=input_func,
-        dt=0.00001
+        dt=dt,
+        input_rate=message_rate
     )
 
-    sim.add_component(AMModulator(w_input, w_am,
-                                  carrier_freq=carrier_freq,
-                                  modulation_index=modulation_index))
-    sim.add_component(FMModulator(w_input, w_fm,
-                                  carrier_freq=carrier_freq,
-                                  freq_deviation=freq_deviation))
-    sim.add_component(PMModulator(w_input, w_pm,
-                                  carrier_freq=carrier_freq))
+    if factor > 1:
+        sim.add_component(Interpolator(w_input, w_message, factor=factor))
+    for modulator in modulators:
+        sim.add_component(modulator)
 
     return sim
 
 
 def am_modem(carrier_freq: float = 20.0,
              modulation_index: float = 0.5,
-             signal_func: str = DEFAULT_SIGNAL):
-    """AM modulator + demodulator chain."""
+             signal_func: str = DEFAULT_SIGNAL,
+             message_rate: float = DEFAULT_MESSAGE_RATE,
+             baseband: bool = False,
+             oversampling: float = DEFAULT_OVERSAMPLING,
+             dt: float = 0.0,
+             input_file: str = ''):
+    """AM modulator + demodulator chain.
+
+    With `baseband` set, the modulated wire carries the complex envelope and
+    the time-step only resolves the message. The time-step is picked with
+    `auto_dt` unless `dt` is positive. The message plays `input_file` (see
+    `message_source`) when one is given.
+    """
 
     w_input = Wire("Analog Input")
-    w_modulated = Wire("AM Modulated")
+    w_message = Wire("Interpolated Input")
+    w_modulated = Wire("AM Modulated", complex if baseband else float)
+    w_detected = Wire("AM Detected")
     w_demodulated = Wire("AM Demodulated")
 
-    input_func = parse_signal_func(signal_func)
+    input_func = message_source(signal_func, input_file)
+
+    if baseband:
+        modulator = AMBasebandModulator(
+            w_message, w_modulated, carrier_freq=carrier_freq,
+            modulation_index=modulation_index)
+    else:
+        modulator = AMModulator(w_message, w_modulated,
+                                carrier_freq=carrier_freq,
+                                modulation_index=modulation_index)
+
+    # Picked once the modulator is connected, so it accounts for it
+    dt = dt or auto_dt(w_message, input_func, message_rate, oversampling)
+
+    if baseband:
+        demodulator = AMBasebandDemodulator(
+            w_modulated, w_detected, modulation_index=modulation_index)
+    else:
+        demodulator = AMDemodulator(
+            w_modulated, w_detected, carrier_freq=carrier_freq,
+            modulation_index=modulation_index,
+            lowpass=detector_lowpass(carrier_freq, dt))
+
+    factor = resampling_factor(dt, message_rate)
+    if factor == 1:
+        w_message.name = w_input.name
+        w_input = w_message
 
     sim = Simulation(
         input_wire=w_input,
         input_function=input_func,
-        dt=0.0001
+        dt=dt,
+        input_rate=message_rate
     )
 
-    sim.add_component(AMModulator(w_input, w_modulated,
-                                  carrier_freq=carrier_freq,
-                                  modulation_index=modulation_index))
-    sim.add_component(AMDemodulator(w_modulated, w_demodulated,
-                                    carrier_freq=carrier_freq,
-                                    modulation_index=modulation_index))
+    if factor > 1:
+        sim.add_component(Interpolator(w_input, w_message, factor=factor))
+    sim.add_component(modulator)
+    sim.add_component(demodulator)
+    if factor > 1:
+        sim.add_component(Decimator(w_detected, w_demodulated, factor=factor))
 
     return sim
 
 
 def fm_modem(carrier_freq: float = 20.0,
              freq_deviation: float = 5.0,
-             signal_func: str = DEFAULT_SIGNAL):
-    """FM modulator + demodulator chain."""
+             signal_func: str = DEFAULT_SIGNAL,
+             message_rate: float = DEFAULT_MESSAGE_RATE,
+             baseband: bool = False,
+             oversampling: float = DEFAULT_OVERSAMPLING,
+             dt: float = 0.0,
+             integration: str = DEFAULT_INTEGRATION,
+             input_file: str = ''):
+    """FM modulator + demodulator chain.
+
+    With `baseband` set, the modulated wire carries the complex envelope and
+    the time-step only resolves the message. The time-step is picked with
+    `auto_dt` unless `dt` is positive, and the phase integrated with the
+    `integration` rule. The message plays `input_file` (see
+    `message_source`) when one is given.
+    """
 
     w_input = Wire("Analog Input")
-    w_modulated = Wire("FM Modulated")
+    w_message = Wire("Interpolated Input")
+    w_modulated = Wire("FM Modulated", complex if baseband else float)
+    w_detected = Wire("FM Detected")
     w_demodulated = Wire("FM Demodulated")
 
-    input_func = parse_signal_func(signal_func)
+    input_func = message_source(signal_func, input_file)
+
+    if baseband:
+        modulator = FMBasebandModulator(
+            w_message, w_modulated, carrier_freq=carrier_freq,
+            freq_deviation=freq_deviation, integration=integration)
+    else:
+        modulator = FMModulator(w_message, w_modulated,
+                                carrier_freq=carrier_freq,
+                                freq_deviation=freq_deviation,
+                                integration=integration)
+
+    # Picked once the modulator is connected, so it accounts for it
+    dt = dt or auto_dt(w_message, input_func, message_rate, oversampling)
+
+    if baseband:
+        demodulator = FMBasebandDemodulator(
+            w_modulated, w_detected, freq_deviation=freq_deviation)
+    else:
+        demodulator = FMDemodulator(
+            w_modulated, w_detected, carrier_freq=carrier_freq,
+            freq_deviation=freq_deviation,
+            lowpass=detector_lowpass(carrier_freq, dt))
+
+    factor = resampling_factor(dt, message_rate)
+    if factor == 1:
+        w_message.name = w_input.name
+        w_input = w_message
 
     sim = Simulation(
         input_wire=w_input,
         input_function=input_func,
-        dt=0.00001
+        dt=dt,
+        input_rate=message_rate
     )
 
-    sim.add_component(FMModulator(w_input, w_modulated,
-                                  carrier_freq=carrier_freq,
-                                  freq_deviation=freq_deviation))
-    sim.add_component(FMDemodulator(w_modulated, w_demodulated,
-                                    carrier_freq=carrier_freq,
-                                    freq_deviation=freq_deviation))
+    if factor > 1:
+        sim.add_component(Interpolator(w_input, w_message, factor=factor))
+    sim.add_component(modulator)
+    sim.add_component(demodulator)
+    if factor > 1:
+        sim.add_component(Decimator(w_detected, w_demodulated, factor=factor))
 
     return sim
 
 
 def pm_modem(carrier_freq: float = 20.0,
              phase_deviation: float = 1.57,
-             signal_func: str = DEFAULT_SIGNAL):
-    """PM modulator + demodulator chain."""
+             signal_func: str = DEFAULT_SIGNAL,
+             message_rate: float = DEFAULT_MESSAGE_RATE,
+             baseband: bool = False,
+             oversampling: float = DEFAULT_OVERSAMPLING,
+             dt: float = 0.0,
+             input_file: str = ''):
+    """PM modulator + demodulator chain.
+
+    With `baseband` set, the modulated wire carries the complex envelope and
+    the time-step only resolves the message. The time-step is picked with
+    `auto_dt` unless `dt` is positive. The message plays `input_file` (see
+    `message_source`) when one is given.
+    """
 
     w_input = Wire("Analog Input")
-    w_modulated = Wire("PM Modulated")
+    w_message = Wire("Interpolated Input")
+    w_modulated = Wire("PM Modulated", complex if baseband else float)
+    w_detected = Wire("PM Detected")
     w_demodulated = Wire("PM Demodulated")
 
-    input_func = parse_signal_func(signal_func)
+    input_func = message_source(signal_func, input_file)
+
+    if baseband:
+        modulator = PMBasebandModulator(
+            w_message, w_modulated, carrier_freq=carrier_freq,
+            phase_deviation=phase_deviation)
+        demodulator = PMBasebandDemodulator(
+            w_modulated, w_detected, phase_deviation=phase_deviation)
+    else:
+        modulator = PMModulator(w_message, w_modulated,
+                                carrier_freq=carrier_freq,
+                                phase_deviation=phase_deviation)
+        demodulator = PMDemodulator(w_modulated, w_detected,
+                                    carrier_freq=carrier_freq,
+                                    phase_deviation=phase_deviation)
+
+    dt = dt or auto_dt(w_message, input_func, message_rate, oversampling)
+    factor = resampling_factor(dt, message_rate)
+    if factor == 1:
+        w_message.name = w_input.name
+        w_input = w_message
 
     sim = Simulation(
         input_wire=w_input,
         input_function=input_func,
-        dt=0.00001
+        dt=dt,
+        input_rate=message_rate
     )
 
-    sim.add_component(PMModulator(w_input, w_modulated,
-                                  carrier_freq=carrier_freq,
-                                  phase_deviation=phase_deviation))
-    sim.add_component(PMDemodulator(w_modulated, w_demodulated,
-                                    carrier_freq=carrier_freq,
-                                    phase_deviation=phase_deviation))
+    if factor > 1:
+        sim.add_component(Interpolator(w_input, w_message, factor=factor))
+    sim.add_component(modulator)
+    sim.add_component(demodulator)
+    if factor > 1:
+        sim.add_component(Decimator(w_detected, w_demodulated, factor=factor))
 
     return sim
 
@@ -139,7 +348,11 @@ A2A_SCENARIOS: Dict[str, Scenario] = {
             'carrier_freq': {'type': float, 'default': 20.0},
             'modulation_index': {'type': float, 'default': 0.5},
             'freq_deviation': {'type': float, 'default': 5.0},
-            'signal_func': {'type': str, 'default': DEFAULT_SIGNAL}
+            'signal_func': {'type': str, 'default': DEFAULT_SIGNAL},
+            'message_rate': {'type': float, 'default': DEFAULT_MESSAGE_RATE},
+            'oversampling': {'type': float, 'default': DEFAULT_OVERSAMPLING},
+            'dt': {'type': float, 'default': 0.0},
+            'integration': {'type': str, 'default': DEFAULT_INTEGRATION}
         }
     },
     "Analog to Analog: AM Modem": {
@@ -148,7 +361,12 @@ A2A_SCENARIOS: Dict[str, Scenario] = {
         'parameters': {
             'carrier_freq': {'type': float, 'default': 20.0},
             'modulation_index': {'type': float, 'default': 0.5},
-            'signal_func': {'type': str, 'default': DEFAULT_SIGNAL}
+            'signal_func': {'type': str, 'default': DEFAULT_SIGNAL},
+            'message_rate': {'type': float, 'default': DEFAULT_MESSAGE_RATE},
+            'baseband': {'type': bool, 'default': False},
+            'oversampling': {'type': float, 'default': DEFAULT_OVERSAMPLING},
+            'dt': {'type': float, 'default': 0.0},
+            'input_file': {'type': str, 'default': ''}
         }
     },
     "Analog to Analog: FM Modem": {
@@ -157,7 +375,13 @@ A2A_SCENARIOS: Dict[str, Scenario] = {
         'parameters': {
             'carrier_freq': {'type': float, 'default': 20.0},
             'freq_deviation': {'type': float, 'default': 5.0},
-            'signal_func': {'type': str, 'default': DEFAULT_SIGNAL}
+            'signal_func': {'type': str, 'default': DEFAULT_SIGNAL},
+            'message_rate': {'type': float, 'default': DEFAULT_MESSAGE_RATE},
+            'baseband': {'type': bool, 'default': False},
+            'oversampling': {'type': float, 'default': DEFAULT_OVERSAMPLING},
+            'dt': {'type': float, 'default': 0.0},
+            'integration': {'type': str, 'default': DEFAULT_INTEGRATION},
+            'input_file': {'type': str, 'default': ''}
         }
     },
     "Analog to Analog: PM Modem": {
@@ -166,7 +390,12 @@ A2A_SCENARIOS: Dict[str, Scenario] = {
         'parameters': {
             'carrier_freq': {'type': float, 'default': 20.0},
             'phase_deviation': {'type': float, 'default': 1.57},
-            'signal_func': {'type': str, 'default': DEFAULT_SIGNAL}
+            'signal_func': {'type': str, 'default': DEFAULT_SIGNAL},
+            'message_rate': {'type': float, 'default': DEFAULT_MESSAGE_RATE},
+            'baseband': {'type': bool, 'default': False},
+            'oversampling': {'type': float, 'default': DEFAULT_OVERSAMPLING},
+            'dt': {'type': float, 'default': 0.0},
+            'input_file': {'type': str, 'default': ''}
         }
     }
 }
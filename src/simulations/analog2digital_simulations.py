@@ -2,23 +2,18 @@ from .types import Scenario
 
 from src.core.components.base import Wire
 from src.core.engine import Simulation
+from src.core.expressions import compile_signal
 from src.modules.analog2digital_encoders import \
     DeltaModulationEncoder, PCMEncoder
 from src.modules.analog2digital_decoders import \
     DeltaModulationDecoder, PCMDecoder
 
-from typing import Dict, Callable
-import math
+from typing import Dict
 
 
 DEFAULT_SIGNAL = 'lambda t: math.sin(2 * math.pi * t)'
 
 
-def parse_signal_func(func_str: str) -> Callable[[float], float]:
-    """Parses a lambda string into a callable function."""
-    return eval(func_str, {'math': math, '__builtins__': {}})
-
-
 def analog_to_digital(sample_rate: float = 20.0,
                       n_bits: int = 4,
                       step_size: float = 0.1,
@@ -29,7 +24,7 @@ def analog_to_digital(sample_rate: float = 20.0,
     w_dm = Wire("Delta Modulation Encoded")
     w_pcm = Wire("PCM Encoded")
 
-    input_func = parse_signal_func(signal_func)
+    input_func = compile_signal(signal_func)
 
     sim = Simulation(
         input_wire=w_input,
@@ -56,7 +51,7 @@ def dm_codec(sample_rate: float = 20.0,
     w_encoded = Wire("DM Encoded")
     w_decoded = Wire("DM Decoded")
 
-    input_func = parse_signal_func(signal_func)
+    input_func = compile_signal(signal_func)
 
     sim = Simulation(
         input_wire=w_input,
@@ -83,7 +78,7 @@ def pcm_codec(sample_rate: float = 20.0,
     w_encoded = Wire("PCM Encoded")
     w_decoded = Wire("PCM Decoded")
 
-    input_func = parse_signal_func(signal_func)
+    input_func = compile_signal(signal_func)
 
     sim = Simulation(
         input_wire=w_input,
@@ -29,7 +29,8 @@ def line_coding(baud_rate: float = 5.0,
     sim = Simulation(
         input_wire=w_input,
         input_function=input_func,
-        dt=0.001
+        dt=0.001,
+        event_driven=True
     )
 
     sim.add_component(NRZLEncoder(w_input,
@@ -65,7 +66,8 @@ def generic_codec_setup(baud_rate: float, bitstream: str, Encoder, Decoder):
     sim = Simulation(
         input_wire=w_input,
         input_function=input_func,
-        dt=0.001
+        dt=0.001,
+        event_driven=True
     )
 
     sim.add_component(Encoder(w_input, w_encoded,
@@ -11,6 +11,10 @@ import io
 from PIL import Image, ImageTk
 
 
+# Number of min/max buckets kept for wires that are not selected for plotting
+ENVELOPE_BUCKETS = 1000
+
+
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -18,6 +22,8 @@ class App(tk.Tk):
         self.title("simplexsim")
         self.geometry("1200x800")
 
+        self.sim_thread = None
+
         # Initialize Layout
         self._init_layout()
 
@@ -59,11 +65,15 @@ class App(tk.Tk):
         self.plotting.plot_wires([])
 
     def update_plot_visibility(self, visible_wire_names):
-        """Filter self.wires based on names and re-plot."""
+        """Filter self.wires based on names and re-plot. Wires the last run
+        skipped are computed on demand (once it finished)."""
         self.wires_to_plot = [
             w for w in self.wires if w.name in visible_wire_names
         ]
 
+        if not (self.sim_thread and self.sim_thread.is_alive()):
+            self.sim_engine.observe(self.wires_to_plot)
+
         self.plotting.plot_wires(self.wires_to_plot)
 
     def visualize_simulation(self):
@@ -85,6 +95,8 @@ class App(tk.Tk):
         """Called by ControlPanel when Start is clicked."""
         params = self.controls.get_param_values()
         self.rebuild_simulation(params)
+        self.sim_engine.observe(self.wires_to_plot)
+        self.apply_recording_policies(duration)
 
         self.controls.set_state_running()
 
@@ -93,6 +105,27 @@ class App(tk.Tk):
 
         self.after(100, self.monitor_simulation)
 
+    def apply_recording_policies(self, duration: float):
+        """Records the wires selected for plotting in full and keeps only a
+        coarse min/max envelope of the others. Wires the run skips are set
+        to record in full too, for when they are computed on demand.
+        Event-driven simulations keep recording changes only."""
+        if self.sim_engine.event_driven:
+            return
+
+        total_steps = int(duration / self.sim_engine.dt)
+        computed = self.sim_engine.computed_wires
+
+        for wire in self.wires:
+            if wire in self.wires_to_plot or wire not in computed:
+                wire.set_recording('full')
+            else:
+                # Complex wires have no min/max envelope; thin them instead
+                n_samples = total_steps // wire.stride
+                wire.set_recording(
+                    'envelope' if wire.dtype is float else 'decimate',
+                    max(1, n_samples // ENVELOPE_BUCKETS))
+
     def stop_simulation(self):
         """Called by ControlPanel when Stop is clicked."""
         if self.sim_thread and self.sim_thread.is_alive():
@@ -108,8 +141,9 @@ class App(tk.Tk):
                 # re-schedule check
                 self.after(100, self.monitor_simulation)
             else:
-                # finished
+                # finished; fill in wires checked during the run
                 self.controls.set_state_stopped()
+                self.sim_engine.observe(self.wires_to_plot)
                 self.plotting.plot_wires(self.wires_to_plot)
         else:
             self.after(100, self.monitor_simulation)
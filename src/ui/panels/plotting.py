@@ -1,4 +1,5 @@
 from src.core.components import Wire
+from src.modules.baseband import upconvert
 
 import tkinter as tk
 from tkinter import ttk
@@ -9,6 +10,8 @@ from matplotlib.figure import Figure
 
 from typing import List
 
+import numpy as np
+
 
 class PlotPanel(ttk.Frame):
     """Right-side panel containing the Matplotlib canvas.
@@ -31,9 +34,19 @@ class PlotPanel(ttk.Frame):
         self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH,
                                          expand=True)
 
+        # Complex envelopes are shown as I/Q unless shifted up to their
+        # carrier on request
+        self.wires: List[Wire] = []
+        self.show_passband = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self, text="Show complex envelopes at their carrier",
+                        variable=self.show_passband,
+                        command=lambda: self.plot_wires(self.wires)
+                        ).pack(side=tk.BOTTOM, anchor=tk.W)
+
     def plot_wires(self, wires: List[Wire]):
         """Clears the canvas and plots the history of the provided wires.
         """
+        self.wires = wires
         self.fig.clear()
 
         if not wires:
@@ -48,8 +61,30 @@ class PlotPanel(ttk.Frame):
 
         for i, wire in enumerate(wires):
             ax = axes[i]
-            ax.plot(wire.time_axis, wire.history, label=wire.name,
-                    linewidth=1.5)
+            # Change-only histories hold each value until the next one
+            drawstyle = 'steps-post' if wire.recording[0] == 'changes' \
+                else 'default'
+
+            times, values = wire.time_axis, wire.history
+            passband = wire.dtype is not float \
+                and wire.carrier_freq is not None and self.show_passband.get()
+            if passband and _resolves(times, wire.carrier_freq):
+                ax.plot(times, upconvert(values, times, wire.carrier_freq),
+                        label=wire.name, linewidth=1.5, drawstyle=drawstyle)
+            elif passband:
+                # Samples too sparse for the carrier, which would alias:
+                # the magnitude bounds the passband signal instead
+                ax.plot(times, np.abs(values), label=f"|{wire.name}|",
+                        linewidth=1.5, drawstyle=drawstyle)
+            elif wire.dtype is not float:
+                # In-phase and quadrature components of the envelope
+                ax.plot(times, values.real, label=f"{wire.name} (I)",
+                        linewidth=1.5, drawstyle=drawstyle)
+                ax.plot(times, values.imag, label=f"{wire.name} (Q)",
+                        linewidth=1.5, drawstyle=drawstyle)
+            else:
+                ax.plot(times, values, label=wire.name, linewidth=1.5,
+                        drawstyle=drawstyle)
             ax.grid(True, linestyle='--', alpha=0.6)
             ax.legend(loc='upper right', fontsize='small')
 
@@ -58,3 +93,12 @@ class PlotPanel(ttk.Frame):
 
         self.fig.tight_layout()
         self.canvas.draw()
+
+
+def _resolves(times: np.ndarray, carrier_freq: float) -> bool:
+    """Whether samples at `times` are close enough together to draw a
+    carrier at `carrier_freq` without aliasing it."""
+    if len(times) < 2:
+        return False
+
+    return carrier_freq * float(np.max(np.diff(times))) <= 0.5
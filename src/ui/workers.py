@@ -6,10 +6,12 @@ import threading
 class SimulationThread(threading.Thread):
     """Runs the blocking simulation in a separate thread."""
 
-    def __init__(self, sim: Simulation, duration: float):
+    def __init__(self, sim: Simulation, duration: float,
+                 block_size: int = 4096):
         super().__init__()
         self.sim = sim
         self.duration = duration
+        self.block_size = block_size
         self.stop_requested = False
         self.progress = 0.0
 
@@ -19,9 +21,12 @@ class SimulationThread(threading.Thread):
         total_steps = int(self.duration / self.sim.dt)
         current_step = 0
 
+        self.sim.reserve(total_steps)
+
         while current_step < total_steps and not self.stop_requested:
-            self.sim.advance()
-            current_step += 1
+            n_steps = min(self.block_size, total_steps - current_step)
+            self.sim.advance_block(n_steps)
+            current_step += n_steps
 
             self.progress = (current_step / total_steps) * 100
 